@@ -0,0 +1,215 @@
+"""Lifecycle benchmark of every phantom agent against a local fake API
+
+Drives each PhantomAgent* class through run_and_get_data(_async) against
+FakePhantombuster and reports, per agent: wall time, time spent in each phase
+of a run (averaged over runs) and API calls made per run.
+
+    python -m benchmarks.bench_lifecycle [--runs 5] [--concurrency 2] [--latency 0.02]
+        [--run-time 0.5] [--failure-rate 0] [--result-size 100] [--sync] [--webhooks]
+        [--agents profile,inbox,...]
+
+Phases:
+    slot     waiting for the launch scheduler (when --scheduler is given)
+    acquire  getting an agent from the pool (agents/save on first use)
+    launch   agents/launch
+    wait     polling (or waiting for the webhook) until the container ends
+    fetch    downloading the result
+    parse    turning the result into models
+    release  giving the agent back to the pool
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from mcp_server.phantombuster.activities import PhantomAgentActivities
+from mcp_server.phantombuster.base import PhantomAgentBase, PhantomCredentials
+from mcp_server.phantombuster.company import PhantomAgentCompany, PhantomAgentCompanyBatch
+from mcp_server.phantombuster.connections import PhantomAgentConnections
+from mcp_server.phantombuster.messages import PhantomAgentInbox, PhantomAgentMessageSender, PhantomAgentThread
+from mcp_server.phantombuster.polling import PollingSchedule
+from mcp_server.phantombuster.pool import PhantomAgentPool
+from mcp_server.phantombuster.profile import (
+    PhantomAgentProfile,
+    PhantomAgentProfileBatch,
+    PhantomAgentSalesNavigatorProfile
+)
+from mcp_server.phantombuster.scheduler import LaunchScheduler
+from mcp_server.phantombuster.transport import AsyncPhantomTransport, PhantomTransport
+from mcp_server.phantombuster.webhooks import WebhookReceiver
+
+from benchmarks.fake_phantombuster import FakePhantombuster
+
+
+CREDENTIALS = PhantomCredentials(phantombuster_key="fake-key", session_cookie="fake-cookie", user_agent="bench")
+
+PROFILE_URL = "https://www.linkedin.com/in/user-{}/"
+COMPANY_URL = "https://www.linkedin.com/company/acme-{}/"
+
+# name -> (agent class, run arguments for run i)
+AGENTS: Dict[str, Tuple[type, Callable[[int], tuple]]] = {
+    "profile": (PhantomAgentProfile, lambda i: (PROFILE_URL.format(i),)),
+    "profile_batch": (PhantomAgentProfileBatch, lambda i: ([PROFILE_URL.format(f"{i}-{j}") for j in range(25)],)),
+    "company": (PhantomAgentCompany, lambda i: (COMPANY_URL.format(i),)),
+    "company_batch": (PhantomAgentCompanyBatch, lambda i: ([COMPANY_URL.format(f"{i}-{j}") for j in range(25)],)),
+    "inbox": (PhantomAgentInbox, lambda i: (100, "all")),
+    "thread": (PhantomAgentThread, lambda i: (f"https://www.linkedin.com/messaging/thread/2-{i:012d}/",)),
+    "message": (PhantomAgentMessageSender, lambda i: (PROFILE_URL.format(i), "Hello!")),
+    "activities": (PhantomAgentActivities, lambda i: (PROFILE_URL.format(i),)),
+    "connections": (PhantomAgentConnections, lambda i: (1000, "Recently added")),
+    "sales_navigator": (PhantomAgentSalesNavigatorProfile, lambda i: ("https://www.linkedin.com/sales/search/people?query=x",)),
+}
+
+PHASES = ("slot", "acquire", "launch", "wait", "fetch", "parse", "release")
+# Agent method -> phase it times, for the blocking and the async lifecycle
+PHASE_METHODS = {
+    "acquire_slot": "slot", "acquire_agent": "acquire", "run": "launch", "wait_until_finished": "wait",
+    "get_raw_data": "fetch", "parse_data": "parse", "release_agent": "release",
+}
+
+
+def instrument(agent: PhantomAgentBase, timings: Dict[str, float], is_async: bool):
+    """Time the agent's lifecycle methods by wrapping them on the instance"""
+    for method, phase in PHASE_METHODS.items():
+        name = f"{method}_async" if is_async and method != "parse_data" else method
+        original = getattr(agent, name)
+        if is_async and method != "parse_data":
+            async def timed(*args, _original=original, _phase=phase, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await _original(*args, **kwargs)
+                finally:
+                    timings[_phase] += time.perf_counter() - started
+        else:
+            def timed(*args, _original=original, _phase=phase, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return _original(*args, **kwargs)
+                finally:
+                    timings[_phase] += time.perf_counter() - started
+        setattr(agent, name, timed)
+
+
+async def bench_async(name: str, fake: FakePhantombuster, options: dict, runs: int, concurrency: int):
+    agent_class, arguments = AGENTS[name]
+    timings: List[Dict[str, float]] = []
+    successes = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal successes
+        phase_times = defaultdict(float)
+        agent = agent_class(credentials=CREDENTIALS, **options)
+        agent.result_files_url = fake.files_url
+        instrument(agent, phase_times, is_async=True)
+        async with semaphore:
+            _, success = await agent.run_and_get_data_async(*arguments(i))
+        successes += success
+        timings.append(phase_times)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(runs)])
+    return time.perf_counter() - started, successes, timings
+
+
+def bench_sync(name: str, fake: FakePhantombuster, options: dict, runs: int, concurrency: int):
+    agent_class, arguments = AGENTS[name]
+    timings: List[Dict[str, float]] = []
+
+    def one(i: int) -> bool:
+        phase_times = defaultdict(float)
+        agent = agent_class(credentials=CREDENTIALS, **options)
+        agent.result_files_url = fake.files_url
+        instrument(agent, phase_times, is_async=False)
+        _, success = agent.run_and_get_data(*arguments(i))
+        timings.append(phase_times)
+        return success
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        successes = sum(executor.map(one, range(runs)))
+    return time.perf_counter() - started, successes, timings
+
+
+def report(name: str, wall: float, successes: int, runs: int, timings: List[Dict[str, float]], calls: Counter):
+    phases = "  ".join(
+        f"{phase} {sum(t[phase] for t in timings) / runs * 1000:7.1f}" for phase in PHASES
+    )
+    per_run = ", ".join(f"{endpoint} {count / runs:.1f}" for endpoint, count in sorted(calls.items()))
+    print(f"{name:<16} {successes}/{runs} ok  wall {wall:6.2f}s  |  ms/run: {phases}")
+    print(f"{'':<16} calls/run: {per_run}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="runs per agent")
+    parser.add_argument("--concurrency", type=int, default=2, help="runs in flight at once (and pooled agents)")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per API request")
+    parser.add_argument("--run-time", type=float, default=0.5, help="seconds a container runs")
+    parser.add_argument("--run-jitter", type=float, default=0.0, help="random extra run time, seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of containers that fail")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="share of status polls answered with a 500")
+    parser.add_argument("--result-size", type=int, default=100, help="records per list result")
+    parser.add_argument("--text-size", type=int, default=200, help="characters per long text field")
+    parser.add_argument("--poll-interval", type=float, default=0.1, help="shortest pause between two polls")
+    parser.add_argument("--sync", action="store_true", help="use the blocking lifecycle (threads) instead of asyncio")
+    parser.add_argument("--webhooks", action="store_true", help="wait for webhooks instead of polling")
+    parser.add_argument("--scheduler", action="store_true", help="admit launches through a LaunchScheduler")
+    parser.add_argument("--agents", default=",".join(AGENTS), help="comma separated agents to run")
+    args = parser.parse_args()
+
+    fake = FakePhantombuster(
+        latency=args.latency, run_time=args.run_time, run_jitter=args.run_jitter,
+        failure_rate=args.failure_rate, api_error_rate=args.api_error_rate,
+        result_size=args.result_size, text_size=args.text_size
+    ).start()
+    transport = PhantomTransport(base_url=fake.base_url, max_connections=max(10, args.concurrency * 2))
+    webhooks = WebhookReceiver(fallback_interval=30).start() if args.webhooks else None
+
+    print(
+        f"{args.runs} runs x {args.concurrency} concurrent, {'sync' if args.sync else 'async'}, "
+        f"{'webhooks' if args.webhooks else 'polling'}, latency {args.latency * 1000:.0f} ms, "
+        f"run time {args.run_time}s, result size {args.result_size}"
+    )
+    try:
+        for name in args.agents.split(","):
+            pool = PhantomAgentPool(max_agents=args.concurrency, transport=transport)
+            options = dict(
+                transport=transport,
+                pool=pool,
+                polling=PollingSchedule(min_interval=args.poll_interval, max_interval=max(1.0, args.poll_interval)),
+                scheduler=LaunchScheduler(max_containers=args.concurrency, launches_per_minute=600, burst=args.concurrency)
+                if args.scheduler else None,
+                webhooks=webhooks,
+                # Poll every poll_interval until the schedule has learned the run time, give up after 2 minutes
+                retry_delay=args.poll_interval,
+                max_retries=int(120 / args.poll_interval),
+            )
+            fake.reset_calls()
+            if args.sync:
+                wall, successes, timings = bench_sync(name, fake, options, args.runs, args.concurrency)
+            else:
+                async def run_async():
+                    async_transport = AsyncPhantomTransport(
+                        base_url=fake.base_url, max_connections=max(10, args.concurrency * 2)
+                    )
+                    try:
+                        return await bench_async(
+                            name, fake, dict(options, async_transport=async_transport), args.runs, args.concurrency
+                        )
+                    finally:
+                        await async_transport.close()
+                wall, successes, timings = asyncio.run(run_async())
+            pool.close()
+            report(name, wall, successes, args.runs, timings, fake.reset_calls())
+    finally:
+        if webhooks is not None:
+            webhooks.close()
+        transport.close()
+        fake.close()
+
+
+if __name__ == "__main__":
+    main()
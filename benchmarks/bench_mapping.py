@@ -0,0 +1,55 @@
+"""Micro-benchmark of scraper record -> model conversion
+
+Compares pydantic-validated construction (what parsers did before) with the
+trusted bulk path of ModelMapping, on synthetic Profile Scraper and
+Connections Export records.
+
+    python -m benchmarks.bench_mapping [records]
+"""
+import sys
+import time
+
+from mcp_server.phantombuster.profile import PROFILE_MAPPING
+from mcp_server.phantombuster.connections import CONNECTION_MAPPING
+
+
+def profile_record(i: int) -> dict:
+    return {
+        "linkedinProfileUrl": f"https://www.linkedin.com/in/user-{i}/",
+        "firstName": "Jane", "lastName": f"Doe {i}",
+        "linkedinHeadline": "Head of Growth", "location": "Paris, France",
+        "companyName": "Acme", "linkedinJobTitle": "Head of Growth",
+        "linkedinDescription": "About me " * 20,
+        "linkedinSkillsLabel": "Sales, Marketing, Growth, SaaS, B2B",
+        "linkedinCompanyUrl": "https://www.linkedin.com/company/acme/",
+        "dateRange": "2020 - Present", "linkedinJobDescription": "Grew things " * 10,
+        "linkedinPreviousCompanyName": "Globex", "linkedinPreviousJobTitle": "Growth Lead",
+        "companyIndustry": "Software", "linkedinProfileId": 100000 + i,
+        "linkedinProfileUrn": f"ACoAAB{i:020d}",
+    }
+
+
+def connection_record(i: int) -> dict:
+    return {
+        "profileUrl": f"https://www.linkedin.com/in/user-{i}/",
+        "firstName": "John", "lastName": f"Smith {i}", "fullName": f"John Smith {i}",
+        "title": "Account Executive at Initech", "connectionSince": "2024-01-02",
+    }
+
+
+def bench(label: str, mapping, records: list, repeat: int = 3):
+    for trusted in (False, True):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            mapping.many(records, trusted=trusted)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        mode = "trusted bulk" if trusted else "validated"
+        print(f"{label:<12} {mode:<13} {len(records) / best:>12,.0f} records/s  ({best * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    bench("profiles", PROFILE_MAPPING, [profile_record(i) for i in range(count // 10)])
+    bench("connections", CONNECTION_MAPPING, [connection_record(i) for i in range(count)])
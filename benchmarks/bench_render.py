@@ -0,0 +1,39 @@
+"""Micro-benchmark of MarkdownModel rendering
+
+Times str() and json() (compact and verbose) over a large connections page
+and a list of full profiles, the shapes the tools return most.
+
+    python -m benchmarks.bench_render [connections]
+"""
+import sys
+import time
+
+from mcp_server.phantombuster.connections import CONNECTION_MAPPING
+from mcp_server.phantombuster.models import ConnectionsPage
+from mcp_server.phantombuster.profile import PROFILE_MAPPING
+
+from benchmarks.bench_mapping import connection_record, profile_record
+
+
+def bench(label: str, models: list, repeat: int = 3):
+    for name, render in (
+            ("str", lambda m: m.str()),
+            ("str verbose", lambda m: m.str(verbose=True)),
+            ("json", lambda m: m.json()),
+            ("json verbose", lambda m: m.json(verbose=True))
+        ):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for model in models:
+                render(model)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{label:<12} {name:<13} {best * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    connections = CONNECTION_MAPPING.many([connection_record(i) for i in range(count)])
+    bench("connections", [ConnectionsPage(connections=connections, offset=0)])
+    bench("profiles", PROFILE_MAPPING.many([profile_record(i) for i in range(count // 10)]))
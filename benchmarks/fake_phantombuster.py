@@ -0,0 +1,405 @@
+"""Local stand-in for the Phantombuster API
+
+Serves the endpoints the agents use (agents/save, agents/launch,
+agents/fetch, agents/fetch-all, agents/fetch-output, agents/delete,
+containers/fetch) plus the agents' result files, with made-up results shaped
+like the real scrapers' output. Latency, run time, failure rates and result
+sizes are configurable, so agent lifecycles can be measured without spending
+quota:
+
+    fake = FakePhantombuster(latency=0.02, run_time=0.5).start()
+    transport = PhantomTransport(base_url=fake.base_url)
+    agent = PhantomAgentProfile(credentials, transport=transport)
+    agent.result_files_url = fake.files_url
+    ...
+    fake.close()
+"""
+import itertools
+import json
+import random
+import threading
+import time
+import urllib.request
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+API_PREFIX = "/api/v2/"
+FILES_PREFIX = "/files/"
+ORG_FOLDER = "fake-org"
+
+
+def _profile_records(argument: dict, size: int, text: str) -> List[dict]:
+    urls = argument.get("profileUrls") or [argument.get("spreadsheetUrl")]
+    return [{
+        "query": url,
+        "linkedinProfileUrl": url,
+        "firstName": "Jane", "lastName": f"Doe {i}",
+        "linkedinHeadline": "Head of Growth", "location": "Paris, France",
+        "companyName": "Acme", "linkedinJobTitle": "Head of Growth",
+        "linkedinDescription": text,
+        "linkedinSkillsLabel": "Sales, Marketing, Growth, SaaS, B2B",
+        "linkedinCompanyUrl": "https://www.linkedin.com/company/acme/",
+        "dateRange": "2020 - Present", "linkedinJobDescription": text,
+        "linkedinPreviousCompanyName": "Globex", "linkedinPreviousJobTitle": "Growth Lead",
+        "companyIndustry": "Software", "linkedinProfileId": 100000 + i,
+        "linkedinProfileUrn": f"ACoAAB{i:020d}",
+    } for i, url in enumerate(urls)]
+
+
+def _company_records(argument: dict, size: int, text: str) -> List[dict]:
+    urls = argument.get("companyUrls") or [argument.get("spreadsheetUrl")]
+    return [{
+        "query": url, "companyUrl": url, "name": f"Acme {i}",
+        "description": text, "tagLine": "We make things", "website": "https://acme.example",
+        "industry": "Software", "companySize": "51-200", "employeesOnLinkedIn": 120,
+        "yearFounded": 2012, "mainCompanyID": 1000 + i, "specialties": "SaaS, B2B",
+    } for i, url in enumerate(urls)]
+
+
+def _inbox_records(argument: dict, size: int, text: str) -> List[dict]:
+    count = min(int(argument.get("numberOfThreadsToScrape") or size), size)
+    now = int(time.time())
+    return [{
+        "threadUrl": f"https://www.linkedin.com/messaging/thread/2-{i:012d}/",
+        "linkedInUrls": [f"https://www.linkedin.com/in/user-{i}/"],
+        "firstnameFrom": "John", "lastnameFrom": f"Smith {i}",
+        "message": text, "lastMessageDate": "2026-01-02", "timestamp": str(now - i * 60),
+        "isLastMessageFromMe": i % 2 == 0, "readStatus": i % 3 == 0,
+    } for i in range(count)]
+
+
+def _thread_records(argument: dict, size: int, text: str) -> List[dict]:
+    return [{
+        "threadUrl": argument.get("spreadsheetUrl"),
+        "messages": [
+            {"date": f"2026-01-02T10:{i % 60:02d}:00", "author": "John Smith" if i % 2 else "Me", "message": text}
+            for i in range(size)
+        ],
+    }]
+
+
+def _activity_records(argument: dict, size: int, text: str) -> List[dict]:
+    count = min(int(argument.get("numberMaxOfPosts") or size), size)
+    return [{
+        "postUrl": f"https://www.linkedin.com/feed/update/urn:li:activity:{7000000000 + i}/",
+        "type": "Post", "postContent": text, "likeCount": "1,234", "commentCount": 12,
+        "repostCount": 3, "postDate": "2d", "profileUrl": argument.get("spreadsheetUrl"),
+    } for i in range(count)]
+
+
+def _connection_records(argument: dict, size: int, text: str) -> List[dict]:
+    count = min(int(argument.get("numberOfProfiles") or size), size)
+    return [{
+        "profileUrl": f"https://www.linkedin.com/in/user-{i}/",
+        "firstName": "John", "lastName": f"Smith {i}", "fullName": f"John Smith {i}",
+        "title": "Account Executive at Initech", "connectionSince": "2024-01-02",
+    } for i in range(count)]
+
+
+def _sales_navigator_records(argument: dict, size: int, text: str) -> List[dict]:
+    count = min(int(argument.get("numberOfResultsPerSearch") or size), size)
+    return [{
+        "defaultProfileUrl": f"https://www.linkedin.com/in/lead-{i}/",
+        "firstName": "Ada", "lastName": f"Lovelace {i}", "title": "CTO",
+        "companyName": "Initech", "location": "London", "summary": text,
+    } for i in range(count)]
+
+
+def _no_records(argument: dict, size: int, text: str) -> List[dict]:
+    return []
+
+
+# Script of an agent -> result records of one of its runs
+RESULT_BUILDERS: Dict[str, Callable[[dict, int, str], List[dict]]] = {
+    "LinkedIn Profile Scraper.js": _profile_records,
+    "LinkedIn Company Scraper.js": _company_records,
+    "LinkedIn Inbox Scraper.js": _inbox_records,
+    "LinkedIn Message Thread Scraper.js": _thread_records,
+    "LinkedIn Activity Extractor.js": _activity_records,
+    "LinkedIn Connections Export.js": _connection_records,
+    "Sales Navigator Search Export.js": _sales_navigator_records,
+    "LinkedIn Message Sender.js": _no_records,
+}
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status: int, payload=None, raw: Optional[bytes] = None, modified: Optional[float] = None):
+        body = raw if raw is not None else (json.dumps(payload).encode() if payload is not None else b"")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if modified is not None:
+            self.send_header("Last-Modified", formatdate(modified, usegmt=True))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method: str):
+        fake: "FakePhantombuster" = self.server.fake
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else {}
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        status, payload, raw = fake.handle(method, url.path, params, body)
+        modified = fake.file_modified(url.path) if status == 200 and url.path.startswith(FILES_PREFIX) else None
+        self._reply(status, payload, raw, modified)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fake: "FakePhantombuster"):
+        self.fake = fake
+        super().__init__(address, _FakeHandler)
+
+
+class FakePhantombuster:
+    """In-process fake of the Phantombuster API, served over HTTP
+
+    Args:
+        latency: Seconds every request takes
+        run_time: Seconds a container runs before it ends
+        run_jitter: Random extra run time, up to this many seconds
+        failure_rate: Share of containers that end with an error
+        failure_message: Exit message of the containers that end with an error
+        api_error_rate: Share of status polls answered with a 500
+        result_size: Records per list result (inbox threads, connections, ...)
+        text_size: Characters of each long text field (descriptions, messages)
+        send_webhooks: Post to the agent's webhook when a container ends
+        result_files: Write the agent's result file when a container succeeds,
+            otherwise the file of the agent's previous run is left as is
+        execution_quota: Monthly execution time reported by orgs/fetch-resources, seconds
+        seed: Seed of the random failures and jitter
+        host: Interface to listen on
+        port: Port to listen on, 0 for any free port
+    """
+
+    def __init__(
+            self,
+            latency: float = 0.0,
+            run_time: float = 0.5,
+            run_jitter: float = 0.0,
+            failure_rate: float = 0.0,
+            failure_message: str = "error",
+            api_error_rate: float = 0.0,
+            result_size: int = 100,
+            text_size: int = 200,
+            send_webhooks: bool = True,
+            result_files: bool = True,
+            execution_quota: float = 20 * 3600,
+            seed: int = 0,
+            host: str = "127.0.0.1",
+            port: int = 0
+        ):
+        self.latency = latency
+        self.run_time = run_time
+        self.run_jitter = run_jitter
+        self.failure_rate = failure_rate
+        self.failure_message = failure_message
+        self.api_error_rate = api_error_rate
+        self.result_size = result_size
+        self.text_size = text_size
+        self.send_webhooks = send_webhooks
+        self.result_files = result_files
+        self.execution_quota = execution_quota
+        self.execution_time = 0.0
+
+        self.calls: Counter = Counter()
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1000)
+        self._lock = threading.Lock()
+        self._agents: Dict[str, dict] = {}
+        self._containers: Dict[str, dict] = {}
+        self._files: Dict[str, bytes] = {}
+        self._file_times: Dict[str, float] = {}
+        self._server = _FakeServer((host, port), self)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    @property
+    def files_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{FILES_PREFIX}"
+
+    def start(self) -> "FakePhantombuster":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="fake-phantombuster", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def reset_calls(self) -> Counter:
+        """Calls made since the last reset, by endpoint"""
+        with self._lock:
+            calls, self.calls = self.calls, Counter()
+        return calls
+
+    def file_modified(self, path: str) -> Optional[float]:
+        """When a stored file was last written"""
+        with self._lock:
+            return self._file_times.get(path[len(FILES_PREFIX):])
+
+    def handle(self, method: str, path: str, params: dict, body: dict):
+        """Answer one request: (status, JSON payload, raw body)"""
+        if self.latency:
+            time.sleep(self.latency)
+        if path.startswith(FILES_PREFIX):
+            with self._lock:
+                self.calls["result file"] += 1
+                content = self._files.get(path[len(FILES_PREFIX):])
+            return (200, None, content) if content is not None else (404, {"error": "Not found"}, None)
+
+        endpoint = path[len(API_PREFIX):] if path.startswith(API_PREFIX) else path
+        with self._lock:
+            self.calls[endpoint] += 1
+            handler = getattr(self, f"_{method.lower()}_{endpoint.replace('/', '_').replace('-', '_')}", None)
+            if handler is None:
+                return 404, {"error": f"Unknown endpoint {method} {endpoint}"}, None
+            return handler(params, body)
+
+    # Endpoints, called with the lock held
+
+    def _post_agents_save(self, params: dict, body: dict):
+        agent_id = str(body.get("id") or next(self._ids))
+        self._agents[agent_id] = {**self._agents.get(agent_id, {}), **body, "id": agent_id}
+        return 200, {"id": agent_id}, None
+
+    def _post_agents_delete(self, params: dict, body: dict):
+        self._agents.pop(str(body.get("id")), None)
+        return 200, {}, None
+
+    def _get_agents_fetch(self, params: dict, body: dict):
+        agent = self._agents.get(str(params.get("id")))
+        if agent is None:
+            return 404, {"error": "Agent not found"}, None
+        return 200, {**agent, "orgS3Folder": ORG_FOLDER, "s3Folder": f"agent-{agent['id']}"}, None
+
+    def _get_agents_fetch_all(self, params: dict, body: dict):
+        return 200, [{"id": agent["id"], "name": agent.get("name")} for agent in self._agents.values()], None
+
+    def _post_agents_launch(self, params: dict, body: dict):
+        agent = self._agents.get(str(body.get("id")))
+        if agent is None:
+            return 404, {"error": "Agent not found"}, None
+        container_id = str(next(self._ids))
+        run_time = self.run_time + self._random.random() * self.run_jitter
+        container = {
+            "id": container_id,
+            "agentId": agent["id"],
+            "script": agent.get("script"),
+            "argument": body.get("argument") or agent.get("argument") or {},
+            "endsAt": time.monotonic() + run_time,
+            "createdAt": int(time.time() * 1000),
+            "endedAt": int((time.time() + run_time) * 1000),
+            "failed": self._random.random() < self.failure_rate,
+            "ended": False,
+        }
+        self._containers[container_id] = container
+        if self.send_webhooks and agent.get("webhook"):
+            timer = threading.Timer(run_time, self._post_webhook, (agent["webhook"], container_id))
+            timer.daemon = True
+            timer.start()
+        return 200, {"containerId": container_id}, None
+
+    def _get_agents_fetch_output(self, params: dict, body: dict):
+        container = next(
+            (c for c in reversed(list(self._containers.values())) if c["agentId"] == str(params.get("id"))), None
+        )
+        if container is None:
+            return 404, {"error": "No container"}, None
+        self._end(container)
+        return 200, {"status": "finished" if container["ended"] else "running", "output": self._output(container)}, None
+
+    def _get_containers_fetch(self, params: dict, body: dict):
+        container = self._containers.get(str(params.get("id")))
+        if container is None:
+            return 404, {"error": "Container not found"}, None
+        if self._random.random() < self.api_error_rate:
+            return 500, {"error": "Internal error"}, None
+        self._end(container)
+        if not container["ended"]:
+            return 200, {"id": container["id"], "status": "running"}, None
+
+        payload = {
+            "id": container["id"], "status": "finished",
+            "createdAt": container["createdAt"], "endedAt": container["endedAt"]
+        }
+        if container["failed"]:
+            payload.update(exitCode=1, endType="error", exitMessage=self.failure_message)
+        else:
+            payload.update(exitCode=0, endType="finished", exitMessage="finished")
+            if params.get("withResultObject"):
+                payload["resultObject"] = container["result"]
+        if params.get("withOutput"):
+            self.calls["console output"] += 1
+            payload["output"] = self._output(container)
+        return 200, payload, None
+
+    def _get_orgs_fetch_resources(self, params: dict, body: dict):
+        return 200, {"executionTime": {"current": self.execution_time, "max": self.execution_quota}}, None
+
+    # Helpers
+
+    def _end(self, container: dict):
+        """Produce the container's result once its run time is over"""
+        if container["ended"] or time.monotonic() < container["endsAt"]:
+            return
+        container["ended"] = True
+        self.execution_time += (container["endedAt"] - container["createdAt"]) / 1000
+        if container["failed"]:
+            return
+        build = RESULT_BUILDERS.get(container["script"], _no_records)
+        records = build(container["argument"], self.result_size, "lorem ipsum " * (self.text_size // 12))
+        container["result"] = json.dumps(records)
+        if self.result_files:
+            path = f"{ORG_FOLDER}/agent-{container['agentId']}/result.json"
+            self._files[path] = container["result"].encode()
+            self._file_times[path] = time.time()
+
+    def _output(self, container: dict) -> str:
+        if container["failed"] and container["ended"]:
+            return "Starting...\nError: Can't open the URL, is it a valid LinkedIn URL?\n"
+        return "Starting...\nDone.\n"
+
+    def _post_webhook(self, url: str, container_id: str):
+        with self._lock:
+            container = self._containers.get(container_id)
+            if container is None:
+                return
+            container["endsAt"] = min(container["endsAt"], time.monotonic())
+            self._end(container)
+            payload = {
+                "agentId": container["agentId"],
+                "containerId": container_id,
+                "exitCode": 1 if container["failed"] else 0,
+                "exitMessage": self.failure_message if container["failed"] else "finished",
+            }
+        request = urllib.request.Request(
+            url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except OSError:
+            pass
@@ -1,31 +1,102 @@
 from pydantic import BaseModel
-from typing import get_args, get_origin, Union, Literal, Optional, Dict, List
+from typing import get_args, get_origin, Any, ClassVar, Union, Literal, Optional, Dict, List, Tuple
 
 class GetIdModel(BaseModel):
-    id: Optional[int] = None 
-    
+    id: Optional[int] = None
+
     def get_id(self):
         return self.id
 
+
+# Поля класса, вычисленные один раз: (key, label, verbose label, description)
+_RENDER_PLANS: Dict[type, List[Tuple[str, str, str, Optional[str]]]] = {}
+# schema_str по (class, indent, verbose)
+_SCHEMA_CACHE: Dict[Tuple[type, int, bool], str] = {}
+
+_EMPTY_TYPES = (str, list, dict)
+
+
+def _is_empty(value) -> bool:
+    """Same as value in [None, "", {}, []], without four equality checks"""
+    return value is None or (value.__class__ in _EMPTY_TYPES and not value)
+
+
+def _type_to_str(tp) -> str:
+    origin = get_origin(tp)
+    args = get_args(tp)
+
+    # убираем Optional
+    if origin is Union:
+        non_none_args = [arg for arg in args if arg is not type(None)]
+        return _type_to_str(non_none_args[0]) if len(non_none_args) == 1 else f"Union[{', '.join(_type_to_str(a) for a in non_none_args)}]"
+
+    elif origin in (list, List):
+        return f"List[{_type_to_str(args[0])}]" if args else "List"
+
+    elif origin in (dict, Dict):
+        return f"Dict[{_type_to_str(args[0])}, {_type_to_str(args[1])}]" if len(args) == 2 else "Dict"
+
+    elif origin is Literal:
+        return f"Literal[{', '.join(repr(arg) for arg in args)}]"
+
+    elif isinstance(tp, type):
+        return tp.__name__
+
+    return tp.__name__ if hasattr(tp, '__name__') else str(tp)
+
+
+def find_markdown_model(tp):
+    """
+    Рекурсивно ищет первый тип, который наследует MarkdownModel.
+    """
+    origin = get_origin(tp)
+    args = get_args(tp)
+    if origin is Union:
+        for arg in args:
+            res = find_markdown_model(arg)
+            if res:
+                return res
+    elif origin in (list, List, Optional):
+        if args:
+            return find_markdown_model(args[0])
+    elif isinstance(tp, type) and issubclass(tp, MarkdownModel):
+        return tp
+    return None
+
+
 class MarkdownModel(BaseModel):
+    # Поля, которые убираются первыми, когда ответ не влезает в бюджет
+    low_value_fields: ClassVar[Tuple[str, ...]] = ()
+
+    @classmethod
+    def _render_plan(cls) -> List[Tuple[str, str, str, Optional[str]]]:
+        """Labels of every field, computed once per class"""
+        plan = _RENDER_PLANS.get(cls)
+        if plan is None:
+            plan = []
+            for key, field in cls.model_fields.items():
+                description = field.description
+                label = f"**{key}**"
+                verbose_label = f"{label} _({description})_" if description else label
+                plan.append((key, label, verbose_label, description))
+            _RENDER_PLANS[cls] = plan
+        return plan
+
     def str(self, indent: int = 0, verbose: bool = False) -> str:
         lines = []
         prefix = "  " * indent
-        fields = self.model_fields if hasattr(self, 'model_fields') else self.__fields__
+        values = self.__dict__
 
         # docstring модели
         if verbose and self.__doc__:
             lines.append(f"{prefix}{self.__doc__.strip()}")
 
-        for key, field in fields.items():
-            value = getattr(self, key, None)
-            if value in [None, "", {}, []]:
+        for key, label, verbose_label, _ in self._render_plan():
+            value = values.get(key)
+            if _is_empty(value):
                 continue
 
-            description = field.description if hasattr(field, 'description') else None
-            field_label = f"**{key}**"
-            if verbose and description:
-                field_label += f" _({description})_"
+            field_label = verbose_label if verbose else label
 
             # вложенная модель
             if isinstance(value, MarkdownModel):
@@ -34,21 +105,23 @@ class MarkdownModel(BaseModel):
             # список
             elif isinstance(value, list):
                 lines.append(f"{prefix}{field_label}:")
+                item_prefix = "  " * (indent + 1)
                 for item in value:
                     if isinstance(item, MarkdownModel):
                         item_lines = item.str(indent + 2, verbose).splitlines()
                         if item_lines:
                             # первый элемент с "-", остальные без
-                            lines.append(f"{'  ' * (indent + 1)}- {item_lines[0].lstrip()}")
-                            lines.extend(f"{'  ' * (indent + 1)}  {line.lstrip()}" for line in item_lines[1:])
+                            lines.append(f"{item_prefix}- {item_lines[0].lstrip()}")
+                            lines.extend(f"{item_prefix}  {line.lstrip()}" for line in item_lines[1:])
                     else:
-                        lines.append(f"{'  ' * (indent + 1)}- {item}")
+                        lines.append(f"{item_prefix}- {item}")
 
             # словарь
             elif isinstance(value, dict):
                 lines.append(f"{prefix}{field_label}:")
+                item_prefix = "  " * (indent + 1)
                 for k, v in value.items():
-                    lines.append(f"{'  ' * (indent + 1)}- {k}: {v}")
+                    lines.append(f"{item_prefix}- {k}: {v}")
 
             # обычное поле
             else:
@@ -58,18 +131,18 @@ class MarkdownModel(BaseModel):
 
     def __str__(self):
         return self.str(verbose=True)
-    
+
     def json(self, verbose: bool = False) -> dict:
         result = {}
-        fields = self.model_fields if hasattr(self, 'model_fields') else self.__fields__
+        values = self.__dict__
 
         # Add docstring if verbose mode is on
         if verbose and self.__doc__:
             result["__doc__"] = self.__doc__.strip()
 
-        for key, field in fields.items():
-            value = getattr(self, key, None)
-            if value in [None, "", {}, []]:
+        for key, _, _, description in self._render_plan():
+            value = values.get(key)
+            if _is_empty(value):
                 continue
 
             # Handle nested model
@@ -83,97 +156,102 @@ class MarkdownModel(BaseModel):
                     for item in value
                 ]
 
-            # Handle dictionary
-            elif isinstance(value, dict):
-                result[key] = value
-
-            # Handle regular field
+            # Handle dictionary and regular fields
             else:
                 result[key] = value
 
             # Add field description if verbose mode is on
-            if verbose:
-                description = field.description if hasattr(field, 'description') else None
-                if description:
-                    if not isinstance(result[key], dict):
-                        result[key] = {"value": result[key]}
-                    result[key]["description"] = description
+            if verbose and description:
+                if isinstance(result[key], dict):
+                    result[key] = {**result[key], "description": description}
+                else:
+                    result[key] = {"value": result[key], "description": description}
+
+        return result
+
+    def project(
+            self,
+            fields: Optional[Dict[str, Any]] = None,
+            drop_low_value: bool = False,
+            max_text: Optional[int] = None,
+            report=None
+        ) -> dict:
+        """Plain data of the model, like json(), cut down to what was asked for
+
+        Args:
+            fields: Field name -> nested fields (None for the whole value), None for every field
+            drop_low_value: Leave out the low_value_fields of every model
+            max_text: Cut longer strings to this many characters
+            report: Collects what was left out, in its ``fields`` and ``truncated`` sets
+        """
+        result = {}
+        values = self.__dict__
+        low_value = self.low_value_fields if drop_low_value else ()
+
+        for key, _, _, _ in self._render_plan():
+            if fields is not None and key not in fields:
+                continue
+            value = values.get(key)
+            if _is_empty(value):
+                continue
+            if key in low_value:
+                if report is not None:
+                    report.fields.add(f"{self.__class__.__name__}.{key}")
+                continue
+            nested = fields[key] if fields is not None else None
+            result[key] = self._project_value(key, value, nested, drop_low_value, max_text, report)
 
         return result
-    
+
+    def head(self, field: str, count: int) -> "MarkdownModel":
+        """Copy keeping only the first ``count`` items of a list field, to fit an answer in a budget
+
+        Models whose other fields follow that list (e.g. a next page cursor) override it.
+        """
+        return self.model_copy(update={field: getattr(self, field)[:count]})
+
+    def _project_value(self, key: str, value, fields, drop_low_value: bool, max_text: Optional[int], report):
+        if isinstance(value, MarkdownModel):
+            return value.project(fields, drop_low_value, max_text, report)
+        if isinstance(value, list):
+            return [self._project_value(key, item, fields, drop_low_value, max_text, report) for item in value]
+        if max_text is not None and isinstance(value, str) and len(value) > max_text:
+            if report is not None:
+                report.truncated.add(f"{self.__class__.__name__}.{key}")
+            return value[:max_text] + "…"
+        return value
+
     @classmethod
     def schema_str(cls, indent: int = 0, verbose: bool = True) -> str:
+        key = (cls, indent, verbose)
+        schema = _SCHEMA_CACHE.get(key)
+        if schema is None:
+            schema = _SCHEMA_CACHE[key] = "\n".join(cls._schema_lines(indent, verbose, ()))
+        return schema
+
+    @classmethod
+    def _schema_lines(cls, indent: int, verbose: bool, expanding: Tuple[type, ...]) -> List[str]:
+        """Schema lines; models already being expanded higher up are not expanded again"""
         lines = []
         prefix = "  " * indent
+        expanding = expanding + (cls,)
 
         if verbose and cls.__doc__:
             lines.append(f"{prefix}{cls.__doc__.strip()}")
 
-        fields = cls.model_fields if hasattr(cls, 'model_fields') else cls.__fields__
-
-        def type_to_str(tp):
-            origin = get_origin(tp)
-            args = get_args(tp)
-
-            # убираем Optional
-            if origin is Union:
-                non_none_args = [arg for arg in args if arg is not type(None)]
-                return type_to_str(non_none_args[0]) if len(non_none_args) == 1 else f"Union[{', '.join(type_to_str(a) for a in non_none_args)}]"
-
-            elif origin in (list, List):
-                return f"List[{type_to_str(args[0])}]" if args else "List"
-
-            elif origin in (dict, Dict):
-                return f"Dict[{type_to_str(args[0])}, {type_to_str(args[1])}]" if len(args) == 2 else "Dict"
-
-            elif origin is Literal:
-                return f"Literal[{', '.join(repr(arg) for arg in args)}]"
-
-            elif isinstance(tp, type):
-                return tp.__name__
-
-            return tp.__name__ if hasattr(tp, '__name__') else str(tp)
-
-        def find_markdown_model(tp):
-            """
-            Рекурсивно ищет первый тип, который наследует MarkdownModel.
-            """
-            origin = get_origin(tp)
-            args = get_args(tp)
-            if origin is Union:
-                for arg in args:
-                    res = find_markdown_model(arg)
-                    if res:
-                        return res
-            elif origin in (list, List, Optional):
-                if args:
-                    return find_markdown_model(args[0])
-            elif isinstance(tp, type) and issubclass(tp, MarkdownModel):
-                return tp
-            return None
-
-        for key, field in fields.items():
-            description = field.description if hasattr(field, 'description') else None
-            field_label = f"**{key}**"
-            if verbose and description:
-                field_label += f" _({description})_"
-
-            field_type = field.annotation if hasattr(field, 'annotation') else field.outer_type_
-            type_repr = type_to_str(field_type)
+        for key, label, verbose_label, _ in cls._render_plan():
+            field_type = cls.model_fields[key].annotation
+            lines.append(f"{prefix}{verbose_label if verbose else label}: {_type_to_str(field_type)}")
 
             # ищем вложенную MarkdownModel
             inner_type = find_markdown_model(field_type)
+            if inner_type and inner_type not in expanding:
+                lines.extend(inner_type._schema_lines(indent + 1, verbose, expanding))
 
-            if inner_type and inner_type != cls:
-                lines.append(f"{prefix}{field_label}: {type_repr}")
-                lines.append(inner_type.schema_str(indent + 1, verbose))
-            else:
-                lines.append(f"{prefix}{field_label}: {type_repr}")
-
-        return "\n".join(lines)
+        return lines
 
     def get_class(self):
         """
         Возвращает класс экземпляра (аналог my_obj.__class__).
         """
-        return self.__class__
\ No newline at end of file
+        return self.__class__
@@ -0,0 +1,204 @@
+import functools
+import inspect
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from mcp_server.base_model.MarkdownModel import MarkdownModel, find_markdown_model
+
+
+# Roughly what one token is worth in characters of JSON
+CHARS_PER_TOKEN = 4
+
+# Text limits tried in turn once low-value fields are gone and the answer is still too big
+TEXT_LIMITS = (1000, 500, 250, 100, 50)
+
+
+class Omitted:
+    """What a budgeted answer left out"""
+
+    def __init__(self):
+        self.fields = set()
+        self.truncated = set()
+        self.text_limit = None
+        self.items = 0
+        self.items_of = None
+
+    def json(self) -> dict:
+        result = {}
+        if self.fields:
+            result["fields"] = sorted(self.fields)
+        if self.truncated:
+            result["truncated"] = sorted(self.truncated)
+            result["text_limit"] = self.text_limit
+        if self.items:
+            result["items"] = self.items
+            if self.items_of:
+                result["items_of"] = self.items_of
+        return result
+
+
+def parse_fields(fields: List[str]) -> Dict[str, Any]:
+    """["name", "jobs.title", "jobs.company_name"] -> {"name": None, "jobs": {"title": None, "company_name": None}}"""
+    tree = {}
+    for path in fields:
+        node = tree
+        *parents, leaf = path.split(".")
+        for name in parents:
+            if node.get(name) is None:
+                node[name] = {}
+            node = node[name]
+        if leaf not in node:
+            node[leaf] = None
+    return tree
+
+
+def check_fields(model: type, fields: Dict[str, Any], prefix: str = "") -> List[str]:
+    """Paths of ``fields`` that ``model`` does not have"""
+    unknown = []
+    for name, nested in fields.items():
+        info = model.model_fields.get(name)
+        if info is None:
+            unknown.append(prefix + name)
+        elif nested is not None:
+            inner = find_markdown_model(info.annotation)
+            if inner is None:
+                unknown.extend(f"{prefix}{name}.{sub}" for sub in nested)
+            else:
+                unknown.extend(check_fields(inner, nested, f"{prefix}{name}."))
+    return unknown
+
+
+def _size(data: Any) -> int:
+    return len(json.dumps(data, ensure_ascii=False, default=str))
+
+
+def _project(result: Any, fields, drop_low_value: bool, max_text: Optional[int], report: Omitted) -> Any:
+    if isinstance(result, MarkdownModel):
+        return result.project(fields, drop_low_value, max_text, report)
+    return [
+        item.project(fields, drop_low_value, max_text, report) if isinstance(item, MarkdownModel) else item
+        for item in result
+    ]
+
+
+def _longest_head(length: int, fits: Callable[[int], bool]) -> int:
+    """Largest count in [0, length] for which fits(count) holds, fits being monotonic"""
+    low, high = 0, length
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _largest_list(model: MarkdownModel, data: dict) -> Optional[str]:
+    """Field of the model holding the biggest list in its projected data"""
+    lists = [key for key, value in data.items() if isinstance(value, list) and isinstance(getattr(model, key, None), list)]
+    return max(lists, key=lambda key: _size(data[key])) if lists else None
+
+
+def shape_result(result: Any, fields: Optional[Dict[str, Any]] = None, max_chars: Optional[int] = None) -> Any:
+    """Project a tool result on ``fields`` and fit it in ``max_chars`` of JSON
+
+    Errors and results that are not models are returned as they are. Without a
+    budget the projected data is returned. With one, the answer is
+    ``{"data": ..., "chars": ...}`` plus an ``omitted`` report when the data
+    had to be cut: low-value fields are dropped first, then long text is
+    shortened, then the last items of a list are left out (the result's own
+    items, or those of the biggest list field of a model, see
+    MarkdownModel.head). An error is returned when even that does not fit.
+    """
+    is_list = isinstance(result, list) and any(isinstance(item, MarkdownModel) for item in result)
+    if not (isinstance(result, MarkdownModel) or is_list):
+        return result
+    if max_chars is None:
+        return _project(result, fields, False, None, Omitted())
+
+    report = Omitted()
+    drop_low_value, max_text = False, None
+    data = _project(result, fields, drop_low_value, max_text, report)
+    size = _size(data)
+    if size > max_chars:
+        drop_low_value = True
+        data = _project(result, fields, drop_low_value, max_text, report)
+        size = _size(data)
+    for limit in TEXT_LIMITS:
+        if size <= max_chars:
+            break
+        report.truncated.clear()
+        report.text_limit = max_text = limit
+        data = _project(result, fields, drop_low_value, max_text, report)
+        size = _size(data)
+    if size > max_chars and is_list:
+        # Keep the longest head of the list that fits
+        kept = _longest_head(len(data), lambda count: _size(data[:count]) <= max_chars)
+        report.items = len(data) - kept
+        data = data[:kept]
+        size = _size(data)
+    elif size > max_chars and isinstance(result, MarkdownModel):
+        field = _largest_list(result, data)
+        if field is not None:
+            items = len(getattr(result, field))
+
+            def head_data(count: int):
+                return _project(result.head(field, count), fields, drop_low_value, max_text, report)
+
+            kept = _longest_head(items, lambda count: _size(head_data(count)) <= max_chars)
+            report.items, report.items_of = items - kept, field
+            data = head_data(kept)
+            size = _size(data)
+    if size > max_chars:
+        return {
+            "error": True,
+            "message": f"The answer needs at least {size} characters, over the budget of {max_chars}: ask for fewer fields or a larger budget"
+        }
+
+    answer = {"data": data, "chars": size}
+    omitted = report.json()
+    if omitted:
+        answer["omitted"] = omitted
+    return answer
+
+
+_BUDGET_PARAMETERS = [
+    inspect.Parameter("fields", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Optional[List[str]]),
+    inspect.Parameter("max_chars", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Optional[int]),
+    inspect.Parameter("max_tokens", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Optional[int]),
+]
+
+
+def budgeted(tool: Callable) -> Callable:
+    """Add ``fields``, ``max_chars`` and ``max_tokens`` parameters to an async tool
+
+    The fields are checked against the model the tool returns (taken from its
+    return annotation) before the tool runs, so a typo does not cost a
+    scrape. ``max_tokens`` is turned into characters with CHARS_PER_TOKEN,
+    the smaller of the two budgets wins.
+    """
+    signature = inspect.signature(tool)
+    model = find_markdown_model(signature.return_annotation)
+
+    @functools.wraps(tool)
+    async def wrapper(*args, fields: Optional[List[str]] = None, max_chars: Optional[int] = None,
+                      max_tokens: Optional[int] = None, **kwargs):
+        projection = None
+        if fields:
+            projection = parse_fields(fields)
+            unknown = check_fields(model, projection) if model is not None else []
+            if unknown:
+                return {
+                    "error": True,
+                    "message": f"Unknown field(s): {', '.join(unknown)}. {model.__name__} fields: {', '.join(model.model_fields)}"
+                }
+        budgets = [budget for budget in (max_chars, max_tokens and max_tokens * CHARS_PER_TOKEN) if budget]
+        max_chars = min(budgets) if budgets else None
+
+        result = await tool(*args, **kwargs)
+        if projection is None and max_chars is None:
+            return result
+        return shape_result(result, projection, max_chars)
+
+    wrapper.__signature__ = signature.replace(parameters=[*signature.parameters.values(), *_BUDGET_PARAMETERS])
+    return wrapper
@@ -0,0 +1,141 @@
+import asyncio
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pydantic import Field
+
+from mcp_server.base_model.MarkdownModel import MarkdownModel
+from mcp_server.phantombuster.base import run_listener, run_tags
+
+
+logger = logging.getLogger(__name__)
+
+# Order of job states, a job only moves forward
+JOB_STATES = ("queued", "launched", "running", "finished", "failed")
+
+
+class ScrapeJob(MarkdownModel):
+    """Scrape running in the background, started with start_scrape"""
+    job_id: str
+    kind: str
+    args: Dict[str, Any] = Field(default_factory=dict)
+    state: str = Field("queued", description="queued, launched, running, finished or failed")
+    container_ids: List[str] = Field(default_factory=list, description="Phantombuster containers launched for the job")
+    created_at: float = Field(description="Unix time the job was started")
+    launched_at: Optional[float] = Field(None, description="Unix time the first container was launched")
+    finished_at: Optional[float] = None
+    queued_seconds: Optional[float] = Field(None, description="Time spent waiting for a launch slot or an agent")
+    duration_seconds: Optional[float] = None
+    error: Optional[Any] = None
+    result: Optional[Any] = None
+
+
+class JobRegistry:
+    """Runs scrapes as asyncio tasks and keeps their state for later collection
+
+    Each job runs a coroutine (usually a tool function) with a run listener in
+    its context, so every phantom agent it creates reports its lifecycle to
+    the job. Its runs are tagged with ``priority``, so budget limits can
+    refuse background scrapes before interactive ones. Finished jobs are kept
+    for ``ttl`` seconds, and at most ``max_jobs`` jobs are kept in total
+    (oldest finished jobs go first).
+
+    Args:
+        max_jobs: Maximum number of jobs remembered
+        ttl: Seconds a finished job stays available
+        priority: Priority of the phantom runs of jobs
+    """
+
+    def __init__(self, max_jobs: int = 500, ttl: float = 3600, priority: str = "low"):
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.priority = priority
+        self._jobs: "OrderedDict[str, ScrapeJob]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self, kind: str, run: Callable[[], Awaitable[Any]], args: Optional[dict] = None) -> ScrapeJob:
+        """Start ``run()`` in the background and return its job right away"""
+        self._prune()
+        job = ScrapeJob(job_id=uuid.uuid4().hex[:12], kind=kind, args=args or {}, created_at=time.time())
+        self._jobs[job.job_id] = job
+
+        async def run_job():
+            run_listener.set(lambda agent, state: self._on_agent_state(job, agent, state))
+            run_tags.set({**(run_tags.get() or {}), "priority": self.priority})
+            return await run()
+
+        task = asyncio.ensure_future(run_job())
+        self._tasks[job.job_id] = task
+        task.add_done_callback(lambda done: self._on_done(job, done))
+        return job
+
+    def _advance(self, job: ScrapeJob, state: str):
+        if JOB_STATES.index(state) > JOB_STATES.index(job.state):
+            job.state = state
+
+    def _on_agent_state(self, job: ScrapeJob, agent, state: str):
+        if state == "launched":
+            if agent.container_id and str(agent.container_id) not in job.container_ids:
+                job.container_ids.append(str(agent.container_id))
+            if job.launched_at is None:
+                job.launched_at = time.time()
+                job.queued_seconds = round(job.launched_at - job.created_at, 2)
+        # A batch job stays running until its coroutine returns, even when
+        # some of its containers are already done
+        if state in ("launched", "running"):
+            self._advance(job, state)
+
+    def _on_done(self, job: ScrapeJob, task: asyncio.Task):
+        self._tasks.pop(job.job_id, None)
+        job.finished_at = time.time()
+        job.duration_seconds = round(job.finished_at - job.created_at, 2)
+        if task.cancelled():
+            job.state = "failed"
+            job.error = "Job was cancelled"
+            return
+        exception = task.exception()
+        if exception is not None:
+            logger.warning("Job %s (%s) raised %r", job.job_id, job.kind, exception)
+            job.state = "failed"
+            job.error = f"{type(exception).__name__}: {exception}"
+            return
+        result = task.result()
+        # Tools report failures as {"error": True, ...} dicts
+        if isinstance(result, dict) and result.get("error"):
+            job.state = "failed"
+            job.error = result
+        else:
+            job.state = "finished"
+            job.result = result
+
+    def _prune(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        while len(self._jobs) >= self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
+
+    def get(self, job_id: str) -> Optional[ScrapeJob]:
+        return self._jobs.get(job_id)
+
+    def list(self, state: Optional[str] = None) -> List[ScrapeJob]:
+        """Jobs, most recent first, optionally only those in ``state``"""
+        return [job for job in reversed(self._jobs.values()) if state is None or job.state == state]
+
+    def stats(self) -> dict:
+        """Number of remembered jobs in each state"""
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self._jobs.values():
+            counts[job.state] += 1
+        return counts
+
+    def cancel(self, job_id: str) -> bool:
+        task = self._tasks.get(job_id)
+        if task is None:
+            return False
+        return task.cancel()
@@ -1,14 +1,39 @@
 # linkedin-server.py
 import os
+import time
+import atexit
+import asyncio
+import inspect
+import functools
 from mcp.server.fastmcp import FastMCP
 from dotenv import load_dotenv
 import logging
+from collections import OrderedDict
 
-from typing import List, Optional
-from mcp_server.phantombuster.profile import PhantomAgentProfile, Profile, PhantomCredentials
-from mcp_server.phantombuster.company import PhantomAgentCompany, Company
+from typing import Any, Callable, Dict, List, Optional, Type, Union
+from mcp_server.phantombuster.profile import PhantomAgentProfile, PhantomAgentProfileBatch, Profile, PhantomCredentials
+from mcp_server.phantombuster.company import PhantomAgentCompany, PhantomAgentCompanyBatch, Company
+from mcp_server.phantombuster.models import ProfileResult, CompanyResult, ConnectionsPage
 from mcp_server.phantombuster.messages import PhantomAgentInbox, PhantomAgentThread, PhantomAgentMessageSender, Thread, Message
 from mcp_server.phantombuster.activities import PhantomAgentActivities, Activity
+from mcp_server.phantombuster.connections import PhantomAgentConnections
+from mcp_server.phantombuster.batch import PhantomAgentBatch
+from mcp_server.phantombuster.transport import PhantomTransport, AsyncPhantomTransport
+from mcp_server.phantombuster.pool import PhantomAgentPool
+from mcp_server.phantombuster.polling import PollingSchedule
+from mcp_server.phantombuster.scheduler import LaunchScheduler
+from mcp_server.phantombuster.webhooks import WebhookReceiver
+from mcp_server.phantombuster.base import tagged_runs
+from mcp_server.phantombuster.quota import QuotaGuard, month_start
+from mcp_server.storage.result_cache import ResultCache, DEFAULT_TTL
+from mcp_server.storage.identity import IdentityIndex
+from mcp_server.storage.thread_store import ThreadStore
+from mcp_server.storage.raw_store import RawStore
+from mcp_server.storage.usage_store import UsageStore
+from mcp_server.singleflight import SingleFlight
+from mcp_server.jobs import JobRegistry, ScrapeJob, JOB_STATES
+from mcp_server.base_model.budget import budgeted
+from mcp_server.metrics import get_default_registry, instrumented
 
 
 load_dotenv()
@@ -17,125 +42,479 @@ PHANTOMBUSTER_API_KEY = os.environ.get("PHANTOMBUSTER_API_KEY")
 LINKEDIN_COOKIE_LI = os.environ.get("LINKEDIN_COOKIE_LI")
 LINKEDIN_BROWSER_AGENT = os.environ.get("LINKEDIN_BROWSER_AGENT")
 
+# Timings and counts of tool calls, phantom runs and API requests, read with
+# get_server_stats or scraped from /metrics when a port is set
+metrics = get_default_registry()
+if os.environ.get("LINKEDIN_MCP_METRICS_PORT"):
+    metrics.serve(
+        host=os.environ.get("LINKEDIN_MCP_METRICS_HOST", "127.0.0.1"),
+        port=int(os.environ["LINKEDIN_MCP_METRICS_PORT"])
+    )
+    atexit.register(metrics.close)
+
+# Pooled keep-alive transports shared by every agent of this server. Tools use
+# the async one; the blocking one is only used for agent cleanup.
+TRANSPORT_SETTINGS = dict(
+    max_connections=int(os.environ.get("PHANTOMBUSTER_MAX_CONNECTIONS", 10)),
+    connect_timeout=float(os.environ.get("PHANTOMBUSTER_CONNECT_TIMEOUT", 5)),
+    read_timeout=float(os.environ.get("PHANTOMBUSTER_READ_TIMEOUT", 30))
+)
+transport = PhantomTransport(metrics=metrics, **TRANSPORT_SETTINGS)
+async_transport = AsyncPhantomTransport(metrics=metrics, **TRANSPORT_SETTINGS)
+
+MAX_PARALLELISM = int(os.environ.get("PHANTOMBUSTER_MAX_PARALLELISM", 1))
+
+# Agents are reused across tool calls and deleted when the server stops
+pool = PhantomAgentPool(max_agents=MAX_PARALLELISM, transport=transport)
+atexit.register(pool.close)
+
+# Launches queue here so the org's parallelism and the li_at session's launch
+# rate are never exceeded
+scheduler = LaunchScheduler(
+    max_containers=MAX_PARALLELISM,
+    launches_per_minute=float(os.environ.get("PHANTOMBUSTER_LAUNCHES_PER_MINUTE", 6)),
+    burst=int(os.environ.get("PHANTOMBUSTER_LAUNCH_BURST", 3))
+)
+
+# Poll timing learned from past runs of each script
+polling = PollingSchedule(path=os.environ.get("PHANTOMBUSTER_POLLING_STATS"))
+
+# With a public URL for it, containers report their end to an embedded endpoint
+# and polling only runs as a slow fallback
+webhooks = None
+if os.environ.get("PHANTOMBUSTER_WEBHOOK_URL"):
+    webhooks = WebhookReceiver(
+        host=os.environ.get("PHANTOMBUSTER_WEBHOOK_HOST", "127.0.0.1"),
+        port=int(os.environ.get("PHANTOMBUSTER_WEBHOOK_PORT", 8765)),
+        public_url=os.environ["PHANTOMBUSTER_WEBHOOK_URL"],
+        fallback_interval=float(os.environ.get("PHANTOMBUSTER_WEBHOOK_FALLBACK", 120))
+    ).start()
+    atexit.register(webhooks.close)
+
+# Scraped profiles and companies, reused until their TTL expires
+CACHE_PATH = os.environ.get("LINKEDIN_MCP_CACHE_PATH", os.path.expanduser("~/.cache/linkedin-mcp/results.sqlite3"))
+cache = ResultCache(
+    path=CACHE_PATH,
+    ttl={
+        "profile": float(os.environ.get("LINKEDIN_MCP_CACHE_TTL_PROFILE", DEFAULT_TTL["profile"])),
+        "company": float(os.environ.get("LINKEDIN_MCP_CACHE_TTL_COMPANY", DEFAULT_TTL["company"]))
+    },
+    max_bytes=int(float(os.environ.get("LINKEDIN_MCP_CACHE_MAX_MB", 100)) * 1024 * 1024)
+)
+
+# Slugs, member ids and URNs seen for each profile / company, so every spelling
+# of a URL hits the same cache entry
+identities = IdentityIndex(path=CACHE_PATH)
+
+# Local copy of the inbox, so inbox syncs only report what changed
+threads_store = ThreadStore(path=CACHE_PATH)
+INBOX_SYNC_PAGE = 10
+# Stored messages of a thread are only reused while the inbox and thread scrapes are this recent
+THREAD_MAX_AGE = float(os.environ.get("LINKEDIN_MCP_THREAD_MAX_AGE", 900))
+
+# Scraper records behind returned profiles: attached to them ("inline"), kept
+# aside and read with get_raw_record ("store"), or dropped ("off")
+RAW_MODE = os.environ.get("LINKEDIN_MCP_RAW_DATA", "inline")
+raw_records = RawStore(
+    path=CACHE_PATH,
+    max_bytes=int(float(os.environ.get("LINKEDIN_MCP_RAW_STORE_MB", 50)) * 1024 * 1024)
+)
+
+# Execution time of every container, by tool, script and caller. Background
+# jobs are refused past the soft limit of the monthly budget, everything past
+# the hard limit
+usage = UsageStore(path=CACHE_PATH)
+quota = QuotaGuard(
+    store=usage,
+    soft_limit=float(os.environ.get("LINKEDIN_MCP_BUDGET_SOFT", 0.8)),
+    hard_limit=float(os.environ.get("LINKEDIN_MCP_BUDGET_HARD", 0.95)),
+    monthly_seconds=float(os.environ["LINKEDIN_MCP_BUDGET_MONTHLY_SECONDS"]) if os.environ.get("LINKEDIN_MCP_BUDGET_MONTHLY_SECONDS") else None,
+    refresh_interval=float(os.environ.get("LINKEDIN_MCP_QUOTA_REFRESH", 300)),
+    transport=transport,
+    async_transport=async_transport
+)
+
+# Raw results of the last connection exports, paged through by scrap_connections
+# without downloading them again
+EXPORTS_KEPT = 2
+exports: "OrderedDict[str, dict]" = OrderedDict()
+
+# Concurrent calls for the same target share one phantom run
+inflight = SingleFlight()
+
+# Scrapes started with start_scrape and collected later with get_job
+jobs = JobRegistry()
+
+CREDENTIALS_ERROR = {"error": True, "message": "PHANTOMBUSTER_API_KEY, LINKEDIN_COOKIE_LI or LINKEDIN_BROWSER_AGENT are not set in environment variables"}
+
+
+def get_credentials() -> Optional[PhantomCredentials]:
+    """Credentials from environment variables, None if any of them is missing"""
+    if not (PHANTOMBUSTER_API_KEY and LINKEDIN_COOKIE_LI and LINKEDIN_BROWSER_AGENT):
+        return None
+    return PhantomCredentials(
+        phantombuster_key=PHANTOMBUSTER_API_KEY,
+        session_cookie=LINKEDIN_COOKIE_LI,
+        user_agent=LINKEDIN_BROWSER_AGENT
+    )
+
+
+def agent_options() -> dict:
+    """Shared resources passed to every agent"""
+    return dict(
+        transport=transport, async_transport=async_transport, pool=pool, polling=polling, scheduler=scheduler,
+        raw_mode=RAW_MODE, raw_store=raw_records, webhooks=webhooks, metrics=metrics, quota=quota
+    )
+
+
+def failure(agent) -> Optional[dict]:
+    """Error to return from a tool when the agent run failed"""
+    return agent.error.json() if agent.error else None
+
+
 # Initialize the MCP server with a friendly name
 mcp = FastMCP("Linkedin server")
 
+
+def current_caller() -> str:
+    """MCP client making the current request: its client_id, else its name"""
+    try:
+        context = mcp.get_context()
+        if context.client_id:
+            return context.client_id
+        client_params = context.session.client_params
+        return client_params.clientInfo.name if client_params else "unknown"
+    except (ValueError, AttributeError):
+        return "local"
+
+
+def accounted(tool):
+    """Tag the phantom runs of a tool with its name and caller, for usage accounting"""
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        with tagged_runs(tool=tool.__name__, caller=current_caller()):
+            return await tool(*args, **kwargs)
+
+    return wrapper
+
+
+async def scrape_in_batches(
+        kind: str,
+        model: type,
+        agent_class: Type[PhantomAgentBatch],
+        agent_kwargs: dict,
+        record: Callable[[Any, str], str],
+        linkedin_urls: List[str],
+        batch_size: int,
+        force_refresh: bool
+    ) -> list:
+    """One result per URL, in input order: cached models, then batch launches for the rest
+
+    Args:
+        kind: Cache kind, also the result field holding the scraped model ("profile", "company")
+        model: Model of the cached entries
+        agent_class: Batch agent of one launch, created with agent_kwargs
+        record: Records the identities of a scraped model and returns its cache key
+    """
+    result_model = agent_class.result_model
+    urls = list(dict.fromkeys(linkedin_urls))
+    # Identity of each URL (cache key), and the URL its identity is scraped at
+    targets = {}
+    scraped_at = {}
+    for url in urls:
+        target, scrape_url = identities.target(url)
+        targets[url] = target
+        scraped_at.setdefault(target, scrape_url)
+    identity_of = {scrape_url: target for target, scrape_url in scraped_at.items()}
+    batch_size = max(1, batch_size)
+
+    results = {}
+    if not force_refresh:
+        for target in set(targets.values()):
+            cached = cache.get(kind, target, model)
+            if cached is not None:
+                results[target] = result_model(url=target, **{kind: cached})
+    missing = list(dict.fromkeys(target for target in targets.values() if target not in results))
+
+    async def scrape_batch(batch: List[str]) -> list:
+        batch_agent = agent_class(**agent_kwargs)
+        batch_results, success = await batch_agent.run_and_get_data_async(batch)
+        if success:
+            return batch_results
+        return batch_agent.failed_results()
+
+    launches = [scraped_at[target] for target in missing]
+    batches = await asyncio.gather(*[
+        scrape_batch(launches[i:i + batch_size]) for i in range(0, len(launches), batch_size)
+    ])
+    for batch in batches:
+        for result in batch:
+            target = identity_of.get(result.url, result.url)
+            results[target] = result
+            scraped = getattr(result, kind)
+            if scraped is not None:
+                cache.put(kind, record(scraped, target), scraped)
+    # Results are reported under the URL as it was given
+    return [
+        results[targets[url]].model_copy(update={"url": url}) if targets[url] in results
+        else result_model(url=url, error="No result returned for this URL")
+        for url in urls
+    ]
+
+
 @mcp.tool()
-def scrap_profile(linkedin: str) -> Optional[Profile]:
+@instrumented
+@accounted
+@budgeted
+async def scrap_profile(linkedin: str, force_refresh: bool = False) -> Union[Profile, dict, None]:
     """
     Scrapes a LinkedIn profile (name, location, experience, etc). Takes a profile link as input.
 
     Args:
         linkedin: URL of the LinkedIn profile
+        force_refresh: Scrape again even if a recent result is cached
+        fields: Only return these fields, e.g. ["first_name", "last_name", "headline", "jobs.title"]
+        max_tokens: Approximate size limit of the answer, then returned as {data, chars, omitted}.
+            Low-value fields are dropped, then long text is shortened to fit
+        max_chars: Same limit in characters
 
     Returns:
-        Profile object with scraped data, or None if failed
+        Profile object with scraped data, or an error dict with the cause if failed
     """
 
-    if not (PHANTOMBUSTER_API_KEY and LINKEDIN_COOKIE_LI and LINKEDIN_BROWSER_AGENT):
-        return {"error": True, "message": "PHANTOMBUSTER_API_KEY, LINKEDIN_COOKIE_LI or LINKEDIN_BROWSER_AGENT are not set in environment variables"}
+    credentials = get_credentials()
+    if credentials is None:
+        return CREDENTIALS_ERROR
 
-    credentials = PhantomCredentials(
-        phantombuster_key=PHANTOMBUSTER_API_KEY,
-        session_cookie=LINKEDIN_COOKIE_LI,
-        user_agent=LINKEDIN_BROWSER_AGENT
+    target, url = identities.target(linkedin)
+    if not force_refresh:
+        cached = cache.get("profile", target, Profile)
+        if cached is not None:
+            return cached
+
+    async def scrape():
+        profile_agent = PhantomAgentProfile(credentials=credentials, **agent_options())
+        profile, success = await profile_agent.run_and_get_data_async(url)
+        if success:
+            if profile is not None:
+                cache.put("profile", identities.record_profile(profile, target), profile)
+            return profile
+        return failure(profile_agent)
+
+    return await inflight.do(("scrap_profile", target), scrape)
+
+@mcp.tool()
+@instrumented
+@accounted
+@budgeted
+async def scrap_profiles(
+     linkedin_urls: List[str],
+     batch_size: int = 25,
+     force_refresh: bool = False
+     ) -> Union[List[ProfileResult], dict]:
+    """
+    Scrapes many LinkedIn profiles at once, in as few phantom launches as possible.
+
+    Args:
+        linkedin_urls: URLs of the LinkedIn profiles
+        batch_size: Number of profiles scraped per launch (default 25)
+        force_refresh: Scrape again even the profiles that are cached
+        fields: Only return these fields, e.g. ["url", "profile.first_name", "profile.headline"]
+        max_tokens: Approximate size limit of the answer, then returned as {data, chars, omitted}.
+            Low-value fields are dropped, then long text is shortened to fit
+        max_chars: Same limit in characters
+
+    Returns:
+        One result per URL, in input order: the Profile, or an error if that URL failed
+    """
+
+    credentials = get_credentials()
+    if credentials is None:
+        return CREDENTIALS_ERROR
+
+    return await scrape_in_batches(
+        "profile", Profile, PhantomAgentProfileBatch, dict(credentials=credentials, **agent_options()),
+        identities.record_profile, linkedin_urls, batch_size, force_refresh
     )
-    profile_agent = PhantomAgentProfile(credentials=credentials)
-    profile, success = profile_agent.run_and_get_data(linkedin)
-    if success:
-        return profile
-    
-    return None
 
 @mcp.tool()
-def scrap_company(linkedin: str) -> Optional[Company]:
+@instrumented
+@accounted
+@budgeted
+async def scrap_company(linkedin: str, force_refresh: bool = False) -> Union[Company, dict, None]:
     """
     Scrapes a LinkedIn company page (name, industry, size, etc). Takes a company link as input.
 
     Args:
         linkedin: URL of the LinkedIn company page
+        force_refresh: Scrape again even if a recent result is cached
+        fields: Only return these fields, e.g. ["name", "industry", "size", "website"]
+        max_tokens: Approximate size limit of the answer, then returned as {data, chars, omitted}.
+            Low-value fields are dropped, then long text is shortened to fit
+        max_chars: Same limit in characters
 
     Returns:
-        Company object with scraped data, or None if failed
+        Company object with scraped data, or an error dict with the cause if failed
     """
 
-    if not (PHANTOMBUSTER_API_KEY and LINKEDIN_COOKIE_LI and LINKEDIN_BROWSER_AGENT):
-        return {"error": True, "message": "PHANTOMBUSTER_API_KEY, LINKEDIN_COOKIE_LI or LINKEDIN_BROWSER_AGENT are not set in environment variables"}
+    credentials = get_credentials()
+    if credentials is None:
+        return CREDENTIALS_ERROR
 
-    credentials = PhantomCredentials(
-        phantombuster_key=PHANTOMBUSTER_API_KEY,
-        session_cookie=LINKEDIN_COOKIE_LI,
-        user_agent=LINKEDIN_BROWSER_AGENT
+    target, url = identities.target(linkedin)
+    if not force_refresh:
+        cached = cache.get("company", target, Company)
+        if cached is not None:
+            return cached
+
+    async def scrape():
+        company_agent = PhantomAgentCompany(credentials=credentials, **agent_options())
+        company, success = await company_agent.run_and_get_data_async(url)
+        if success:
+            if company is not None:
+                cache.put("company", identities.record_company(company, target), company)
+            return company
+        return failure(company_agent)
+
+    return await inflight.do(("scrap_company", target), scrape)
+
+
+@mcp.tool()
+@instrumented
+@accounted
+@budgeted
+async def scrap_companies(
+     linkedin_urls: List[str],
+     batch_size: int = 25,
+     delay_between: int = 2,
+     force_refresh: bool = False
+     ) -> Union[List[CompanyResult], dict]:
+    """
+    Scrapes many LinkedIn company pages at once, in as few phantom launches as possible.
+
+    Args:
+        linkedin_urls: URLs of the LinkedIn company pages
+        batch_size: Number of companies scraped per launch (default 25)
+        delay_between: Seconds to wait between two companies of a launch (default 2)
+        force_refresh: Scrape again even the companies that are cached
+        fields: Only return these fields, e.g. ["url", "company.name", "company.size"]
+        max_tokens: Approximate size limit of the answer, then returned as {data, chars, omitted}.
+            Low-value fields are dropped, then long text is shortened to fit
+        max_chars: Same limit in characters
+
+    Returns:
+        One result per URL, in input order: the Company, or an error if that URL failed
+    """
+
+    credentials = get_credentials()
+    if credentials is None:
+        return CREDENTIALS_ERROR
+
+    return await scrape_in_batches(
+        "company", Company, PhantomAgentCompanyBatch, dict(credentials=credentials, delay_between=delay_between, **agent_options()),
+        identities.record_company, linkedin_urls, batch_size, force_refresh
     )
-    company_agent = PhantomAgentCompany(credentials=credentials)
-    company, success = company_agent.run_and_get_data(linkedin)
-    if success:
-        return company
-    
-    return None
 
 
 @mcp.tool()
-def scrap_inbox(count_to_scrape: int = 10, inbox_filter: str = "all") -> List[Thread]:
+@instrumented
+@accounted
+@budgeted
+async def scrap_inbox(count_to_scrape: int = 10, inbox_filter: str = "all", sync: bool = False) -> Union[List[Thread], dict, None]:
     """
     Scrapes LinkedIn inbox threads.
 
     Args:
         count_to_scrape: Number of threads to fetch (default 10)
         inbox_filter: Filter for threads ('all', 'archived', 'myconnections', 'unread', 'inmail', 'spam')
+        sync: Only return threads that are new or changed since the last call, checking
+            at most count_to_scrape threads. Use it to poll the inbox regularly.
+        fields: Only return these fields, e.g. ["thread_id", "participants", "last_message"]
+        max_tokens: Approximate size limit of the answer, then returned as {data, chars, omitted}.
+            Low-value fields are dropped, then long text is shortened to fit
+        max_chars: Same limit in characters
 
     Returns:
-        List of threads, or None if failed
+        List of threads, or an error dict with the cause if failed
     """
 
-    if not (PHANTOMBUSTER_API_KEY and LINKEDIN_COOKIE_LI and LINKEDIN_BROWSER_AGENT):
-        return {"error": True, "message": "PHANTOMBUSTER_API_KEY, LINKEDIN_COOKIE_LI or LINKEDIN_BROWSER_AGENT are not set in environment variables"}
-
-    credentials = PhantomCredentials(
-        phantombuster_key=PHANTOMBUSTER_API_KEY,
-        session_cookie=LINKEDIN_COOKIE_LI,
-        user_agent=LINKEDIN_BROWSER_AGENT
-    )
-
-    inbox_agent = PhantomAgentInbox(credentials=credentials)
-    threads, success = inbox_agent.run_and_get_data(count_to_scrape, inbox_filter)
-    if success:
-        return threads
-    
-    return None
+    credentials = get_credentials()
+    if credentials is None:
+        return CREDENTIALS_ERROR
+
+    if not sync:
+        inbox_agent = PhantomAgentInbox(credentials=credentials, **agent_options())
+        threads, success = await inbox_agent.run_and_get_data_async(count_to_scrape, inbox_filter)
+        if success:
+            threads_store.put_many(threads)
+            return threads
+        return failure(inbox_agent)
+
+    # Start with a small page once the filter has been synced before, and only
+    # scrape deeper while every thread of the page is new or changed
+    known = threads_store.timestamps()
+    page = count_to_scrape
+    if threads_store.watermark(inbox_filter) is not None:
+        page = min(count_to_scrape, INBOX_SYNC_PAGE)
+    while True:
+        inbox_agent = PhantomAgentInbox(credentials=credentials, known_threads=known, **agent_options())
+        threads, success = await inbox_agent.run_and_get_data_async(page, inbox_filter)
+        if not success:
+            return failure(inbox_agent)
+        if inbox_agent.reached_known or inbox_agent.records < page or page >= count_to_scrape:
+            break
+        page = min(count_to_scrape, page * 4)
+
+    threads_store.put_many(threads)
+    threads_store.set_watermark(inbox_filter, max((thread.timestamp for thread in threads), default=None))
+    return threads
 
 
 @mcp.tool()
-def scrap_thread(thread_link: str) -> List[Message]:
+@instrumented
+@accounted
+@budgeted
+async def scrap_thread(thread_link: str, since: bool = False, force_refresh: bool = False) -> Union[List[Message], dict, None]:
     """
     Scrapes all messages from a LinkedIn thread.
 
     Args:
         thread_link: URL of the LinkedIn thread
+        since: Only return messages received or sent since the last call for this thread
+        force_refresh: Scrape the thread even if a recent inbox sync shows no new activity in it
+        fields: Only return these fields, e.g. ["date", "author", "message"]
+        max_tokens: Approximate size limit of the answer, then returned as {data, chars, omitted}.
+            Low-value fields are dropped, then long text is shortened to fit
+        max_chars: Same limit in characters
 
     Returns:
-        List of messages, or None if failed
+        List of messages, or an error dict with the cause if failed
     """
 
-    if not (PHANTOMBUSTER_API_KEY and LINKEDIN_COOKIE_LI and LINKEDIN_BROWSER_AGENT):
-        return {"error": True, "message": "PHANTOMBUSTER_API_KEY, LINKEDIN_COOKIE_LI or LINKEDIN_BROWSER_AGENT are not set in environment variables"}
+    credentials = get_credentials()
+    if credentials is None:
+        return CREDENTIALS_ERROR
 
-    credentials = PhantomCredentials(
-        phantombuster_key=PHANTOMBUSTER_API_KEY,
-        session_cookie=LINKEDIN_COOKIE_LI,
-        user_agent=LINKEDIN_BROWSER_AGENT
-    )
+    thread, url = identities.target(thread_link)
+
+    # The inbox recently showed no activity since the thread was last scraped
+    if not force_refresh and threads_store.is_unchanged(thread, THREAD_MAX_AGE):
+        return [] if since else threads_store.messages(thread)
 
-    thread_agent = PhantomAgentThread(credentials=credentials)
-    messages, success = thread_agent.run_and_get_data(thread_link)
+    timestamp = threads_store.inbox_timestamp(thread)
+    thread_agent = PhantomAgentThread(credentials=credentials, **agent_options())
+    messages, success = await thread_agent.run_and_get_data_async(url)
     if success:
-        return messages
+        new_messages = threads_store.add_messages(thread, messages, timestamp)
+        return new_messages if since else messages
     
-    return None
+    return failure(thread_agent)
 
 
 @mcp.tool()
-def send_message(linkedin: str, message: str, message_control: str = "none") -> bool:
+@instrumented
+@accounted
+async def send_message(linkedin: str, message: str, message_control: str = "none") -> Union[bool, dict]:
     """
     Sends a message to a LinkedIn thread or user.
 
@@ -154,28 +533,27 @@ def send_message(linkedin: str, message: str, message_control: str = "none") ->
     Returns:
         True if the message was sent, False otherwise. Or an error dict if something went wrong
     """
-    if not (PHANTOMBUSTER_API_KEY and LINKEDIN_COOKIE_LI and LINKEDIN_BROWSER_AGENT):
-        return {"error": True, "message": "PHANTOMBUSTER_API_KEY, LINKEDIN_COOKIE_LI or LINKEDIN_BROWSER_AGENT are not set in environment variables"}
-
-    credentials = PhantomCredentials(
-        phantombuster_key=PHANTOMBUSTER_API_KEY,
-        session_cookie=LINKEDIN_COOKIE_LI,
-        user_agent=LINKEDIN_BROWSER_AGENT
-    )
+    credentials = get_credentials()
+    if credentials is None:
+        return CREDENTIALS_ERROR
 
-    sender_agent = PhantomAgentMessageSender(credentials=credentials)
-    status, success = sender_agent.run_and_get_data(linkedin, message, message_control)
+    _, url = identities.target(linkedin)
+    sender_agent = PhantomAgentMessageSender(credentials=credentials, **agent_options())
+    status, success = await sender_agent.run_and_get_data_async(url, message, message_control)
 
-    return success
+    return success or failure(sender_agent) or False
 
 
 @mcp.tool()
-def scrap_activities(
+@instrumented
+@accounted
+@budgeted
+async def scrap_activities(
      linkedin: str, 
      max_activities: int = 10, 
      activities_to_scrape: List[str] = ["Post", "Article"],
      date_after: int = 30
-     ) -> list[Activity]:
+     ) -> Union[List[Activity], dict, None]:
 
     """
     Scrapes activities for a LinkedIn profile or company.
@@ -192,29 +570,264 @@ def scrap_activities(
             - "Newsletter"
             - "Event"
         date_after: Number of days from today to scrape activities for (default: 30).
+        fields: Only return these fields, e.g. ["url", "text", "date"]
+        max_tokens: Approximate size limit of the answer, then returned as {data, chars, omitted}.
+            Low-value fields are dropped, then long text is shortened to fit
+        max_chars: Same limit in characters
 
     Returns:
         List of Activity objects with scraped data, or an error if data could not be retrieved.
     """
-    if not (PHANTOMBUSTER_API_KEY and LINKEDIN_COOKIE_LI and LINKEDIN_BROWSER_AGENT):
-        return {"error": True, "message": "PHANTOMBUSTER_API_KEY, LINKEDIN_COOKIE_LI or LINKEDIN_BROWSER_AGENT are not set in environment variables"}
+    credentials = get_credentials()
+    if credentials is None:
+        return CREDENTIALS_ERROR
 
-    credentials = PhantomCredentials(
-        phantombuster_key=PHANTOMBUSTER_API_KEY,
-        session_cookie=LINKEDIN_COOKIE_LI,
-        user_agent=LINKEDIN_BROWSER_AGENT
-    )
+    target, url = identities.target(linkedin)
+
+    async def scrape():
+        scrap_agent = PhantomAgentActivities(
+             credentials=credentials,
+             nb_max_posts=max_activities,
+             activities_to_scrape=activities_to_scrape,
+             date_after=date_after,
+             **agent_options()
+        )
+        activities, success = await scrap_agent.run_and_get_data_async(url)
+        if success:
+            return activities
+        return failure(scrap_agent)
+
+    key = ("scrap_activities", target, max_activities, tuple(sorted(activities_to_scrape)), date_after)
+    return await inflight.do(key, scrape)
+
+
+def keep_export(container_id: str, raw_data: dict):
+    exports[container_id] = raw_data
+    exports.move_to_end(container_id)
+    while len(exports) > EXPORTS_KEPT:
+        exports.popitem(last=False)
+
+
+@mcp.tool()
+@instrumented
+@accounted
+@budgeted
+async def scrap_connections(
+     count_to_scrape: int = 100,
+     sort: str = "Recently added",
+     page_size: int = 100,
+     cursor: Optional[str] = None
+     ) -> Union[ConnectionsPage, dict]:
+    """
+    Exports your LinkedIn connections, returned one page at a time.
+
+    Args:
+        count_to_scrape: Number of connections to export (default 100)
+        sort: Sort order: 'Recently added', 'First name' or 'Last name' (default 'Recently added')
+        page_size: Number of connections per page (default 100)
+        cursor: next_cursor of the previous page; pages through the same export
+            without scraping again (count_to_scrape and sort are then ignored)
+        fields: Only return these fields, e.g. ["connections.full_name", "connections.linkedin_url", "next_cursor"]
+        max_tokens: Approximate size limit of the answer, then returned as {data, chars, omitted}.
+            Low-value fields are dropped, then long text is shortened to fit
+        max_chars: Same limit in characters
+
+    Returns:
+        A page of connections with the cursor of the next page, or an error dict if failed
+    """
+    credentials = get_credentials()
+    if credentials is None:
+        return CREDENTIALS_ERROR
+
+    page_size = max(1, page_size)
+    export_agent = PhantomAgentConnections(credentials=credentials, **agent_options())
+    if cursor:
+        try:
+            container_id, offset, pos = cursor.rsplit(":", 2)
+            offset, pos = int(offset), int(pos)
+        except ValueError:
+            return {"error": True, "message": f"Invalid cursor '{cursor}'"}
+        raw_data = exports.get(container_id)
+        if raw_data is None:
+            export_agent.container_id = container_id
+            raw_data = await export_agent.get_raw_data_async()
+            if not raw_data or not raw_data.get("resultObject"):
+                return {"error": True, "message": f"Export {container_id} is no longer available, start a new one"}
+            export_agent.release_envelope()
+            raw_data = export_agent.raw_data
+        keep_export(container_id, raw_data)
+        try:
+            connections, next_pos, starts = export_agent.parse_page(raw_data, pos, page_size)
+        except ValueError:
+            # Edited cursor, or one from another export
+            return {"error": True, "message": f"Invalid cursor '{cursor}'"}
+    else:
+        # The run decodes the first page itself
+        export_agent.page_size = page_size
+        page, success = await export_agent.run_and_get_data_async(count_to_scrape, sort)
+        if not success:
+            return failure(export_agent)
+        container_id, offset = str(export_agent.container_id), 0
+        keep_export(container_id, export_agent.raw_data)
+        connections, next_pos, starts = page
+    return ConnectionsPage.from_export(container_id, offset, connections, starts, next_pos)
+
+
+@mcp.tool()
+@instrumented
+async def get_raw_record(raw_id: str) -> dict:
+    """
+    Gets the full scraper record of a profile, when the server keeps records aside
+    (LINKEDIN_MCP_RAW_DATA=store) and profiles only carry its raw_id.
+
+    Args:
+        raw_id: raw_id of a scraped profile
+
+    Returns:
+        The record as returned by the scraper, or an error dict if it is unknown or was evicted
+    """
+    record = raw_records.get(raw_id)
+    if record is None:
+        return {"error": True, "message": f"Unknown or evicted raw record '{raw_id}'"}
+    return record
+
+
+# Tools that start_scrape can run in the background
+JOB_KINDS = {
+    "profile": scrap_profile,
+    "profiles": scrap_profiles,
+    "company": scrap_company,
+    "companies": scrap_companies,
+    "activities": scrap_activities,
+    "inbox": scrap_inbox,
+    "thread": scrap_thread,
+    "connections": scrap_connections,
+}
+
+
+@mcp.tool()
+@instrumented
+async def start_scrape(kind: str, args: Dict[str, Any]) -> Union[ScrapeJob, dict]:
+    """
+    Starts a scrape in the background and returns at once with a job id. Use it to
+    run many scrapes in parallel, then collect them with get_job.
+
+    Args:
+        kind: What to scrape: 'profile', 'profiles', 'company', 'companies', 'activities', 'inbox', 'thread' or 'connections'
+        args: Arguments of the matching tool (scrap_profile, scrap_profiles, ...),
+            e.g. {"linkedin": "https://www.linkedin.com/in/..."} for 'profile'
+
+    Returns:
+        The job (job_id, state), or an error dict if the kind or arguments are invalid
+    """
+    tool = JOB_KINDS.get(kind)
+    if tool is None:
+        return {"error": True, "message": f"Unknown kind '{kind}', expected one of: {', '.join(JOB_KINDS)}"}
+    try:
+        inspect.signature(tool).bind(**args)
+    except TypeError as e:
+        return {"error": True, "message": f"Invalid args for '{kind}': {e}"}
+    return jobs.start(kind, lambda: tool(**args), args)
+
+
+@mcp.tool()
+@instrumented
+async def get_job(job_id: str, include_result: bool = True) -> Union[ScrapeJob, dict]:
+    """
+    Gets the state of a job started with start_scrape, and its result once finished.
+
+    Args:
+        job_id: Id returned by start_scrape
+        include_result: Include the scraped data of a finished job (default True)
+
+    Returns:
+        The job: state (queued, launched, running, finished or failed), container ids,
+        timings, and the result or error
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return {"error": True, "message": f"Unknown or expired job '{job_id}'"}
+    return job if include_result else job.model_copy(update={"result": None})
+
+
+@mcp.tool()
+@instrumented
+async def list_jobs(state: Optional[str] = None) -> Union[List[ScrapeJob], dict]:
+    """
+    Lists background jobs, most recent first, without their results.
+
+    Args:
+        state: Only jobs in this state: 'queued', 'launched', 'running', 'finished' or 'failed'
+
+    Returns:
+        List of jobs
+    """
+    if state is not None and state not in JOB_STATES:
+        return {"error": True, "message": f"Unknown state '{state}', expected one of: {', '.join(JOB_STATES)}"}
+    return [job.model_copy(update={"result": None}) for job in jobs.list(state)]
+
+
+@mcp.tool()
+@instrumented
+async def get_server_stats(format: str = "json") -> Union[dict, str]:
+    """
+    Gets the server's performance metrics: duration percentiles of tool calls and
+    of each phase of phantom runs (per script), run outcomes, Phantombuster API
+    requests and errors, and the state of the launch queue, agent pool, caches and jobs.
+
+    Args:
+        format: 'json' (default) or 'prometheus' for the Prometheus text format
+
+    Returns:
+        Metrics and component stats, or the Prometheus text
+    """
+    if format == "prometheus":
+        return metrics.prometheus()
+    if format != "json":
+        return {"error": True, "message": f"Unknown format '{format}', expected 'json' or 'prometheus'"}
+    return {
+        **metrics.snapshot(),
+        "scheduler": scheduler.stats(),
+        "pool": pool.stats(),
+        "cache": cache.stats(),
+        "raw_records": raw_records.stats(),
+        "inflight": {"running": inflight.in_flight(), "coalesced": inflight.coalesced},
+        "jobs": jobs.stats(),
+        "webhooks": webhooks.stats() if webhooks is not None else None,
+        "budget": quota.stats(),
+    }
+
+
+@mcp.tool()
+@instrumented
+async def get_usage(group_by: str = "tool,script,caller", days: Optional[float] = None) -> dict:
+    """
+    Gets the Phantombuster execution time used: the share of the monthly budget
+    already spent, and the runs, failed runs and seconds per tool, script and caller.
+    Past the soft limit background jobs are refused, past the hard limit every scrape.
+
+    Args:
+        group_by: Comma separated columns to group by: tool, script, caller, priority, outcome
+        days: Only runs of the last days (default: since the start of the month)
+
+    Returns:
+        Budget (limits and share used) and usage per group, most expensive first
+    """
+    groups = [group.strip() for group in group_by.split(",") if group.strip()]
+    since = time.time() - days * 86400 if days is not None else month_start()
+    try:
+        runs = usage.summary(groups, since)
+    except ValueError as e:
+        return {"error": True, "message": str(e)}
+    credentials = get_credentials()
+    budget = quota.stats()
+    if credentials is not None:
+        budget.update(quota.usage(credentials))
+    return {"since": since, "budget": budget, "usage": runs}
 
-    scrap_agent = PhantomAgentActivities(
-         credentials=credentials,
-         nb_max_posts=max_activities,
-         activities_to_scrape=activities_to_scrape,
-         date_after=date_after
-    )
-    activities, success = scrap_agent.run_and_get_data(linkedin)
 
-    return activities
-    
 # Run the MCP server locally
 if __name__ == '__main__':
+    if PHANTOMBUSTER_API_KEY:
+        pool.purge_stale(PHANTOMBUSTER_API_KEY)
     mcp.run()
\ No newline at end of file
@@ -0,0 +1,269 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+# Upper bounds (seconds) of histogram buckets: API calls take milliseconds,
+# phantom runs take minutes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+# HELP lines of the metrics recorded by agents, transports and tools
+METRIC_HELP = {
+    "phantom_api_requests_total": "Phantombuster API requests by endpoint and status code",
+    "phantom_api_request_seconds": "Duration of Phantombuster API requests",
+    "phantom_phase_seconds": "Time spent in each phase of a phantom run, by script",
+    "phantom_run_seconds": "Duration of whole phantom runs, by script",
+    "phantom_runs_total": "Phantom runs by script and outcome (success or the failure cause)",
+    "phantom_runs_in_flight": "Phantom runs in progress, by script",
+    "phantom_container_seconds": "Execution time of phantom containers, by script",
+    "mcp_tool_seconds": "Duration of MCP tool calls",
+    "mcp_tool_calls_total": "MCP tool calls by outcome",
+    "mcp_tool_calls_in_flight": "MCP tool calls in progress",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram of one labelled series"""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "max")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate from the buckets, linear within the bucket the quantile falls in, never above the max seen"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                low = self.buckets[i - 1] if i > 0 else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return min(low + (high - low) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms, labelled, kept in memory
+
+    Series are created on first use. Everything can be read back as a dict
+    (``snapshot``) or in the Prometheus text format (``prometheus``), which
+    ``serve`` also exposes over HTTP on /metrics.
+
+    Args:
+        buckets: Histogram bucket upper bounds, in seconds
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._help: Dict[str, str] = dict(METRIC_HELP)
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def describe(self, name: str, help_text: str):
+        """HELP line of a metric in the Prometheus output"""
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def gauge_add(self, name: str, delta: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[key] = series.get(key, 0) + delta
+
+    def gauge_set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges.setdefault(name, {})[_labels(labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Observe the time spent in the block, even if it raises"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started, **labels)
+
+    @contextmanager
+    def in_flight(self, name: str, **labels) -> Iterator[None]:
+        """Count the block in a gauge while it runs"""
+        self.gauge_add(name, 1, **labels)
+        try:
+            yield
+        finally:
+            self.gauge_add(name, -1, **labels)
+
+    def snapshot(self) -> dict:
+        """Every series as plain data; histograms as count, sum, mean, p50, p95, p99 and max"""
+        def series_name(labels: Labels) -> str:
+            return ",".join(f"{key}={value}" for key, value in labels) or "all"
+
+        def rounded(value: Optional[float]) -> Optional[float]:
+            return round(value, 4) if value is not None else None
+
+        with self._lock:
+            return {
+                "counters": {
+                    name: {series_name(labels): value for labels, value in series.items()}
+                    for name, series in self._counters.items()
+                },
+                "gauges": {
+                    name: {series_name(labels): value for labels, value in series.items()}
+                    for name, series in self._gauges.items()
+                },
+                "histograms": {
+                    name: {
+                        series_name(labels): {
+                            "count": histogram.count,
+                            "sum": round(histogram.sum, 4),
+                            "mean": rounded(histogram.sum / histogram.count if histogram.count else None),
+                            "p50": rounded(histogram.quantile(0.5)),
+                            "p95": rounded(histogram.quantile(0.95)),
+                            "p99": rounded(histogram.quantile(0.99)),
+                            "max": round(histogram.max, 4),
+                        }
+                        for labels, histogram in series.items()
+                    }
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def prometheus(self) -> str:
+        """Everything in the Prometheus text exposition format"""
+        lines: List[str] = []
+
+        def header(name: str, kind: str):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                header(name, "counter")
+                lines.extend(f"{name}{_format_labels(labels)} {value}" for labels, value in series.items())
+            for name, series in sorted(self._gauges.items()):
+                header(name, "gauge")
+                lines.extend(f"{name}{_format_labels(labels)} {value}" for labels, value in series.items())
+            for name, series in sorted(self._histograms.items()):
+                header(name, "histogram")
+                for labels, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', str(bound)))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, host: str = "127.0.0.1", port: int = 9464) -> "MetricsRegistry":
+        """Expose /metrics over HTTP from a background thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = registry.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        return self
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+_default_registry = MetricsRegistry()
+
+
+def get_default_registry() -> MetricsRegistry:
+    """Registry used by agents and transports that were not given one explicitly"""
+    return _default_registry
+
+
+def is_error_result(result) -> bool:
+    """Tools report failures as {"error": True, ...}"""
+    return isinstance(result, dict) and result.get("error") is True
+
+
+def instrumented(tool: Callable, metrics: Optional[MetricsRegistry] = None) -> Callable:
+    """Time an async MCP tool, count its calls and errors and how many run at once"""
+    registry = metrics or get_default_registry()
+    name = tool.__name__
+
+    @functools.wraps(tool)
+    async def wrapper(*args, **kwargs):
+        outcome = "error"
+        with registry.in_flight("mcp_tool_calls_in_flight", tool=name), registry.timer("mcp_tool_seconds", tool=name):
+            try:
+                result = await tool(*args, **kwargs)
+                outcome = "error" if is_error_result(result) else "ok"
+                return result
+            finally:
+                registry.inc("mcp_tool_calls_total", tool=name, outcome=outcome)
+
+    return wrapper
@@ -1,8 +1,25 @@
-import json
 from typing import List, Optional
 from datetime import datetime, timedelta
 from mcp_server.phantombuster.base import PhantomAgentBase, PhantomCredentials
 from mcp_server.phantombuster.models import Activity
+from mcp_server.phantombuster.results import load_result
+from mcp_server.phantombuster.mapping import FieldSpec, ModelMapping, to_int, to_str
+
+
+# LinkedIn Activities Extractor record -> Activity
+ACTIVITY_MAPPING = ModelMapping(Activity, {
+    "url": FieldSpec("postUrl", default=""),
+    "attached_url": FieldSpec("imgUrl"),
+    "type": FieldSpec("type", default=""),
+    "text": FieldSpec("postContent"),
+    "like_count": FieldSpec("likeCount", coerce=to_int),
+    "comment_count": FieldSpec("commentCount", coerce=to_int),
+    "repost_count": FieldSpec("repostCount", coerce=to_int),
+    "date": FieldSpec("postDate", coerce=to_str),
+    "profile_url": FieldSpec("profileUrl"),
+    "timestamp": FieldSpec("timestamp", coerce=to_str),
+    "comment": FieldSpec("commentContent"),
+})
 
 
 class PhantomAgentActivities(PhantomAgentBase):
@@ -13,10 +30,11 @@ class PhantomAgentActivities(PhantomAgentBase):
                  retry_delay: int = 10, 
                  nb_max_posts: int = 20, 
                  activities_to_scrape: List[str] = None, 
-                 date_after: Optional[int] = None
+                 date_after: Optional[int] = None,
+                 **kwargs
         ):
 
-        super().__init__(credentials, agent_id, max_retries, retry_delay)
+        super().__init__(credentials, agent_id, max_retries, retry_delay, **kwargs)
         self.script_id = "9136"
         self.script = "LinkedIn Activity Extractor.js"
         self.name = "LinkedIn Activity Extractor (API)"
@@ -25,8 +43,8 @@ class PhantomAgentActivities(PhantomAgentBase):
         self.activities_to_scrape = activities_to_scrape or ["Post", "Article"]
         self.date_after = date_after
 
-    def run(self, linkedin_url: str) -> bool:
-        """Start phantom task to scrape activities"""
+    def build_launch(self, linkedin_url: str) -> dict:
+        """Build launch payload to scrape activities"""
 
         data = {
             "id": self.agent_id,
@@ -45,31 +63,11 @@ class PhantomAgentActivities(PhantomAgentBase):
             data["argument"]["dateAfter"] = target_date.strftime("%m-%d-%Y")
             data["argument"]["onlyRetrieveActivitiesAfterDate"] = True
 
-        return self._post(self.lanch_url, data)
+        return data
 
-    def get_data(self) -> List[Activity]:
+    def parse_data(self, raw_data: Optional[dict]) -> List[Activity]:
         """Get processed activities from phantom task"""
         
-        activities = []
-        raw_data = self.get_raw_data()
-        if raw_data:
-            result_obj = raw_data.get("resultObject")
-            if result_obj:
-                for value in json.loads(result_obj):
-                    activity = Activity(
-                        url=value.get('postUrl', ""),
-                        attached_url=value.get('imgUrl'),
-                        type=value.get('type', ""),
-                        text=value.get('postContent'),
-                        like_count=value.get('likeCount'),
-                        comment_count=value.get('commentCount'),
-                        repost_count=value.get('repostCount'),
-                        date=value.get('postDate'),
-                        profile_url=value.get('profileUrl'),
-                        timestamp=value.get('timestamp'),
-                        comment=value.get('commentContent')
-                    )
-                    activities.append(activity)
-        return activities 
+        return ACTIVITY_MAPPING.many(load_result(raw_data) or []) 
     
     
\ No newline at end of file
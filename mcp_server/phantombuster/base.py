@@ -1,8 +1,24 @@
-import requests
-import json
+import asyncio
 import time
-from typing import Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional, Tuple
 from mcp_server.base_model.MarkdownModel import MarkdownModel
+from mcp_server.metrics import MetricsRegistry, get_default_registry
+from mcp_server.phantombuster.transport import (
+    PhantomTransport,
+    AsyncPhantomTransport,
+    get_default_transport,
+    get_default_async_transport
+)
+from mcp_server.phantombuster.pool import PhantomAgentPool
+from mcp_server.phantombuster.scheduler import LaunchScheduler, LaunchTicket
+from mcp_server.phantombuster.polling import PollingSchedule, get_default_schedule
+from mcp_server.phantombuster.quota import QuotaGuard
+from mcp_server.phantombuster.results import load_json
+from mcp_server.phantombuster.webhooks import WebhookReceiver
+from mcp_server.storage.raw_store import RawStore
 
 
 class PhantomCredentials(MarkdownModel):
@@ -12,196 +28,788 @@ class PhantomCredentials(MarkdownModel):
     phantombuster_key: str
 
 
+class PhantomError(MarkdownModel):
+    """Why a phantom run failed"""
+    error: bool = True
+    cause: str  # session_expired, rate_limited, invalid_input, script_error, timeout, launch_failed, api_error, no_agent, quota_exceeded, no_result
+    message: str
+    container_id: Optional[str] = None
+    exit_code: Optional[int] = None
+
+
+# Container states after which polling can stop
+TERMINAL_STATUSES = {"finished", "error", "aborted", "killed", "timeout"}
+FAILED_END_TYPES = {"error", "aborted", "killed", "timeout", "crashed"}
+
+# Agents' files (result.json, result.csv, ...) live under <org folder>/<agent folder>/
+RESULT_FILES_URL = "https://phantombuster.s3.amazonaws.com/"
+
+# What models keep of the scraper record they were built from: the record itself
+# (raw_data), only the id of its copy in a RawStore (raw_id), or nothing
+RAW_MODES = ("inline", "store", "off")
+
+# Lifecycle of one run_and_get_data call, reported to run_listener
+RUN_STATES = ("queued", "launched", "running", "finished", "failed")
+
+# Called as listener(agent, state) by every agent created while it is set, so a
+# caller can follow the runs made on its behalf (e.g. by a tool it awaits)
+run_listener: ContextVar[Optional[Callable[["PhantomAgentBase", str], None]]] = ContextVar("run_listener", default=None)
+
+# Tool, caller and priority ("low" or "normal") of the runs made by the current
+# call, used to account their execution time and to apply budget limits
+run_tags: ContextVar[Optional[dict]] = ContextVar("run_tags", default=None)
+
+
+@contextmanager
+def tagged_runs(**tags):
+    """Add tags to the agents created in the block, on top of the current ones"""
+    token = run_tags.set({**(run_tags.get() or {}), **tags})
+    try:
+        yield
+    finally:
+        run_tags.reset(token)
+
+# Lowercase fragments of console output / exit messages and the cause they point to
+ERROR_MARKERS = [
+    ("session_expired", ("session cookie", "sessioncookie", "li_at", "not logged in", "logged out", "disconnected by linkedin")),
+    ("rate_limited", ("too many requests", "rate limit", "reached the limit", "commercial use limit", "daily limit")),
+    ("invalid_input", ("invalid url", "not a valid", "can't open", "cannot open", "input is empty", "no input")),
+]
+
+
+def classify_error(*texts: Optional[str]) -> str:
+    """Best guess of the failure cause from exit messages and console output"""
+    haystack = " ".join(text for text in texts if text).lower()
+    for cause, markers in ERROR_MARKERS:
+        if any(marker in haystack for marker in markers):
+            return cause
+    return "script_error"
+
+
 class PhantomAgentBase:
+    """Base class for Phantombuster agents
+
+    Subclasses set script_id, script and name, and implement:
+        build_launch(...) -> dict: payload for agents/launch
+        parse_data(raw_data, ...): convert the containers/fetch response into models
+
+    Every API call has a blocking and an asyncio version (run / run_async,
+    get_data / get_data_async, ...). The async versions never block the event loop.
+    """
+
     def __init__(
-            self, 
-            credentials: PhantomCredentials, 
-            agent_id: Optional[str] = None, 
-            max_retries: int = 20, 
-            retry_delay: int = 10
+            self,
+            credentials: PhantomCredentials,
+            agent_id: Optional[str] = None,
+            max_retries: int = 20,
+            retry_delay: int = 10,
+            transport: Optional[PhantomTransport] = None,
+            async_transport: Optional[AsyncPhantomTransport] = None,
+            pool: Optional[PhantomAgentPool] = None,
+            polling: Optional[PollingSchedule] = None,
+            scheduler: Optional[LaunchScheduler] = None,
+            raw_mode: str = "inline",
+            raw_store: Optional[RawStore] = None,
+            webhooks: Optional[WebhookReceiver] = None,
+            metrics: Optional[MetricsRegistry] = None,
+            quota: Optional[QuotaGuard] = None
         ):
+        if raw_mode not in RAW_MODES:
+            raise ValueError(f"raw_mode must be one of {', '.join(RAW_MODES)}, got '{raw_mode}'")
         self.raw_data = None
+        self.error: Optional[PhantomError] = None
         self.credentials = credentials
         self.agent_id = agent_id
         self.container_id = None
-        self.lanch_url = "https://api.phantombuster.com/api/v2/agents/launch"
+        self._transport = transport
+        self._async_transport = async_transport
+        self.pool = pool
+        self.polling = polling or get_default_schedule()
+        self.scheduler = scheduler
+        self._ticket: Optional[LaunchTicket] = None
+        self.raw_mode = raw_mode
+        self.raw_store = raw_store
+        self.webhooks = webhooks
+        self.metrics = metrics or get_default_registry()
+        self.quota = quota
+        self.lanch_url = "agents/launch"
         self._max_retries = max_retries
         self._retry_delay = retry_delay  # seconds
-        
+        self.max_wait = max_retries * retry_delay  # seconds, the schedule may extend it for slow scripts
+        self._launched_at = None
+        self.state: Optional[str] = None
+        self.listener = run_listener.get()
+        self.tags = run_tags.get() or {}
+        # Execution time of the last container, from Phantombuster's timestamps
+        # when it reported them (container_seconds_measured)
+        self.container_seconds: Optional[float] = None
+        self.container_seconds_measured = False
+
         # Required for agent creation
         self.script_id = None  # Must be set by subclasses
         self.script = None     # Must be set by subclasses
         self.name = None       # Must be set by subclasses
         self.argument = None   # Can be set by subclasses or in run method
+        # Set by subclasses with large results (e.g. "result.json"): the result is
+        # downloaded from the agent's file instead of being inlined, JSON-escaped,
+        # in every containers/fetch response
+        self.result_file: Optional[str] = None
+        self.result_files_url = RESULT_FILES_URL
+        # Set by subclasses whose result is read after the run (e.g. paged
+        # through): the result object is kept when the rest of the
+        # containers/fetch response is released
+        self.keep_result = False
 
-    def create(self) -> bool:
-        """Create a new Phantom agent"""
+    @property
+    def transport(self) -> PhantomTransport:
+        if self._transport is None:
+            self._transport = get_default_transport()
+        return self._transport
+
+    @property
+    def async_transport(self) -> AsyncPhantomTransport:
+        if self._async_transport is None:
+            self._async_transport = get_default_async_transport()
+        return self._async_transport
+
+    def _headers(self, content_type: bool = False) -> dict:
+        headers = {
+            "accept": "application/json",
+            "X-Phantombuster-Key": self.credentials.phantombuster_key
+        }
+        if content_type:
+            headers["content-type"] = "application/json"
+        return headers
+
+    def _agent_payload(self, name: Optional[str] = None) -> dict:
         if not all([self.script_id, self.script, self.name]):
             raise ValueError("script_id, script and name must be set before creating an agent")
-            
-        url = "https://api.phantombuster.com/api/v2/agents/save"
-        
-        new_agent = {
+
+        payload = {
             "scriptId": self.script_id,
             "script": self.script,
             "branch": "master",
             "environment": "release",
             "org": "phantombuster",
-            "name": self.name,
+            "name": name or self.name,
             "fileMgmt": "mix",
             "argument": self.argument,
             "launchType": "manually",
             "maxParallelism": 1
         }
-        
-        headers = {
-            "accept": "application/json",
-            "content-type": "application/json",
-            "X-Phantombuster-Key": self.credentials.phantombuster_key
-        }
-        
-        response = requests.post(url, json=new_agent, headers=headers)
+        if self.webhooks is not None:
+            # Phantombuster posts to it when a container of the agent ends
+            payload["webhook"] = self.webhooks.url
+        return payload
+
+    def create(self, name: Optional[str] = None) -> bool:
+        """Create a new Phantom agent"""
+        new_agent = self._agent_payload(name)
+        response = self.transport.post("agents/save", json=new_agent, headers=self._headers(content_type=True))
         if response.ok:
             response_json = response.json()
             self.agent_id = response_json.get("id")
             return bool(self.agent_id)
         return False
 
+    async def create_async(self, name: Optional[str] = None) -> bool:
+        """Async version of create"""
+        new_agent = self._agent_payload(name)
+        response = await self.async_transport.post("agents/save", json=new_agent, headers=self._headers(content_type=True))
+        if response.is_success:
+            response_json = response.json()
+            self.agent_id = response_json.get("id")
+            return bool(self.agent_id)
+        return False
+
     def delete(self) -> bool:
         """Delete the current Phantom agent"""
         if not self.agent_id:
             return False
-            
-        url = "https://api.phantombuster.com/api/v2/agents/delete"
-        
+
         payload = {"id": self.agent_id}
-        headers = {
-            "content-type": "application/json",
-            "X-Phantombuster-Key": self.credentials.phantombuster_key
-        }
-        
-        response = requests.post(url, json=payload, headers=headers)
+        response = self.transport.post("agents/delete", json=payload, headers=self._headers(content_type=True))
         return response.ok
 
+    async def delete_async(self) -> bool:
+        """Async version of delete"""
+        if not self.agent_id:
+            return False
+
+        payload = {"id": self.agent_id}
+        response = await self.async_transport.post("agents/delete", json=payload, headers=self._headers(content_type=True))
+        return response.is_success
+
+    def _store_container(self, response_json: dict) -> bool:
+        container_id = response_json.get("containerId")
+        if container_id:
+            self.container_id = container_id
+            self.raw_data = None
+            self.container_seconds = None
+            self.container_seconds_measured = False
+            self._launched_at = time.monotonic()
+            self._set_state("launched")
+            return True
+        self._fail("launch_failed", f"No containerId in launch response: {str(response_json)[:500]}")
+        return False
+
+    @property
+    def metrics_script(self) -> str:
+        """Script label of this agent's metrics"""
+        return self.script or type(self).__name__
+
+    def _phase(self, phase: str):
+        """Time a phase of the run in phantom_phase_seconds"""
+        return self.metrics.timer("phantom_phase_seconds", script=self.metrics_script, phase=phase)
+
+    def _observe_phase(self, phase: str, seconds: float):
+        self.metrics.observe("phantom_phase_seconds", max(seconds, 0.0), script=self.metrics_script, phase=phase)
+
+    def _set_state(self, state: str):
+        if state != self.state:
+            self.state = state
+            if self.listener is not None:
+                self.listener(self, state)
+
+    def _fail(self, cause: str, message: str, exit_code: Optional[int] = None) -> PhantomError:
+        self.error = PhantomError(
+            cause=cause,
+            message=message,
+            container_id=str(self.container_id) if self.container_id else None,
+            exit_code=exit_code
+        )
+        return self.error
+
+    def _launch_failed(self, response) -> bool:
+        try:
+            message = response.json().get("error") or response.text
+        except ValueError:
+            message = response.text
+        self._fail("launch_failed", f"Launch rejected ({response.status_code}): {message}")
+        return False
+
     def _post(self, url, data, headers=None):
         if headers is None:
-            headers = {
-                'Content-Type': 'application/json',
-                'x-phantombuster-key': self.credentials.phantombuster_key,
-            }
+            headers = self._headers(content_type=True)
 
-        response = requests.post(url, headers=headers, json=data)
+        self.error = None
+        response = self.transport.post(url, headers=headers, json=data)
         if response:
-            response_json = response.json()
-            container_id = response_json.get("containerId")
-            if container_id:
-                self.container_id = container_id
-                return True
-        return False
+            return self._store_container(response.json())
+        return self._launch_failed(response)
+
+    async def _post_async(self, url, data, headers=None):
+        if headers is None:
+            headers = self._headers(content_type=True)
+
+        self.error = None
+        response = await self.async_transport.post(url, headers=headers, json=data)
+        if response.is_success:
+            return self._store_container(response.json())
+        return self._launch_failed(response)
+
+    def build_launch(self, *args, **kwargs) -> dict:
+        """Build the agents/launch payload. Should be implemented by subclasses."""
+        raise NotImplementedError("Subclasses must implement build_launch()")
+
+    def run(self, *args, **kwargs) -> bool:
+        """Start the phantom task, arguments are passed to build_launch()"""
+        return self._post(self.lanch_url, self.build_launch(*args, **kwargs))
+
+    async def run_async(self, *args, **kwargs) -> bool:
+        """Async version of run"""
+        return await self._post_async(self.lanch_url, self.build_launch(*args, **kwargs))
+
+    def _container_params(self, with_output: bool = False, with_result: Optional[bool] = None) -> dict:
+        params = {"id": self.container_id}
+        if with_result is None:
+            # The result file is read through the agent, inline it for a bare container id
+            with_result = not (self.result_file and self.agent_id)
+        if with_result:
+            params["withResultObject"] = 1
+        if with_output:
+            params["withOutput"] = 1
+        return params
+
+    def _check_container(self, response_json: dict) -> bool:
+        """Detect a terminal container and record an error if it failed
+
+        Keeps the containers/fetch response once the container has ended, so
+        the result is available without another request.
+        """
+        status = response_json.get("status")
+        exit_code = response_json.get("exitCode")
+        if status not in TERMINAL_STATUSES and exit_code is None:
+            if status == "running" and self.state != "running":
+                # Time the container spent queued on Phantombuster's side (approximated by the poll that saw it start)
+                if self._launched_at is not None:
+                    self._observe_phase("pb_queue", time.monotonic() - self._launched_at)
+                self._set_state("running")
+            return False
+
+        self.raw_data = response_json
+        if self._launched_at is not None:
+            self.container_seconds = time.monotonic() - self._launched_at
+        ended_at = response_json.get("endedAt")
+        if isinstance(ended_at, (int, float)):
+            # How late polling (or the webhook) noticed the end
+            self._observe_phase("poll_slack", time.time() - ended_at / 1000)
+            started_at = response_json.get("startedAt") or response_json.get("createdAt")
+            if isinstance(started_at, (int, float)) and ended_at >= started_at:
+                self.container_seconds = (ended_at - started_at) / 1000
+                self.container_seconds_measured = True
+        end_type = response_json.get("endType") or response_json.get("exitMessage")
+        failed = status in FAILED_END_TYPES or end_type in FAILED_END_TYPES or exit_code not in (None, 0)
+        if failed:
+            exit_message = response_json.get("exitMessage")
+            if not exit_message or exit_message in TERMINAL_STATUSES:
+                exit_message = f"Container ended with status '{status}' and exit code {exit_code}"
+            self._fail(classify_error(exit_message, response_json.get("output")), exit_message, exit_code)
+        return True
+
+    def _check_response(self, response) -> Optional[bool]:
+        """Fail fast on API errors that polling again won't fix (bad key, unknown container)"""
+        if response.status_code in (400, 401, 403, 404):
+            self._fail("api_error", f"containers/fetch returned {response.status_code}: {response.text[:500]}")
+            return True
+        return None
+
+    def _explain_error(self, response_json: dict):
+        """Refine the error cause with the console output, which the poll response doesn't carry"""
+        if self.error is None or self.error.cause != "script_error":
+            return
+        output = response_json.get("output") or ""
+        cause = classify_error(self.error.message, output)
+        lines = [line for line in output.splitlines() if line.strip()]
+        self.error.cause = cause
+        if lines:
+            self.error.message = f"{self.error.message}: {lines[-1].strip()}"
 
     def is_finished(self) -> bool:
-        """Check if the phantom task is finished"""
-        if not self.agent_id:
+        """Check if the launched container is finished
+
+        Polls containers/fetch for our container_id (not the agent, which may
+        be reused), and keeps the result object from the same response.
+        """
+        if not self.container_id:
             return False
-            
-        url = f"https://api.phantombuster.com/api/v2/agents/fetch-output?id={self.agent_id}"
-        headers = {
-            "accept": "application/json",
-            "X-Phantombuster-Key": self.credentials.phantombuster_key
-        }
+
+        try:
+            response = self.transport.get("containers/fetch", params=self._container_params(), headers=self._headers())
+            if response.ok:
+                return self._check_container(load_json(response.content))
+            return self._check_response(response)
+        except Exception:
+            return None
+
+    async def is_finished_async(self) -> bool:
+        """Async version of is_finished"""
+        if not self.container_id:
+            return False
+
         try:
-            response = requests.get(url, headers=headers)
-            if response not in ["", None]:
-                response_json = response.json()
-                status = response_json.get("status")
-                if status == 'finished':
-                    return True
-        except:
+            response = await self.async_transport.get("containers/fetch", params=self._container_params(), headers=self._headers())
+            if response.is_success:
+                return self._check_container(load_json(response.content))
+            return self._check_response(response)
+        except Exception:
             return None
+
+    @property
+    def polling_key(self) -> str:
+        """Key under which run times are learned, runs of the same key should take similar time"""
+        return self.script_id
+
+    def _next_poll_delay(self) -> Optional[float]:
+        elapsed = time.monotonic() - (self._launched_at or time.monotonic())
+        return self.polling.next_delay(self.polling_key, elapsed, self._retry_delay, self.max_wait)
+
+    def _webhook_timeout(self, delay: float) -> float:
+        """How long to wait for the webhook: at least the fallback interval, never past the polling deadline"""
+        elapsed = time.monotonic() - (self._launched_at or time.monotonic())
+        remaining = self.polling.deadline(self.polling_key, self.max_wait) - elapsed
+        return max(0.0, min(max(delay, self.webhooks.fallback_interval), remaining))
+
+    def _record_duration(self):
+        if self._launched_at is not None:
+            self.polling.record(self.polling_key, time.monotonic() - self._launched_at)
+
+    def _timed_out(self) -> bool:
+        self._fail("timeout", f"Container still running after {round(time.monotonic() - self._launched_at)}s")
         return False
 
     def wait_until_finished(self) -> bool:
-        """Wait until phantom task is finished or max retries reached"""
-        for _ in range(self._max_retries):
+        """Wait until the container has ended, polling on the script's schedule
+
+        With webhooks, waits for the container's notification instead and
+        only polls every fallback_interval seconds until it comes.
+
+        Returns True as soon as the container ends, successfully or not; a
+        failed run is described by self.error.
+        """
+        notified = False
+        while True:
+            delay = self._next_poll_delay()
+            if delay is None:
+                return self._timed_out()
+            if self.webhooks is not None and not notified:
+                notified = self.webhooks.wait(self.container_id, self._webhook_timeout(delay)) is not None
+            else:
+                time.sleep(delay)
             if self.is_finished():
+                if self.error is None:
+                    self._record_duration()
+                elif self.error.cause == "script_error":
+                    # Only a failure of the script itself is explained by its console output
+                    try:
+                        self._explain_error(self.get_raw_data(with_output=True) or {})
+                    except Exception:
+                        pass
                 return True
-            time.sleep(self._retry_delay)
-        return False
 
     async def wait_until_finished_async(self) -> bool:
         """Async version of wait_until_finished"""
-        import asyncio
-        for _ in range(self._max_retries):
-            if self.is_finished():
+        notified = False
+        while True:
+            delay = self._next_poll_delay()
+            if delay is None:
+                return self._timed_out()
+            if self.webhooks is not None and not notified:
+                notification = await self.webhooks.wait_async(self.container_id, self._webhook_timeout(delay))
+                notified = notification is not None
+            else:
+                await asyncio.sleep(delay)
+            if await self.is_finished_async():
+                if self.error is None:
+                    self._record_duration()
+                elif self.error.cause == "script_error":
+                    try:
+                        self._explain_error(await self.get_raw_data_async(with_output=True) or {})
+                    except Exception:
+                        pass
                 return True
-            await asyncio.sleep(self._retry_delay)
-        return False
 
-    def get_raw_data(self):
-        """Get raw data from phantom container"""
-        if not self.container_id:
+    def _cached_raw_data(self, with_output: bool) -> Optional[dict]:
+        if self.raw_data is None or str(self.raw_data.get("id", self.container_id)) != str(self.container_id):
+            return None
+        if with_output and "output" not in self.raw_data:
             return None
-            
-        url = f"https://api.phantombuster.com/api/v2/containers/fetch?id={self.container_id}&withResultObject=1&withOutput=1"
-        headers = {
-            "accept": "application/json",
-            "X-Phantombuster-Key": self.credentials.phantombuster_key
-        }
-        response = requests.get(url, headers=headers)
-        self.raw_data  = response.json()
         return self.raw_data
 
-    def get_data(self, filter_field: Optional[str] = None, filter_value: Optional[str] = None):
-        """Get processed data from phantom task. Should be implemented by subclasses.
-        
+    def get_raw_data(self, with_output: bool = False):
+        """Get raw data from phantom container
+
         Args:
-            filter_field: Optional field name to filter results by
-            filter_value: Optional value that the field should match
+            with_output: Also download the container's console output (can be
+                hundreds of KB); the result object alone is fetched otherwise
         """
-        raise NotImplementedError("Subclasses must implement get_data()")
+        if not self.container_id:
+            return None
+
+        if self._cached_raw_data(with_output) is None:
+            response = self.transport.get("containers/fetch", params=self._container_params(with_output), headers=self._headers())
+            self.raw_data = load_json(response.content)
+        if self._needs_result_file():
+            self.raw_data["resultObject"] = self._download_result()
+            self._check_result()
+        return self.raw_data
+
+    async def get_raw_data_async(self, with_output: bool = False):
+        """Async version of get_raw_data"""
+        if not self.container_id:
+            return None
+
+        if self._cached_raw_data(with_output) is None:
+            response = await self.async_transport.get("containers/fetch", params=self._container_params(with_output), headers=self._headers())
+            self.raw_data = load_json(response.content)
+        if self._needs_result_file():
+            self.raw_data["resultObject"] = await self._download_result_async()
+            self._check_result()
+        return self.raw_data
+
+    def _needs_result_file(self) -> bool:
+        return bool(self.result_file and self.agent_id) and self.error is None and not self.raw_data.get("resultObject")
+
+    def _result_file_url(self, agent_json: dict) -> Optional[str]:
+        org_folder = agent_json.get("orgS3Folder")
+        agent_folder = agent_json.get("s3Folder")
+        if not (org_folder and agent_folder):
+            return None
+        return f"{self.result_files_url}{org_folder}/{agent_folder}/{self.result_file}"
+
+    def _written_by_container(self, response) -> bool:
+        """Whether a downloaded agent file was written by this container
+
+        The file belongs to the agent, and pooled agents are reused: it may
+        still hold the output of an earlier run, maybe of another caller.
+        """
+        started_at = self.raw_data.get("launchedAt") or self.raw_data.get("startedAt") or self.raw_data.get("createdAt")
+        modified = response.headers.get("Last-Modified")
+        if not isinstance(started_at, (int, float)) or not modified:
+            return False
+        try:
+            modified_at = parsedate_to_datetime(modified).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # Last-Modified is to the second
+        return modified_at >= started_at // 1000
+
+    def _check_result(self):
+        if not self.raw_data.get("resultObject"):
+            self._fail("no_result", f"Container {self.container_id} ended without a result of its own")
+
+    def _download_result(self) -> Optional[str]:
+        """Text of the agent's result file, or the inline result object if the file
+        can't be read or was not written by this container
+        """
+        response = self.transport.get("agents/fetch", params={"id": self.agent_id}, headers=self._headers())
+        url = self._result_file_url(load_json(response.content)) if response.ok else None
+        if url:
+            response = self.transport.get(url)
+            if response.ok and self._written_by_container(response):
+                return response.text
+        response = self.transport.get("containers/fetch", params=self._container_params(with_result=True), headers=self._headers())
+        return load_json(response.content).get("resultObject")
+
+    async def _download_result_async(self) -> Optional[str]:
+        """Async version of _download_result"""
+        response = await self.async_transport.get("agents/fetch", params={"id": self.agent_id}, headers=self._headers())
+        url = self._result_file_url(load_json(response.content)) if response.is_success else None
+        if url:
+            response = await self.async_transport.get(url)
+            if response.is_success and self._written_by_container(response):
+                return response.text
+        response = await self.async_transport.get("containers/fetch", params=self._container_params(with_result=True), headers=self._headers())
+        return load_json(response.content).get("resultObject")
+
+    def keep_raw(self, model: MarkdownModel, record: dict) -> MarkdownModel:
+        """Apply raw_mode to a model built from ``record`` with a raw_data field"""
+        if self.raw_mode != "inline":
+            model.raw_data = None
+            if self.raw_mode == "store" and self.raw_store is not None:
+                model.raw_id = self.raw_store.put(record)
+        return model
+
+    def release_envelope(self):
+        """Drop the containers/fetch response (console output included) once it has been parsed"""
+        if self.keep_result and self.raw_data is not None:
+            self.raw_data = {"id": self.raw_data.get("id", self.container_id), "resultObject": self.raw_data.get("resultObject")}
+        else:
+            self.raw_data = None
+
+    def parse_data(self, raw_data: Optional[dict], *args, **kwargs):
+        """Convert a containers/fetch response into models. Should be implemented by subclasses."""
+        raise NotImplementedError("Subclasses must implement parse_data()")
+
+    def get_data(self, *args, **kwargs):
+        """Get processed data from phantom task, arguments are passed to parse_data()"""
+        with self._phase("fetch"):
+            raw_data = self.get_raw_data()
+        with self._phase("parse"):
+            return self.parse_data(raw_data, *args, **kwargs)
+
+    async def get_data_async(self, *args, **kwargs):
+        """Async version of get_data"""
+        with self._phase("fetch"):
+            raw_data = await self.get_raw_data_async()
+        with self._phase("parse"):
+            return self.parse_data(raw_data, *args, **kwargs)
+
+    def acquire_agent(self) -> bool:
+        """Get an agent id for this run: from the pool if there is one, otherwise create a new agent"""
+        if self.pool is not None:
+            return self.pool.acquire(self)
+        return self.create()
+
+    async def acquire_agent_async(self) -> bool:
+        """Async version of acquire_agent"""
+        if self.pool is not None:
+            return await self.pool.acquire_async(self)
+        return await self.create_async()
+
+    def release_agent(self, reuse: bool = True):
+        """Give the agent back to the pool, or delete it when running without a pool"""
+        if self.pool is not None:
+            self.pool.release(self, reuse=reuse)
+        elif self.agent_id:
+            self.delete()
+
+    async def release_agent_async(self, reuse: bool = True):
+        """Async version of release_agent"""
+        if self.pool is not None:
+            await self.pool.release_async(self, reuse=reuse)
+        elif self.agent_id:
+            await self.delete_async()
+
+    def acquire_slot(self) -> bool:
+        """Wait for the scheduler to admit a launch, always True without a scheduler"""
+        if self.scheduler is None:
+            return True
+        self._ticket = self.scheduler.acquire(self.credentials)
+        return self._ticket is not None
+
+    async def acquire_slot_async(self) -> bool:
+        """Async version of acquire_slot"""
+        if self.scheduler is None:
+            return True
+        self._ticket = await self.scheduler.acquire_async(self.credentials)
+        return self._ticket is not None
+
+    def release_slot(self):
+        """Tell the scheduler the container is done, safe to call more than once"""
+        if self.scheduler is not None:
+            self.scheduler.release(self._ticket)
+
+    @property
+    def priority(self) -> str:
+        return self.tags.get("priority", "normal")
+
+    def check_quota(self) -> bool:
+        """Refuse the launch when the execution time budget is spent, always True without a quota guard"""
+        if self.quota is None:
+            return True
+        refusal = self.quota.check(self.credentials, self.priority)
+        if refusal:
+            self._fail("quota_exceeded", refusal)
+            return False
+        return True
+
+    async def check_quota_async(self) -> bool:
+        """Async version of check_quota"""
+        if self.quota is None:
+            return True
+        refusal = await self.quota.check_async(self.credentials, self.priority)
+        if refusal:
+            self._fail("quota_exceeded", refusal)
+            return False
+        return True
+
+    def record_usage(self, success: bool):
+        """Account the execution time of the container this run launched"""
+        if self.container_seconds is None and self._launched_at is not None:
+            # No timestamps (e.g. given up on while still running): count the time waited for it
+            self.container_seconds = time.monotonic() - self._launched_at
+        if self.container_seconds is None:
+            return
+        self.metrics.observe("phantom_container_seconds", self.container_seconds, script=self.metrics_script)
+        if self.quota is not None:
+            outcome = "success" if success else (self.error.cause if self.error is not None else "error")
+            self.quota.record(self, self.container_seconds, self.container_seconds_measured, outcome)
+
+    def _start_run(self) -> float:
+        self.metrics.gauge_add("phantom_runs_in_flight", 1, script=self.metrics_script)
+        return time.monotonic()
+
+    def _end_run(self, started: float, success: bool):
+        script = self.metrics_script
+        self.metrics.gauge_add("phantom_runs_in_flight", -1, script=script)
+        self.metrics.observe("phantom_run_seconds", time.monotonic() - started, script=script)
+        outcome = "success" if success else (self.error.cause if self.error is not None else "error")
+        self.metrics.inc("phantom_runs_total", script=script, outcome=outcome)
 
     def run_and_get_data(self, *args, **kwargs) -> Tuple[Optional[any], bool]:
         """Run complete phantom task lifecycle and get data
-        
+
         This method handles the complete lifecycle:
-        1. Creates the agent
-        2. Runs the task
-        3. Waits for completion and gets data
-        4. Deletes the agent
-        
+        1. Checks the execution time budget and waits for a launch slot from the scheduler, if any
+        2. Acquires an agent (pooled or newly created)
+        3. Runs the task
+        4. Waits for completion, frees the launch slot and gets data
+        5. Releases the containers/fetch response and the agent (back to the pool, or deleted)
+
+        Every phase is timed in self.metrics (phantom_phase_seconds), along with
+        the whole run and its outcome.
+
         Returns:
-            Tuple[data, success]: The processed data and whether all operations succeeded
+            Tuple[data, success]: The processed data and whether all operations succeeded.
+            On failure self.error describes the cause.
         """
         success = False
         data = None
-        
+        acquired = False
+        launched = finished = False
+
+        self._set_state("queued")
+        started = self._start_run()
         try:
-            if self.create():
-                if self.run(*args, **kwargs):
-                    if self.wait_until_finished():
+            if not self.check_quota():
+                return data, success
+            with self._phase("slot"):
+                admitted = self.acquire_slot()
+            if not admitted:
+                self._fail("rate_limited", "Timed out waiting for a launch slot")
+                return data, success
+            with self._phase("acquire"):
+                acquired = self.acquire_agent()
+            if not acquired:
+                self._fail("no_agent", "Could not get a Phantombuster agent")
+            else:
+                with self._phase("launch"):
+                    launched = self.run(*args, **kwargs)
+                if launched:
+                    with self._phase("wait"):
+                        finished = self.wait_until_finished()
+                    self.release_slot()
+                    if finished and self.error is None:
                         data = self.get_data()
-                        success = True
+                        success = self.error is None
         finally:
-            # Always try to delete the agent, even if something failed
-            if self.agent_id:
-                self.delete()
-                
+            # Always release the agent, even if something failed. An agent whose
+            # container may still be running is not reused.
+            self.release_slot()
+            self.release_envelope()
+            if acquired:
+                with self._phase("release"):
+                    self.release_agent(reuse=finished or not launched)
+            if launched:
+                self.record_usage(success)
+            self._set_state("finished" if success else "failed")
+            self._end_run(started, success)
+
         return data, success
 
     async def run_and_get_data_async(self, *args, **kwargs) -> Tuple[Optional[any], bool]:
         """Async version of run_and_get_data"""
         success = False
         data = None
-        
+        acquired = False
+        launched = finished = False
+
+        self._set_state("queued")
+        started = self._start_run()
         try:
-            if self.create():
-                if self.run(*args, **kwargs):
-                    if await self.wait_until_finished_async():
-                        data = self.get_data()
-                        success = True
+            if not await self.check_quota_async():
+                return data, success
+            with self._phase("slot"):
+                admitted = await self.acquire_slot_async()
+            if not admitted:
+                self._fail("rate_limited", "Timed out waiting for a launch slot")
+                return data, success
+            with self._phase("acquire"):
+                acquired = await self.acquire_agent_async()
+            if not acquired:
+                self._fail("no_agent", "Could not get a Phantombuster agent")
+            else:
+                with self._phase("launch"):
+                    launched = await self.run_async(*args, **kwargs)
+                if launched:
+                    with self._phase("wait"):
+                        finished = await self.wait_until_finished_async()
+                    self.release_slot()
+                    if finished and self.error is None:
+                        data = await self.get_data_async()
+                        success = self.error is None
         finally:
-            # Always try to delete the agent, even if something failed
-            if self.agent_id:
-                self.delete()
-                
-        return data, success 
\ No newline at end of file
+            # Always release the agent, even if something failed. Shielded so a
+            # cancelled tool call still returns the agent to the pool.
+            self.release_slot()
+            self.release_envelope()
+            if acquired:
+                with self._phase("release"):
+                    await asyncio.shield(self.release_agent_async(reuse=finished or not launched))
+            if launched:
+                self.record_usage(success)
+            self._set_state("finished" if success else "failed")
+            self._end_run(started, success)
+
+        return data, success
@@ -0,0 +1,44 @@
+from typing import List, Type
+
+from mcp_server.base_model.MarkdownModel import MarkdownModel
+
+
+class PhantomAgentBatch:
+    """Mixin for agents that scrape many URLs in one launch
+
+    Put it before the single-URL agent class (``class Batch(PhantomAgentBatch,
+    PhantomAgentProfile)``). Subclasses set ``result_model``, a model with
+    ``url`` and ``error`` fields, and record the URLs of their launch with
+    ``set_requested_urls`` in build_launch. The URLs are also known before
+    the launch, so ``failed_results`` covers a batch that never launched
+    (no launch slot, no agent, budget exhausted).
+    """
+
+    result_model: Type[MarkdownModel]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_urls: List[str] = []
+
+    def set_requested_urls(self, urls: List[str]) -> List[str]:
+        """Requested URLs, deduplicated in order"""
+        self.requested_urls = list(dict.fromkeys(urls))
+        return self.requested_urls
+
+    @property
+    def polling_key(self) -> str:
+        # Batch run time grows with the batch, learn it per batch size bucket
+        return f"{self.script_id}:batch{min(len(self.requested_urls), 100) // 10 * 10}"
+
+    def run_and_get_data(self, urls: List[str], *args, **kwargs):
+        self.set_requested_urls(urls)
+        return super().run_and_get_data(urls, *args, **kwargs)
+
+    async def run_and_get_data_async(self, urls: List[str], *args, **kwargs):
+        self.set_requested_urls(urls)
+        return await super().run_and_get_data_async(urls, *args, **kwargs)
+
+    def failed_results(self) -> List[MarkdownModel]:
+        """Results for every requested URL when the whole launch failed"""
+        message = self.error.message if self.error else "Scraping failed"
+        return [self.result_model(url=url, error=message) for url in self.requested_urls]
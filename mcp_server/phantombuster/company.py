@@ -1,7 +1,43 @@
-import json
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 from mcp_server.phantombuster.base import PhantomAgentBase, PhantomCredentials
-from mcp_server.phantombuster.models import Company
+from mcp_server.phantombuster.batch import PhantomAgentBatch
+from mcp_server.phantombuster.urls import canonical_url
+from mcp_server.phantombuster.results import load_result
+from mcp_server.phantombuster.mapping import FieldSpec, ModelMapping, to_str
+from mcp_server.phantombuster.models import Company, CompanyResult
+
+
+# LinkedIn Company Scraper record -> Company
+COMPANY_MAPPING = ModelMapping(Company, {
+    "name": FieldSpec("name", default=""),
+    "description": FieldSpec("description"),
+    "tag_line": FieldSpec("tagLine"),
+    "website": FieldSpec("website"),
+    "location": FieldSpec("location"),
+    "country": FieldSpec("country"),
+    "city": FieldSpec("city"),
+    "geographic_area": FieldSpec("geographicArea", "companyAddress"),
+    "year_founded": FieldSpec("yearFounded", "founded", coerce=to_str),
+    "currency": FieldSpec("currency"),
+    "min_revenue": FieldSpec("minRevenue", coerce=to_str),
+    "max_revenue": FieldSpec("maxRevenue", coerce=to_str),
+    "growth_6mth": FieldSpec("growth6Mth", coerce=to_str),
+    "growth_1yr": FieldSpec("growth1Yr", coerce=to_str),
+    "growth_2yr": FieldSpec("growth2Yr", coerce=to_str),
+    "industry": FieldSpec("industry"),
+    "size": FieldSpec("companySize", coerce=to_str),
+    "specialties": FieldSpec("specialties"),
+    "ld_id": FieldSpec("mainCompanyID", "linkedinID", coerce=to_str),
+    "employees": FieldSpec("employeesOnLinkedIn", coerce=to_str),
+    "linkedin": FieldSpec("companyUrl"),
+    "phone": FieldSpec("phone", coerce=to_str),
+    "linkedin_sn": FieldSpec("salesNavigatorCompanyUrl", "salesNavigatorLink"),
+})
+
+
+def company_from_record(value: dict) -> Company:
+    """Convert one LinkedIn Company Scraper record into a Company"""
+    return COMPANY_MAPPING.one(value)
 
 
 class PhantomAgentCompany(PhantomAgentBase):
@@ -10,67 +46,86 @@ class PhantomAgentCompany(PhantomAgentBase):
             credentials: PhantomCredentials, 
             agent_id: Optional[str] = None, 
             max_retries: int = 20, 
-            retry_delay: int = 10
+            retry_delay: int = 10,
+            delay_between: int = 2,
+            **kwargs
         ):
 
-        super().__init__(credentials, agent_id, max_retries, retry_delay)
+        super().__init__(credentials, agent_id, max_retries, retry_delay, **kwargs)
         self.script_id = "3296"
         self.script = "LinkedIn Company Scraper.js"
         self.name = "LinkedIn Company Scraper (API)"
+        self.delay_between = delay_between  # seconds between two companies of a launch
 
-    def run(self, linkedin_url: str) -> bool:
-        """Start phantom task to scrape company"""
+    def build_launch(self, linkedin_url: str) -> dict:
+        """Build launch payload to scrape company"""
         data = {
             "id": self.agent_id,
             "argument": {
                 "userAgent": self.credentials.user_agent,
                 "sessionCookie": self.credentials.session_cookie,
                 "spreadsheetUrl": linkedin_url,
-                "delayBetween": 2
+                "delayBetween": self.delay_between
             }
         }
-        return self._post(self.lanch_url, data)
+        return data
 
-    def get_data(self, query: Optional[str] = None) -> Optional[Company]:
+    def parse_data(self, raw_data: Optional[dict], query: Optional[str] = None) -> Optional[Company]:
         """
         Get processed company data from phantom task
         Args:
+            raw_data: containers/fetch response
             query: Optional query to filter company by
         Returns:
             Company object if found, None otherwise
         """
 
-        result = self.get_raw_data()
-        result_obj = json.loads(result.get("resultObject"))
+        result_obj = load_result(raw_data)
         if result_obj:
             for value in result_obj:
                 if query is not None:
                     if query != value.get("query"):
                         continue
                 
-                return Company(
-                    name=value.get('name', ""),
-                    description=value.get('description'),
-                    tag_line=value.get('tagLine'),
-                    website=value.get('website'),
-                    location=value.get('location'),
-                    country=value.get('country'),
-                    city=value.get('city'),
-                    geographic_area=value.get('geographicArea', value.get("companyAddress")),
-                    year_founded=value.get('yearFounded', value.get("founded")),
-                    currency=value.get('currency'),
-                    min_revenue=value.get('minRevenue'),
-                    max_revenue=value.get('maxRevenue'),
-                    growth_6mth=value.get('growth6Mth'),
-                    growth_1yr=value.get('growth1Yr'),
-                    growth_2yr=value.get('growth2Yr'),
-                    industry=value.get('industry'),
-                    size=value.get('companySize'),
-                    specialties=value.get('specialties'),
-                    ld_id=value.get("mainCompanyID", value.get('linkedinID')),
-                    employees=value.get('employeesOnLinkedIn'),
-                    linkedin=value.get('companyUrl'),
-                    phone=value.get('phone'),
-                    linkedin_sn=value.get('salesNavigatorCompanyUrl', value.get("salesNavigatorLink"))
-                )
-        return None
\ No newline at end of file
+                return company_from_record(value)
+        return None
+
+
+class PhantomAgentCompanyBatch(PhantomAgentBatch, PhantomAgentCompany):
+    """Scrapes many companies in one launch and maps results back to the requested URLs"""
+
+    result_model = CompanyResult
+
+    def build_launch(self, linkedin_urls: List[str]) -> dict:
+        """Build launch payload to scrape several companies at once"""
+        data = super().build_launch(self.set_requested_urls(linkedin_urls)[0])
+        argument = data["argument"]
+        if len(self.requested_urls) > 1:
+            del argument["spreadsheetUrl"]
+            argument["companyUrls"] = self.requested_urls
+        self.max_wait = max(self.max_wait, (30 + self.delay_between) * len(self.requested_urls))
+        return data
+
+    def parse_data(self, raw_data: Optional[dict]) -> List[CompanyResult]:
+        """Get one CompanyResult per requested URL, in request order
+
+        Builds a single lookup of records by the ``query`` the scraper echoes
+        back, so each input is resolved without scanning the whole result.
+        """
+        by_query: Dict[str, dict] = {}
+        result_obj = load_result(raw_data)
+        for value in result_obj or []:
+            key = canonical_url(value.get("query"))
+            if key and key not in by_query:
+                by_query[key] = value
+
+        results = []
+        for url in self.requested_urls:
+            value = by_query.get(canonical_url(url))
+            if value is None:
+                results.append(CompanyResult(url=url, error="No result returned for this URL"))
+            elif value.get("error") and not value.get("name"):
+                results.append(CompanyResult(url=url, error=str(value.get("error"))))
+            else:
+                results.append(CompanyResult(url=url, company=company_from_record(value)))
+        return results
@@ -1,7 +1,23 @@
-import json
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from mcp_server.phantombuster.base import PhantomAgentBase, PhantomCredentials
 from mcp_server.phantombuster.models import Connection
+from mcp_server.phantombuster.stream import iter_json_array
+from mcp_server.phantombuster.mapping import FieldSpec, ModelMapping, to_str
+
+
+# LinkedIn Connections Export record -> Connection
+CONNECTION_MAPPING = ModelMapping(Connection, {
+    "linkedin_url": FieldSpec("profileUrl", default=""),
+    "first_name": FieldSpec("firstName", default=""),
+    "last_name": FieldSpec("lastName", default=""),
+    "full_name": FieldSpec("fullName", default=""),
+    "job_title": FieldSpec("title"),
+    "date_connected": FieldSpec("connectionSince", coerce=to_str),
+})
+
+
+def connection_from_record(value: dict) -> Connection:
+    return CONNECTION_MAPPING.one(value)
 
 
 class PhantomAgentConnections(PhantomAgentBase):
@@ -10,16 +26,21 @@ class PhantomAgentConnections(PhantomAgentBase):
             credentials: PhantomCredentials, 
             agent_id: Optional[str] = None, 
             max_retries: int = 20, 
-            retry_delay: int = 10
+            retry_delay: int = 10,
+            **kwargs
         ):
         
-        super().__init__(credentials, agent_id, max_retries, retry_delay)
+        super().__init__(credentials, agent_id, max_retries, retry_delay, **kwargs)
         self.script_id = "12670"
         self.script = "LinkedIn Connections Export.js"
         self.name = "LinkedIn Connections Export (API)"
+        self.max_wait = max(self.max_wait, 1800)  # large exports run for many minutes
+        self.result_file = "result.json"
+        self.keep_result = True  # paged through after the run
+        self.page_size = 100  # connections decoded by the run itself, see parse_data
 
-    def run(self, count_to_scrape: int = 100, sort: str = "Recently added") -> bool:
-        """Start phantom task to scrape connections
+    def build_launch(self, count_to_scrape: int = 100, sort: str = "Recently added") -> dict:
+        """Build launch payload to scrape connections
         Args:
             count_to_scrape: Number of connections to scrape
             sort: Sort order for connections ("Recently added" by default)
@@ -33,27 +54,47 @@ class PhantomAgentConnections(PhantomAgentBase):
                 "numberOfProfiles": count_to_scrape
             }
         }
-        return self._post(self.lanch_url, data)
+        return data
 
-    def get_data(self) -> List[Connection]:
-        """Get processed connections from phantom task"""
+    def _read_page(
+            self, raw_data: Optional[dict], pos: int, limit: int
+        ) -> Tuple[List[Connection], Optional[int], List[int]]:
         connections = []
-        raw_data = self.get_raw_data()
-        if not raw_data:
-            return connections 
-        
-        result_obj = json.loads(raw_data.get("resultObject"))
-        if not result_obj:
-            return connections 
-        
-        for value in result_obj:
-            connection = Connection(
-                linkedin_url=value.get('profileUrl', ""),
-                first_name=value.get('firstName', ""),
-                last_name=value.get('lastName', ""),
-                full_name=value.get('fullName', ""),
-                job_title=value.get('title'),
-                date_connected=value.get('connectionSince')
-            )
-            connections.append(connection)
-        return connections 
\ No newline at end of file
+        starts = []
+        result = raw_data.get("resultObject") if raw_data else None
+        if not result:
+            return connections, None, starts
+        for value, end in iter_json_array(result, pos):
+            # One record past the page tells whether there is a next page
+            if len(connections) == limit:
+                return connections, pos, starts
+            if not isinstance(value, dict):
+                raise ValueError(f"Position {pos} is not between two records")
+            connections.append(connection_from_record(value))
+            starts.append(pos)
+            pos = end
+        return connections, None, starts
+
+    def parse_page(
+            self, raw_data: Optional[dict], pos: int = 0, limit: int = 100
+        ) -> Tuple[List[Connection], Optional[int], List[int]]:
+        """Up to ``limit`` connections starting at ``pos``
+
+        Returns:
+            Tuple[connections, next_pos, starts]: next_pos is None once the export
+            is exhausted, starts holds the position of each connection
+
+        Raises:
+            ValueError: ``pos`` does not point between two records of the export
+        """
+        # Records are only decoded here, time it as the run's parse phase
+        with self._phase("parse"):
+            return self._read_page(raw_data, pos, limit)
+
+    def parse_data(self, raw_data: Optional[dict]) -> Tuple[List[Connection], Optional[int], List[int]]:
+        """First page of the export (page_size connections), as parse_page returns it
+
+        Exports can hold tens of thousands of connections: the following pages
+        are read with parse_page, from the result kept in raw_data.
+        """
+        return self._read_page(raw_data, 0, self.page_size)
@@ -0,0 +1,194 @@
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import TypeAdapter
+from pydantic_core import PydanticUndefined
+
+from mcp_server.base_model.MarkdownModel import MarkdownModel
+
+
+ModelT = TypeVar("ModelT", bound=MarkdownModel)
+
+_object_setattr = object.__setattr__
+
+
+def to_str(value: Any) -> Optional[str]:
+    """Ids and counts come back as numbers from some scrapers"""
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def to_int(value: Any) -> Optional[int]:
+    """"1,234" / "12" / 12 -> int, None when it isn't a number"""
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(str(value).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def split_list(value: Any) -> List[str]:
+    """"a, b, c" -> ["a", "b", "c"], lists are kept as is"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(",")]
+    return list(value)
+
+
+def accepted_types(annotation: Any) -> Optional[Tuple[type, ...]]:
+    """Types a field annotation accepts as is, None when a plain isinstance can't tell
+
+    Only containers are checked, not their items: ``List[str]`` accepts any list.
+    """
+    if annotation is Any:
+        return (object,)
+    origin = get_origin(annotation)
+    if origin is Union:
+        accepted = ()
+        for arg in get_args(annotation):
+            types = accepted_types(arg)
+            if types is None:
+                return None
+            accepted += types
+        return accepted
+    if origin is not None:
+        return (origin,) if isinstance(origin, type) else None
+    if annotation is None or annotation is type(None):
+        return (type(None),)
+    if annotation is float:
+        return (int, float)
+    return (annotation,) if isinstance(annotation, type) else None
+
+
+class FieldSpec:
+    """Where one model field comes from in a scraper record
+
+    Args:
+        *keys: Record keys tried in order, the first non-empty value wins
+        default: Value when no key has one
+        coerce: Applied to the value found (not to the default)
+        compute: Builds the value from the whole record instead of keys
+    """
+
+    __slots__ = ("keys", "default", "coerce", "compute")
+
+    def __init__(
+            self,
+            *keys: str,
+            default: Any = None,
+            coerce: Optional[Callable[[Any], Any]] = None,
+            compute: Optional[Callable[[dict], Any]] = None
+        ):
+        self.keys: Sequence[str] = keys
+        self.default = default
+        self.coerce = coerce
+        self.compute = compute
+
+
+class ModelMapping(Generic[ModelT]):
+    """Converts scraper records into models following a field spec
+
+    The spec is compiled once into flat lists of steps, so converting a
+    record is a tight loop of dict lookups. With ``trusted=True`` models are
+    built without pydantic validation: coerced and computed fields already
+    have the right type, the others only get an isinstance check against the
+    field's annotation, and a record failing it is validated instead. Fields
+    missing from the spec get the model's default. Without ``trusted`` the
+    whole list is validated in one call.
+
+    Args:
+        model: Model class to build
+        fields: Model field name -> FieldSpec
+    """
+
+    def __init__(self, model: Type[ModelT], fields: Dict[str, FieldSpec]):
+        unknown = set(fields) - set(model.model_fields)
+        if unknown:
+            raise ValueError(f"{model.__name__} has no field(s) {', '.join(sorted(unknown))}")
+        self.model = model
+        self.fields = fields
+        self._list_adapter = None
+
+        # Most fields are one key, no coercion: keep them apart from the general case
+        self._simple = []
+        self._steps = []
+        # Fields whose value is taken from the record as is, with the types it may have
+        self._checks = []
+        for name, spec in fields.items():
+            if spec.compute is None and spec.coerce is None:
+                types = accepted_types(model.model_fields[name].annotation)
+                self._checks.append((name, spec.default, types or ()))
+            mutable_default = isinstance(spec.default, (list, dict, set))
+            if spec.compute is None and len(spec.keys) == 1 and spec.coerce is None and not mutable_default:
+                self._simple.append((name, spec.keys[0], spec.default))
+            else:
+                self._steps.append((name, tuple(spec.keys), spec.default, spec.coerce, spec.compute))
+
+        self._defaults = {}
+        for name, info in model.model_fields.items():
+            if name in fields:
+                continue
+            if info.default_factory is not None or info.default is PydanticUndefined:
+                raise ValueError(f"{model.__name__}.{name} has no default, add it to the mapping")
+            self._defaults[name] = info.default
+        self._names = frozenset(model.model_fields)
+        # Bypassing model_construct is only safe for plain models
+        self._fast = not model.__private_attributes__ and model.model_config.get("extra") != "allow"
+
+    def values(self, record: dict) -> Dict[str, Any]:
+        """Field values of the model for one record"""
+        values = dict(self._defaults)
+        get = record.get
+        for name, key, default in self._simple:
+            value = get(key)
+            values[name] = default if value is None or value == "" else value
+        for name, keys, default, coerce, compute in self._steps:
+            if compute is not None:
+                values[name] = compute(record)
+                continue
+            value = None
+            for key in keys:
+                value = get(key)
+                if value is not None and value != "":
+                    break
+            if value is None or value == "":
+                # Never share a mutable default between models
+                values[name] = default.copy() if isinstance(default, (list, dict, set)) else default
+            else:
+                values[name] = coerce(value) if coerce is not None else value
+        return values
+
+    def _typed(self, values: Dict[str, Any]) -> bool:
+        """Whether the values taken from the record as is have their field's type"""
+        for name, default, types in self._checks:
+            value = values[name]
+            if value is not default and not isinstance(value, types):
+                return False
+        return True
+
+    def _construct(self, values: Dict[str, Any]) -> ModelT:
+        """What model_construct ends up doing, without its per-field bookkeeping"""
+        if not self._fast:
+            return self.model.model_construct(**values)
+        instance = self.model.__new__(self.model)
+        _object_setattr(instance, "__dict__", values)
+        _object_setattr(instance, "__pydantic_fields_set__", set(self._names))
+        _object_setattr(instance, "__pydantic_extra__", None)
+        _object_setattr(instance, "__pydantic_private__", None)
+        return instance
+
+    def one(self, record: dict, trusted: bool = True) -> ModelT:
+        values = self.values(record)
+        if trusted and self._typed(values):
+            return self._construct(values)
+        return self.model.model_validate(values)
+
+    def many(self, records: Iterable[dict], trusted: bool = True) -> List[ModelT]:
+        """Convert a whole list of records"""
+        if trusted:
+            return [self.one(record) for record in records]
+        if self._list_adapter is None:
+            self._list_adapter = TypeAdapter(List[self.model])
+        return self._list_adapter.validate_python([self.values(record) for record in records])
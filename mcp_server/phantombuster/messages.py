@@ -1,24 +1,72 @@
-import json
-from typing import List, Optional, Tuple
+import hashlib
+from typing import Dict, List, Optional, Tuple
 from mcp_server.phantombuster.base import PhantomAgentBase, PhantomCredentials
 from mcp_server.phantombuster.models import Thread, Message
+from mcp_server.phantombuster.urls import canonical_url
+from mcp_server.phantombuster.results import load_result
+from mcp_server.phantombuster.mapping import FieldSpec, ModelMapping, to_str
+
+
+def _author_name(record: dict) -> str:
+    return f"{record.get('firstnameFrom') or ''} {record.get('lastnameFrom') or ''}"
+
+
+# LinkedIn Inbox Scraper record -> Thread
+THREAD_MAPPING = ModelMapping(Thread, {
+    "thread_id": FieldSpec("threadUrl", default=""),
+    "participants": FieldSpec(compute=lambda record: [_author_name(record)]),
+    "last_message": FieldSpec("message", default=""),
+    "last_message_date": FieldSpec("lastMessageDate", default="", coerce=to_str),
+    "timestamp": FieldSpec("timestamp", default="", coerce=to_str),
+    "is_last_message_from_me": FieldSpec("isLastMessageFromMe", default=False, coerce=bool),
+    "last_message_author_name": FieldSpec(compute=_author_name),
+    "read_status": FieldSpec("readStatus", default=False, coerce=bool),
+    "linkedin_url": FieldSpec(compute=lambda record: record["linkedInUrls"][0]),
+})
+
+# Message of a LinkedIn Message Thread Scraper record -> Message
+MESSAGE_MAPPING = ModelMapping(Message, {
+    "date": FieldSpec("date", default="", coerce=to_str),
+    "author": FieldSpec("author", default=""),
+    "message": FieldSpec("message", default=""),
+    "connection_degree": FieldSpec("connectionDegree", coerce=to_str),
+})
+
+
+def message_hash(message: Message) -> str:
+    """Content hash identifying a message within its thread"""
+    content = "\x1f".join([message.date or "", message.author or "", message.message or ""])
+    return hashlib.sha1(content.encode()).hexdigest()
+
 
 class PhantomAgentInbox(PhantomAgentBase):
+    """Scrapes inbox threads, newest first
+
+    With ``known_threads`` (thread_id -> last seen timestamp) only new or
+    changed threads are returned, and parsing stops at the first unchanged
+    thread: older threads can't have changed without moving above it.
+    """
+
     def __init__(
             self, 
             credentials: PhantomCredentials, 
             agent_id: Optional[str] = None, 
             max_retries: int = 20, 
-            retry_delay: int = 10
+            retry_delay: int = 10,
+            known_threads: Optional[Dict[str, Optional[str]]] = None,
+            **kwargs
         ):
 
-        super().__init__(credentials, agent_id, max_retries, retry_delay)
+        super().__init__(credentials, agent_id, max_retries, retry_delay, **kwargs)
         self.script_id = "532696507966746"
         self.script = "LinkedIn Inbox Scraper.js"
         self.name = "LinkedIn Inbox Scraper (API)"
+        self.known_threads = known_threads
+        self.records = 0             # threads in the last result, changed or not
+        self.reached_known = False   # the last result went down to an unchanged thread
 
-    def run(self, count_to_scrape=100, inbox_filter="all") -> bool:
-        """Start phantom task to scrape inbox"""
+    def build_launch(self, count_to_scrape=100, inbox_filter="all") -> dict:
+        """Build launch payload to scrape inbox"""
         data = {
             "id": self.agent_id,
             "argument": {
@@ -29,32 +77,25 @@ class PhantomAgentInbox(PhantomAgentBase):
             }
         }
         
-        return self._post(self.lanch_url, data)
+        return data
 
-    def get_data(self) -> List[Thread]:
+    def parse_data(self, raw_data: Optional[dict]) -> List[Thread]:
         """Get processed threads from phantom task"""
         threads = []
-        raw_data = self.get_raw_data()
+        self.records = 0
+        self.reached_known = False
         if raw_data:
-            result_obj = json.loads(raw_data.get("resultObject"))
+            result_obj = load_result(raw_data) or []
+            self.records = len(result_obj)
             for value in result_obj:
                 thread_link = value.get('threadUrl')
                 linkedInUrls = value.get('linkedInUrls', [])
+                if self.known_threads and thread_link \
+                        and self.known_threads.get(canonical_url(thread_link), "") == to_str(value.get('timestamp')):
+                    self.reached_known = True
+                    break
                 if thread_link and linkedInUrls:
-                    first_name_from = value.get('firstnameFrom', "")
-                    last_name_from = value.get('lastnameFrom', "")
-                    thread = Thread(
-                        thread_id=thread_link,
-                        participants=[value.get('firstnameFrom', "") + " " + value.get('lastnameFrom', "")],
-                        last_message=value.get('message', ""),
-                        last_message_date=value.get('lastMessageDate'),
-                        timestamp=value.get('timestamp'),
-                        is_last_message_from_me=value.get('isLastMessageFromMe'),
-                        last_message_author_name=f"{first_name_from} {last_name_from}",
-                        read_status=value.get('readStatus'),
-                        linkedin_url=linkedInUrls[0]
-                    )
-                    threads.append(thread)
+                    threads.append(THREAD_MAPPING.one(value))
         return threads
     
     
@@ -64,18 +105,19 @@ class PhantomAgentThread(PhantomAgentBase):
             credentials: PhantomCredentials, 
             agent_id: Optional[str] = None, 
             max_retries: int = 20, 
-            retry_delay: int = 10
+            retry_delay: int = 10,
+            **kwargs
         ):
         
-        super().__init__(credentials, agent_id, max_retries, retry_delay)
+        super().__init__(credentials, agent_id, max_retries, retry_delay, **kwargs)
         self.script_id = "9387"
         self.script = "LinkedIn Message Thread Scraper.js"
         self.name = "LinkedIn Message Thread Scraper (API)"
 
 
 
-    def run(self, thread_link: str) -> bool:
-        """Start phantom task to scrape messages from a thread"""
+    def build_launch(self, thread_link: str) -> dict:
+        """Build launch payload to scrape messages from a thread"""
         data = {
             "id": self.agent_id,
             "argument": {
@@ -84,31 +126,23 @@ class PhantomAgentThread(PhantomAgentBase):
                 "spreadsheetUrl": thread_link
             }
         }
-        return self._post(self.lanch_url, data)
+        return data
 
 
 
-    def get_data(self) -> List[Message]:
+    def parse_data(self, raw_data: Optional[dict]) -> List[Message]:
         """Get processed messages from phantom task"""
-        result = self.get_raw_data()
-        # result = MESSAGES_TEST
         messages = []
         seen = set()
-        result_obj = json.loads(result.get("resultObject"))
+        result_obj = load_result(raw_data)
         if result_obj:
             for value in result_obj:
                 thread_messages = value.get("messages", [])
-                for msg in thread_messages:
-                    key = (msg.get('date'), msg.get('author'), msg.get('message'))
+                for message in MESSAGE_MAPPING.many(thread_messages):
+                    key = message_hash(message)
                     if key in seen:
                         continue
                     seen.add(key)
-                    message = Message(
-                        date=msg.get('date'),
-                        author=msg.get('author'),
-                        message=msg.get('message'),
-                        connection_degree=msg.get('connectionDegree')
-                    )
                     messages.append(message)
         return messages 
     
@@ -118,17 +152,18 @@ class PhantomAgentMessageSender(PhantomAgentBase):
     def __init__(
             self, 
             credentials: PhantomCredentials, 
-            agent_id: Optional[str] = None
+            agent_id: Optional[str] = None,
+            **kwargs
         ):
         
-        super().__init__(credentials, agent_id)
+        super().__init__(credentials, agent_id, **kwargs)
         self.script_id = "9227"
         self.script = "LinkedIn Message Sender.js"
         self.name = "LinkedIn Message Sender (API)"
 
 
 
-    def run(self, linkedin: str, message: str, message_control: str = "none") -> bool:
+    def build_launch(self, linkedin: str, message: str, message_control: str = "none") -> dict:
         """
         message_control:
            - none
@@ -150,15 +185,13 @@ class PhantomAgentMessageSender(PhantomAgentBase):
             }
         }
 
-        return self._post(self.lanch_url, data)
+        return data
 
 
 
-    def get_data(self) -> str:
+    def parse_data(self, raw_data: Optional[dict]) -> str:
         """Return only status string for message sending task"""
-        result = self.raw_data
-        if not result:
-            result = self.get_raw_data()
+        result = raw_data
         if not result:
             return {"status": None}
         return result.get("status")
@@ -1,9 +1,11 @@
-from typing import List, Optional
+from typing import ClassVar, List, Optional, Tuple
+from pydantic import PrivateAttr
 from mcp_server.base_model.MarkdownModel import MarkdownModel
 
 
 class Thread(MarkdownModel):
     """LinkedIn message thread model"""
+    low_value_fields: ClassVar[Tuple[str, ...]] = ("timestamp",)
     thread_id: str
     participants: List[str]
     last_message: str
@@ -17,6 +19,7 @@ class Thread(MarkdownModel):
 
 class Message(MarkdownModel):
     """LinkedIn message model"""
+    low_value_fields: ClassVar[Tuple[str, ...]] = ("connection_degree",)
     date: str
     author: str
     message: str
@@ -25,6 +28,7 @@ class Message(MarkdownModel):
 
 class Job(MarkdownModel):
     """LinkedIn job experience model"""
+    low_value_fields: ClassVar[Tuple[str, ...]] = ("company_url", "started_since", "location")
     company_url: str
     company_name: str
     title: str
@@ -36,6 +40,7 @@ class Job(MarkdownModel):
 
 class Profile(MarkdownModel):
     """LinkedIn profile model"""
+    low_value_fields: ClassVar[Tuple[str, ...]] = ("raw_data", "linkedin_user_id", "linkedin_urn", "company_industry")
     linkedin_url: str
     first_name: str
     last_name: str
@@ -49,11 +54,20 @@ class Profile(MarkdownModel):
     company_industry: Optional[str] = None
     linkedin_user_id: Optional[str] = None
     linkedin_urn: Optional[str] = None
-    raw_data: Optional[dict] = None
+    raw_data: Optional[dict] = None  # scraper record, unless the server keeps it aside
+    raw_id: Optional[str] = None     # id of the scraper record kept aside, read it with get_raw_record
+
+
+class ProfileResult(MarkdownModel):
+    """Outcome of one URL in a batch profile scrape"""
+    url: str
+    profile: Optional[Profile] = None
+    error: Optional[str] = None
 
 
 class Activity(MarkdownModel):
     """LinkedIn activity/post model"""
+    low_value_fields: ClassVar[Tuple[str, ...]] = ("attached_url", "profile_url", "timestamp", "platform")
     url: Optional[str] = None
     attached_url: Optional[str] = None
     type: Optional[str] = None
@@ -70,6 +84,9 @@ class Activity(MarkdownModel):
 
 class Company(MarkdownModel):
     """LinkedIn company model"""
+    low_value_fields: ClassVar[Tuple[str, ...]] = (
+        "currency", "growth_2yr", "ld_id", "phone", "linkedin_sn", "geographic_area", "country", "city"
+    )
     name: str
     description: Optional[str] = None
     tag_line: Optional[str] = None
@@ -97,9 +114,43 @@ class Company(MarkdownModel):
 
 class Connection(MarkdownModel):
     """LinkedIn connection model"""
+    low_value_fields: ClassVar[Tuple[str, ...]] = ("first_name", "last_name", "date_connected")
     linkedin_url: str
     first_name: str
     last_name: str
     full_name: str
     job_title: Optional[str] = None
-    date_connected: Optional[str] = None 
\ No newline at end of file
+    date_connected: Optional[str] = None
+
+
+class ConnectionsPage(MarkdownModel):
+    """One page of a connections export"""
+    connections: List[Connection]
+    offset: int                        # position of the first connection in the export
+    next_cursor: Optional[str] = None  # pass to scrap_connections for the next page, None on the last one
+
+    # Export the page was read from, and the position in it of each connection
+    _export_id: Optional[str] = PrivateAttr(None)
+    _starts: List[int] = PrivateAttr(default_factory=list)
+
+    @classmethod
+    def from_export(cls, export_id: str, offset: int, connections: List[Connection], starts: List[int], next_pos: Optional[int]):
+        next_cursor = f"{export_id}:{offset + len(connections)}:{next_pos}" if next_pos is not None else None
+        page = cls(connections=connections, offset=offset, next_cursor=next_cursor)
+        page._export_id = export_id
+        page._starts = starts
+        return page
+
+    def head(self, field: str, count: int) -> "ConnectionsPage":
+        """Shorter page whose cursor resumes right after its last connection"""
+        page = super().head(field, count)
+        if field == "connections" and self._export_id is not None and count < len(self.connections):
+            page.next_cursor = f"{self._export_id}:{self.offset + count}:{self._starts[count]}"
+        return page
+
+
+class CompanyResult(MarkdownModel):
+    """Outcome of one URL in a batch company scrape"""
+    url: str
+    company: Optional[Company] = None
+    error: Optional[str] = None
@@ -0,0 +1,156 @@
+import json
+import os
+import random
+import threading
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+def _quantile(values: List[float], q: float) -> float:
+    """Quantile of an already sorted list"""
+    if not values:
+        return 0.0
+    pos = (len(values) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+class PollingSchedule:
+    """Decides when to poll a running container, per script_id
+
+    Learns the completion time distribution of each script from past runs:
+    - waits out the typical minimum (p10) before the first poll,
+    - polls often between p10 and p90, where most runs finish,
+    - backs off exponentially with jitter after p90,
+    - gives up after max(max_wait, 3 x slowest run seen).
+
+    Until a script has ``min_samples`` runs, polls every ``retry_delay`` seconds.
+
+    Args:
+        history_size: Completion times kept per script
+        min_samples: Runs needed before the learned schedule is used
+        min_interval: Shortest pause between two polls, seconds
+        max_interval: Longest pause between two polls, seconds
+        path: Optional JSON file to persist completion times between restarts
+    """
+
+    def __init__(
+            self,
+            history_size: int = 50,
+            min_samples: int = 3,
+            min_interval: float = 2,
+            max_interval: float = 60,
+            path: Optional[str] = None
+        ):
+        self.history_size = history_size
+        self.min_samples = min_samples
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._history: Dict[str, Deque[float]] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            for script_id, durations in data.items():
+                self._history[script_id] = deque(durations, maxlen=self.history_size)
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load polling stats from %s: %s", self.path, e)
+
+    def _save(self):
+        if not self.path:
+            return
+        data = {script_id: list(durations) for script_id, durations in self._history.items()}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning("Failed to save polling stats to %s: %s", self.path, e)
+
+    def record(self, script_id: str, duration: float):
+        """Remember how long a run of the script took, in seconds"""
+        with self._lock:
+            history = self._history.setdefault(script_id, deque(maxlen=self.history_size))
+            history.append(round(duration, 2))
+            self._save()
+
+    def stats(self, script_id: str) -> Optional[dict]:
+        """p10 / p50 / p90 / max completion time of the script, None without enough history"""
+        with self._lock:
+            durations = sorted(self._history.get(script_id, ()))
+        if len(durations) < self.min_samples:
+            return None
+        return {
+            "p10": _quantile(durations, 0.1),
+            "p50": _quantile(durations, 0.5),
+            "p90": _quantile(durations, 0.9),
+            "max": durations[-1]
+        }
+
+    @staticmethod
+    def _deadline(stats: Optional[dict], max_wait: float) -> float:
+        return max_wait if stats is None else max(max_wait, stats["max"] * 3)
+
+    def deadline(self, script_id: str, max_wait: float) -> float:
+        """Seconds after the launch at which a container of the script is considered lost"""
+        return self._deadline(self.stats(script_id), max_wait)
+
+    def next_delay(self, script_id: str, elapsed: float, retry_delay: float, max_wait: float) -> Optional[float]:
+        """Seconds to sleep before the next poll
+
+        Args:
+            script_id: Script of the running container
+            elapsed: Seconds since the container was launched
+            retry_delay: Poll interval used while the script has no history
+            max_wait: Minimum total time to wait before giving up
+
+        Returns:
+            Delay in seconds, or None when the container should be considered lost
+        """
+        stats = self.stats(script_id)
+        deadline = self._deadline(stats, max_wait)
+        if stats is None:
+            delay = retry_delay if elapsed >= self.min_interval else self.min_interval - elapsed
+        else:
+            near = max(self.min_interval, min(retry_delay, (stats["p90"] - stats["p10"]) / 6))
+            if elapsed < stats["p10"]:
+                delay = stats["p10"] - elapsed
+            elif elapsed < stats["p90"]:
+                delay = near
+            else:
+                # Each pause grows with the time already spent past p90, so polls
+                # are spaced geometrically; jitter keeps late containers from
+                # polling in lockstep
+                delay = min(self.max_interval, near + (elapsed - stats["p90"]) / 2)
+                delay = random.uniform(delay / 2, delay)
+
+        remaining = deadline - elapsed
+        if remaining <= 0:
+            return None
+        return max(0.0, min(delay, remaining))
+
+
+_default_schedule: Optional[PollingSchedule] = None
+_default_lock = threading.Lock()
+
+
+def get_default_schedule() -> PollingSchedule:
+    """Schedule used by agents that were not given one explicitly"""
+    global _default_schedule
+    with _default_lock:
+        if _default_schedule is None:
+            _default_schedule = PollingSchedule()
+        return _default_schedule
@@ -0,0 +1,265 @@
+import asyncio
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from mcp_server.phantombuster.transport import PhantomTransport, get_default_transport
+
+
+logger = logging.getLogger(__name__)
+
+POOL_NAME_TAG = "[pool]"
+
+
+class PhantomAgentPool:
+    """Reusable Phantombuster agents keyed by script_id
+
+    Agents are created lazily on first use and handed back to the pool after
+    each run, so a tool call costs one launch instead of save + launch + delete.
+    The total number of agents never exceeds ``max_agents`` (the org's
+    parallelism); when the cap is reached an idle agent of another script is
+    recycled, otherwise the caller waits for a free one.
+
+    The pool can be shared by threads and asyncio tasks at the same time.
+
+    Args:
+        max_agents: Maximum number of agents alive at once, across all scripts
+        acquire_timeout: Seconds to wait for a free agent before giving up
+        name_tag: Suffix added to pooled agent names, used to find leftovers
+        transport: Transport used to delete agents
+    """
+
+    def __init__(
+            self,
+            max_agents: int = 1,
+            acquire_timeout: float = 600,
+            name_tag: str = POOL_NAME_TAG,
+            transport: Optional[PhantomTransport] = None
+        ):
+        self.max_agents = max_agents
+        self.acquire_timeout = acquire_timeout
+        self.name_tag = name_tag
+        self.transport = transport or get_default_transport()
+
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._idle: Dict[Tuple[str, str], List[str]] = {}   # (api key, script_id) -> agent ids
+        self._busy: Dict[str, Tuple[str, str]] = {}         # agent id -> (api key, script_id)
+        self._creating = 0
+        self._closed = False
+
+    def _total(self) -> int:
+        return sum(len(ids) for ids in self._idle.values()) + len(self._busy) + self._creating
+
+    def _notify(self):
+        """Wake up sync and async waiters. Must be called with the lock held."""
+        self._cond.notify_all()
+        for loop, future in self._waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_resolve, future)
+        self._waiters.clear()
+
+    def _try_acquire(self, agent) -> Tuple[Optional[str], Optional[Tuple[str, Tuple[str, str]]], bool]:
+        """Non-blocking acquire. Must be called with the lock held.
+
+        Returns:
+            Tuple[agent_id, evicted, reserved]: an idle agent id to reuse, or
+            a reserved creation slot (with the id and key of an idle agent of
+            another script, or another org, to delete first), or neither when
+            the caller has to wait
+        """
+        key = (agent.credentials.phantombuster_key, agent.script_id)
+        ids = self._idle.get(key)
+        if ids:
+            agent_id = ids.pop()
+            self._busy[agent_id] = key
+            return agent_id, None, False
+
+        evicted = None
+        if self._total() >= self.max_agents:
+            for other_key, other_ids in self._idle.items():
+                if other_key != key and other_ids:
+                    evicted = (other_ids.pop(0), other_key)
+                    break
+
+        if evicted or self._total() < self.max_agents:
+            self._creating += 1
+            return None, evicted, True
+        return None, None, False
+
+    def _created(self, agent, created: bool):
+        with self._cond:
+            self._creating -= 1
+            if created:
+                self._busy[agent.agent_id] = (agent.credentials.phantombuster_key, agent.script_id)
+            self._notify()
+
+    def acquire(self, agent) -> bool:
+        """Attach a pooled agent id to ``agent``, creating one if needed
+
+        Returns:
+            True if the agent got an id, False on timeout or creation failure
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    return False
+                agent_id, evicted, reserved = self._try_acquire(agent)
+                if agent_id:
+                    agent.agent_id = agent_id
+                    return True
+                if reserved:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning("No free Phantombuster agent for script %s after %ss", agent.script_id, self.acquire_timeout)
+                    return False
+                self._cond.wait(remaining)
+
+        created = False
+        try:
+            if evicted:
+                # The evicted agent may belong to another org: delete it with its own key
+                evicted_id, other_key = evicted
+                self._delete(evicted_id, other_key[0])
+            created = agent.create(name=f"{agent.name} {self.name_tag}")
+        finally:
+            self._created(agent, created)
+        return created
+
+    async def acquire_async(self, agent) -> bool:
+        """Async version of acquire"""
+        loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    return False
+                agent_id, evicted, reserved = self._try_acquire(agent)
+                if agent_id:
+                    agent.agent_id = agent_id
+                    return True
+                if reserved:
+                    break
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("No free Phantombuster agent for script %s after %ss", agent.script_id, self.acquire_timeout)
+                return False
+            try:
+                await asyncio.wait_for(future, remaining)
+            except asyncio.TimeoutError:
+                pass
+
+        created = False
+        try:
+            if evicted:
+                evicted_id, other_key = evicted
+                await asyncio.to_thread(self._delete, evicted_id, other_key[0])
+            created = await agent.create_async(name=f"{agent.name} {self.name_tag}")
+        finally:
+            self._created(agent, created)
+        return created
+
+    def _checkin(self, agent, reuse: bool) -> Optional[Tuple[str, str]]:
+        """Mark the agent as free. Returns the key of an agent that must be deleted."""
+        with self._cond:
+            key = self._busy.pop(agent.agent_id, None)
+            if key is None:
+                return None
+            if reuse and not self._closed:
+                self._idle.setdefault(key, []).append(agent.agent_id)
+                self._notify()
+                return None
+            return key
+
+    def release(self, agent, reuse: bool = True):
+        """Return the agent to the pool, or delete it when it can't be reused
+        (e.g. its container may still be running)
+        """
+        key = self._checkin(agent, reuse)
+        if key:
+            self._delete(agent.agent_id, key[0])
+            with self._cond:
+                self._notify()
+
+    async def release_async(self, agent, reuse: bool = True):
+        """Async version of release"""
+        key = self._checkin(agent, reuse)
+        if key:
+            await asyncio.to_thread(self._delete, agent.agent_id, key[0])
+            with self._cond:
+                self._notify()
+
+    def _delete(self, agent_id: str, phantombuster_key: str) -> bool:
+        try:
+            response = self.transport.post(
+                "agents/delete",
+                json={"id": agent_id},
+                headers={
+                    "content-type": "application/json",
+                    "X-Phantombuster-Key": phantombuster_key
+                }
+            )
+            return response.ok
+        except Exception as e:
+            logger.warning("Failed to delete pooled agent %s: %s", agent_id, e)
+            return False
+
+    def purge_stale(self, phantombuster_key: str) -> int:
+        """Delete pooled agents left behind by a previous process
+
+        Returns:
+            Number of agents deleted
+        """
+        headers = {
+            "accept": "application/json",
+            "X-Phantombuster-Key": phantombuster_key
+        }
+        try:
+            response = self.transport.get("agents/fetch-all", headers=headers)
+            agents = response.json() if response.ok else []
+        except Exception as e:
+            logger.warning("Failed to list Phantombuster agents: %s", e)
+            return 0
+
+        with self._cond:
+            known = set(self._busy) | {agent_id for ids in self._idle.values() for agent_id in ids}
+
+        deleted = 0
+        for item in agents or []:
+            agent_id = str(item.get("id", ""))
+            if agent_id and agent_id not in known and str(item.get("name", "")).endswith(self.name_tag):
+                if self._delete(agent_id, phantombuster_key):
+                    deleted += 1
+        return deleted
+
+    def close(self):
+        """Delete every agent owned by the pool"""
+        with self._cond:
+            self._closed = True
+            pending = [(agent_id, key[0]) for key, ids in self._idle.items() for agent_id in ids]
+            pending += [(agent_id, key[0]) for agent_id, key in self._busy.items()]
+            self._idle.clear()
+            self._busy.clear()
+            self._notify()
+        for agent_id, phantombuster_key in pending:
+            self._delete(agent_id, phantombuster_key)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "max_agents": self.max_agents,
+                "idle": sum(len(ids) for ids in self._idle.values()),
+                "busy": len(self._busy),
+                "creating": self._creating
+            }
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
@@ -1,7 +1,72 @@
-import json
-from typing import List, Optional
+from typing import Dict, List, Optional
 from mcp_server.phantombuster.base import PhantomAgentBase, PhantomCredentials
-from mcp_server.phantombuster.models import Profile, Job
+from mcp_server.phantombuster.batch import PhantomAgentBatch
+from mcp_server.phantombuster.urls import canonical_url
+from mcp_server.phantombuster.results import load_result
+from mcp_server.phantombuster.mapping import FieldSpec, ModelMapping, split_list, to_str
+from mcp_server.phantombuster.models import Profile, Job, ProfileResult
+
+
+JOB_FIELDS = {
+    "company_url": FieldSpec("linkedinCompanyUrl", default=""),
+    "company_name": FieldSpec("companyName", default=""),
+    "title": FieldSpec("linkedinJobTitle", default=""),
+    "date_range": FieldSpec("dateRange", default=""),
+    "started_since": FieldSpec("startedSince", default=""),
+    "description": FieldSpec("linkedinJobDescription", default=""),
+    "location": FieldSpec("linkedinJobLocation", default=""),
+}
+PREVIOUS_JOB_FIELDS = {
+    "company_url": FieldSpec("linkedinPreviousCompanyUrl", default=""),
+    "company_name": FieldSpec("linkedinPreviousCompanyName", default=""),
+    "title": FieldSpec("linkedinPreviousJobTitle", default=""),
+    "date_range": FieldSpec("linkedinPreviousJobDateRange", default=""),
+    "started_since": FieldSpec("linkedinPreviousStartedSince", default=""),
+    "description": FieldSpec("linkedinPreviousJobDescription", default=""),
+    "location": FieldSpec("linkedinPreviousJobLocation", default=""),
+}
+JOB_MAPPING = ModelMapping(Job, JOB_FIELDS)
+PREVIOUS_JOB_MAPPING = ModelMapping(Job, PREVIOUS_JOB_FIELDS)
+
+# LinkedIn Profile Scraper record -> Profile
+PROFILE_MAPPING = ModelMapping(Profile, {
+    "linkedin_url": FieldSpec("linkedinProfileUrl", default=""),
+    "first_name": FieldSpec("firstName", default=""),
+    "last_name": FieldSpec("lastName", default=""),
+    "headline": FieldSpec("linkedinHeadline", default=""),
+    "location": FieldSpec("location", default=""),
+    "company": FieldSpec("companyName", default=""),
+    "job_title": FieldSpec("linkedinJobTitle", default=""),
+    "about": FieldSpec("linkedinDescription", default=""),
+    "skills": FieldSpec("linkedinSkillsLabel", default=[], coerce=split_list),
+    # Current and previous job
+    "jobs": FieldSpec(compute=lambda record: [JOB_MAPPING.one(record), PREVIOUS_JOB_MAPPING.one(record)]),
+    "company_industry": FieldSpec("companyIndustry", coerce=to_str),
+    "linkedin_user_id": FieldSpec("linkedinProfileId", coerce=to_str),
+    "linkedin_urn": FieldSpec("linkedinProfileUrn", coerce=to_str),
+    "raw_data": FieldSpec(compute=lambda record: record),
+})
+
+# Sales Navigator Search Export record -> Profile (no skills nor job details)
+SALES_NAV_PROFILE_MAPPING = ModelMapping(Profile, {
+    "linkedin_url": FieldSpec("defaultProfileUrl", default=""),
+    "first_name": FieldSpec("firstName", default=""),
+    "last_name": FieldSpec("lastName", default=""),
+    "headline": FieldSpec("title", default=""),
+    "location": FieldSpec("location", default=""),
+    "company": FieldSpec("companyName", default=""),
+    "job_title": FieldSpec("title", default=""),
+    "about": FieldSpec("summary", "titleDescription", default=""),
+    "skills": FieldSpec(compute=lambda record: []),
+    "jobs": FieldSpec(compute=lambda record: []),
+    "raw_data": FieldSpec(compute=lambda record: record),
+})
+
+
+def profile_from_record(value: dict) -> Profile:
+    """Convert one LinkedIn Profile Scraper record into a Profile"""
+    return PROFILE_MAPPING.one(value)
+
 
 class PhantomAgentProfile(PhantomAgentBase):
     def __init__(
@@ -9,16 +74,17 @@ class PhantomAgentProfile(PhantomAgentBase):
             credentials: PhantomCredentials, 
             agent_id: Optional[str] = None, 
             max_retries: int = 20, 
-            retry_delay: int = 10
+            retry_delay: int = 10,
+            **kwargs
         ):
 
-        super().__init__(credentials, agent_id, max_retries, retry_delay)
+        super().__init__(credentials, agent_id, max_retries, retry_delay, **kwargs)
         self.script_id = "3112"
         self.script = "LinkedIn Profile Scraper.js"
         self.name = "LinkedIn Profile Scraper (API)"
 
-    def run(self, linkedin_url: str) -> bool:
-        """Start phantom task to scrape profile"""
+    def build_launch(self, linkedin_url: str) -> dict:
+        """Build launch payload to scrape profile"""
         data = {
             "id": self.agent_id,
             "argument": {
@@ -32,20 +98,20 @@ class PhantomAgentProfile(PhantomAgentBase):
                 "saveImg": False
             }
         }
-        return self._post(self.lanch_url, data)
+        return data
 
-    def get_data(self, filter_field: Optional[str] = None, filter_value: Optional[str] = None) -> Optional[Profile]:
+    def parse_data(self, raw_data: Optional[dict], filter_field: Optional[str] = None, filter_value: Optional[str] = None) -> Optional[Profile]:
         """Get processed profile data from phantom task
         
         Args:
+            raw_data: containers/fetch response
             filter_field: Optional field name to filter results by
             filter_value: Optional value that the field should match
             
         Returns:
             Profile object if data is found and matches filter criteria, None otherwise
         """
-        result = self.get_raw_data()
-        result_obj = json.loads(result.get("resultObject"))
+        result_obj = load_result(raw_data)
         if result_obj:
             for value in result_obj:
                 # Apply filtering if specified
@@ -54,52 +120,53 @@ class PhantomAgentProfile(PhantomAgentBase):
                     if field_value != filter_value:
                         continue
 
-                # Process jobs
-                jobs = []
-                # Current job
-                jobs.append(Job(
-                    company_url=value.get("linkedinCompanyUrl", ""),
-                    company_name=value.get("companyName", ""),
-                    title=value.get("linkedinJobTitle", ""),
-                    date_range=value.get("dateRange", ""),
-                    started_since=value.get("startedSince", ""),
-                    description=value.get("linkedinJobDescription", ""), 
-                    location=value.get("linkedinJobLocation", "")
-                ))
-                # Previous job
-                jobs.append(Job(
-                    company_url=value.get("linkedinPreviousCompanyUrl", ""),
-                    company_name=value.get("linkedinPreviousCompanyName", ""),
-                    title=value.get("linkedinPreviousJobTitle", ""),
-                    date_range=value.get("linkedinPreviousJobDateRange", ""),
-                    started_since=value.get("linkedinPreviousStartedSince", ""),
-                    description=value.get("linkedinPreviousJobDescription", ""), 
-                    location=value.get("linkedinPreviousJobLocation", "")
-                ))
-
-                # Convert skills from string to list if needed
-                skills = value.get("linkedinSkillsLabel", [])
-                if isinstance(skills, str):
-                    skills = [skill.strip() for skill in skills.split(',')]
-
-                return Profile(
-                    linkedin_url=value.get("linkedinProfileUrl", ""),
-                    first_name=value.get("firstName", ""),
-                    last_name=value.get("lastName", ""),
-                    headline=value.get("linkedinHeadline", ""),
-                    location=value.get("location", ""),
-                    company=value.get("companyName", ""),
-                    job_title=value.get("linkedinJobTitle", ""),
-                    about=value.get("linkedinDescription", ""),
-                    skills=skills,
-                    jobs=jobs,
-                    company_industry=value.get('companyIndustry'),
-                    linkedin_user_id=value.get('linkedinProfileId'),
-                    linkedin_urn=value.get('linkedinProfileUrn'),
-                    raw_data=value
-                )
+                return self.keep_raw(profile_from_record(value), value)
         return None
 
+
+class PhantomAgentProfileBatch(PhantomAgentBatch, PhantomAgentProfile):
+    """Scrapes many profiles in one launch and maps results back to the requested URLs"""
+
+    result_model = ProfileResult
+
+    def build_launch(self, linkedin_urls: List[str]) -> dict:
+        """Build launch payload to scrape several profiles at once"""
+        data = super().build_launch(self.set_requested_urls(linkedin_urls)[0])
+        argument = data["argument"]
+        if len(self.requested_urls) > 1:
+            del argument["spreadsheetUrl"]
+            argument["profileUrls"] = self.requested_urls
+        argument["numberOfAddsPerLaunch"] = len(self.requested_urls)
+        self.max_wait = max(self.max_wait, 60 * len(self.requested_urls))
+        return data
+
+    def parse_data(self, raw_data: Optional[dict]) -> List[ProfileResult]:
+        """Get one ProfileResult per requested URL, in request order
+
+        Records are matched on the ``query`` the scraper echoes back, then on
+        the profile URL. URLs without a record, or whose record carries an
+        ``error``, are marked as failed.
+        """
+        by_key: Dict[str, dict] = {}
+        result_obj = load_result(raw_data)
+        for value in result_obj or []:
+            for field in ("query", "linkedinProfileUrl", "profileUrl"):
+                key = canonical_url(value.get(field))
+                if key and key not in by_key:
+                    by_key[key] = value
+
+        results = []
+        for url in self.requested_urls:
+            value = by_key.get(canonical_url(url))
+            if value is None:
+                results.append(ProfileResult(url=url, error="No result returned for this URL"))
+            elif value.get("error") and not value.get("linkedinProfileUrl"):
+                results.append(ProfileResult(url=url, error=str(value.get("error"))))
+            else:
+                results.append(ProfileResult(url=url, profile=self.keep_raw(profile_from_record(value), value)))
+        return results
+
+
 class PhantomAgentSalesNavigatorProfile(PhantomAgentBase):
     def __init__(
             self, 
@@ -107,17 +174,19 @@ class PhantomAgentSalesNavigatorProfile(PhantomAgentBase):
             agent_id: Optional[str] = None, 
             max_retries: int = 20, 
             retry_delay: int = 10, 
-            nb_result: int = 20
+            nb_result: int = 20,
+            **kwargs
         ):
 
-        super().__init__(credentials, agent_id, max_retries, retry_delay)
+        super().__init__(credentials, agent_id, max_retries, retry_delay, **kwargs)
         self.script_id = "6988"
         self.script = "Sales Navigator Search Export.js"
         self.name = "Sales Navigator Search Export (API)"
+        self.max_wait = max(self.max_wait, 1800)  # large exports run for many minutes
         self.nb_result = nb_result
 
-    def run(self, search_url: str) -> bool:
-        """Start phantom task to search profiles in Sales Navigator
+    def build_launch(self, search_url: str) -> dict:
+        """Build launch payload to search profiles in Sales Navigator
         Args:
             search_url: Sales Navigator search URL
         """
@@ -134,28 +203,10 @@ class PhantomAgentSalesNavigatorProfile(PhantomAgentBase):
                 "numberOfResultsPerSearch": self.nb_result
             }
         }
-        return self._post(self.lanch_url, data)
+        return data
 
-    def get_data(self) -> List[Profile]:
+    def parse_data(self, raw_data: Optional[dict]) -> List[Profile]:
         """Get processed profiles from phantom task"""
-        profiles = []
-        result = self.get_raw_data()
-        result_obj = json.loads(result.get("resultObject"))
-        if result_obj:
-            for value in result_obj:
-                if value.get('defaultProfileUrl'):
-                    profile = Profile(
-                        linkedin_url=value.get('defaultProfileUrl', ""),
-                        first_name=value.get('firstName', ""),
-                        last_name=value.get('lastName', ""),
-                        headline=value.get('title', ""),  # Using title as headline
-                        location=value.get('location', ""),
-                        company=value.get('companyName', ""),
-                        job_title=value.get('title', ""),
-                        about=value.get('summary', "") or value.get('titleDescription', ""),
-                        skills=[],  # Sales Navigator search doesn't provide skills
-                        jobs=[],  # Sales Navigator search doesn't provide detailed job info
-                        raw_data=value
-                    )
-                    profiles.append(profile)
-        return profiles 
\ No newline at end of file
+        result_obj = [value for value in load_result(raw_data) or [] if value.get('defaultProfileUrl')]
+        profiles = SALES_NAV_PROFILE_MAPPING.many(result_obj)
+        return [self.keep_raw(profile, value) for profile, value in zip(profiles, result_obj)] 
\ No newline at end of file
@@ -0,0 +1,220 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from mcp_server.phantombuster.results import load_json
+from mcp_server.phantombuster.scheduler import fingerprint
+from mcp_server.phantombuster.transport import (
+    PhantomTransport,
+    AsyncPhantomTransport,
+    get_default_transport,
+    get_default_async_transport
+)
+from mcp_server.storage.usage_store import UsageStore
+
+
+logger = logging.getLogger(__name__)
+
+# Priorities of launches: low ones are refused first, once the soft limit is reached
+PRIORITIES = ("low", "normal")
+
+RESOURCES_URL = "orgs/fetch-resources"
+
+
+def parse_execution_time(resources) -> Optional[Tuple[float, float]]:
+    """(used, quota) of the monthly execution time in an orgs/fetch-resources response"""
+    if not isinstance(resources, dict):
+        return None
+    entry = resources.get("executionTime")
+    if not isinstance(entry, dict):
+        return None
+    used = entry.get("current", entry.get("used"))
+    quota = entry.get("max", entry.get("limit"))
+    if not isinstance(used, (int, float)) or not isinstance(quota, (int, float)) or quota <= 0:
+        return None
+    return float(used), float(quota)
+
+
+def month_start(now: Optional[float] = None) -> float:
+    """Timestamp of the first day of the current month (UTC)"""
+    today = datetime.fromtimestamp(now or time.time(), tz=timezone.utc)
+    return today.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+class QuotaGuard:
+    """Execution time accounting and budget limits for phantom launches
+
+    Every container an agent ran is recorded in ``store`` with its duration
+    and the tool, caller and priority of the call that launched it. Before a
+    launch, the share of the monthly budget already used is checked:
+
+    - at ``soft_limit`` low priority launches (background jobs) are refused,
+      so they can be retried later, while interactive calls still run
+    - at ``hard_limit`` every launch is refused
+
+    The share used is the org's execution time quota as reported by
+    Phantombuster (read again every ``refresh_interval`` seconds, and ignored
+    once older than ``max_quota_age`` or read in a previous month), or, when
+    ``monthly_seconds`` is set, the execution time recorded locally this month
+    against it, whichever is higher. With neither, nothing is refused.
+
+    Args:
+        store: Where usage and the last quota read are kept
+        soft_limit: Share of the budget after which low priority launches are refused
+        hard_limit: Share of the budget after which every launch is refused
+        monthly_seconds: Local execution time budget per calendar month
+        refresh_interval: Seconds between two reads of the org's quota
+        max_quota_age: Seconds after which a quota read is too old to rely on,
+            3 refresh intervals by default
+        transport: Blocking transport used to read the quota
+        async_transport: Async transport used to read the quota
+    """
+
+    def __init__(
+            self,
+            store: UsageStore,
+            soft_limit: float = 0.8,
+            hard_limit: float = 0.95,
+            monthly_seconds: Optional[float] = None,
+            refresh_interval: float = 300,
+            max_quota_age: Optional[float] = None,
+            transport: Optional[PhantomTransport] = None,
+            async_transport: Optional[AsyncPhantomTransport] = None
+        ):
+        if not 0 < soft_limit <= hard_limit:
+            raise ValueError(f"Expected 0 < soft_limit <= hard_limit, got {soft_limit} and {hard_limit}")
+        self.store = store
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.monthly_seconds = monthly_seconds
+        self.refresh_interval = refresh_interval
+        self.max_quota_age = max_quota_age if max_quota_age is not None else 3 * refresh_interval
+        self._transport = transport
+        self._async_transport = async_transport
+        self._checked_at = {}  # org -> monotonic time of the last quota read attempt
+        self.refused = {"soft": 0, "hard": 0}
+
+    @property
+    def transport(self) -> PhantomTransport:
+        if self._transport is None:
+            self._transport = get_default_transport()
+        return self._transport
+
+    @property
+    def async_transport(self) -> AsyncPhantomTransport:
+        if self._async_transport is None:
+            self._async_transport = get_default_async_transport()
+        return self._async_transport
+
+    def _due(self, org: str) -> bool:
+        checked_at = self._checked_at.get(org)
+        if checked_at is not None and time.monotonic() - checked_at < self.refresh_interval:
+            return False
+        self._checked_at[org] = time.monotonic()
+        return True
+
+    def _store_quota(self, org: str, response) -> None:
+        status = getattr(response, "status_code", None)
+        if status != 200:
+            logger.debug("%s returned %s", RESOURCES_URL, status)
+            return
+        execution_time = parse_execution_time(load_json(response.content))
+        if execution_time is None:
+            logger.debug("No execution time in %s response", RESOURCES_URL)
+            return
+        self.store.set_quota(org, *execution_time)
+
+    def refresh(self, credentials):
+        """Read the org's quota from Phantombuster, at most every refresh_interval"""
+        org = fingerprint(credentials.phantombuster_key)
+        if not self._due(org):
+            return
+        try:
+            response = self.transport.get(RESOURCES_URL, headers={
+                "accept": "application/json",
+                "X-Phantombuster-Key": credentials.phantombuster_key
+            })
+            self._store_quota(org, response)
+        except Exception as e:
+            logger.warning("Failed to read the Phantombuster quota: %s", e)
+
+    async def refresh_async(self, credentials):
+        """Async version of refresh"""
+        org = fingerprint(credentials.phantombuster_key)
+        if not self._due(org):
+            return
+        try:
+            response = await self.async_transport.get(RESOURCES_URL, headers={
+                "accept": "application/json",
+                "X-Phantombuster-Key": credentials.phantombuster_key
+            })
+            self._store_quota(org, response)
+        except Exception as e:
+            logger.warning("Failed to read the Phantombuster quota: %s", e)
+
+    def usage(self, credentials) -> dict:
+        """Share of the budget used, and where it comes from"""
+        org = fingerprint(credentials.phantombuster_key)
+        usage = {"org": org, "used_share": None}
+        since = month_start()
+        quota = self.store.quota(org)
+        if quota is not None:
+            used, total, fetched_at = quota
+            stale = fetched_at < since or time.time() - fetched_at > self.max_quota_age
+            usage["org_quota"] = {"used": used, "quota": total, "fetched_at": fetched_at, "stale": stale}
+            if not stale:
+                usage["used_share"] = used / total
+        if self.monthly_seconds:
+            seconds = self.store.seconds_since(org, since)
+            usage["local_budget"] = {"seconds": round(seconds, 1), "monthly_seconds": self.monthly_seconds}
+            usage["used_share"] = max(usage["used_share"] or 0, seconds / self.monthly_seconds)
+        return usage
+
+    def _refusal(self, credentials, priority: str) -> Optional[str]:
+        share = self.usage(credentials)["used_share"]
+        if share is None:
+            return None
+        if share >= self.hard_limit:
+            self.refused["hard"] += 1
+            return f"Execution time budget exhausted: {share:.0%} used (hard limit {self.hard_limit:.0%})"
+        if share >= self.soft_limit and priority == "low":
+            self.refused["soft"] += 1
+            return (
+                f"Low priority launch deferred: {share:.0%} of the execution time budget used "
+                f"(soft limit {self.soft_limit:.0%}), run it directly or retry later"
+            )
+        return None
+
+    def check(self, credentials, priority: str = "normal") -> Optional[str]:
+        """Why a launch of this priority is refused, None if it may go ahead"""
+        self.refresh(credentials)
+        return self._refusal(credentials, priority)
+
+    async def check_async(self, credentials, priority: str = "normal") -> Optional[str]:
+        """Async version of check"""
+        await self.refresh_async(credentials)
+        return self._refusal(credentials, priority)
+
+    def record(self, agent, seconds: float, measured: bool, outcome: str):
+        """Record the container an agent ran"""
+        tags = agent.tags
+        self.store.record(
+            container_id=agent.container_id,
+            org=fingerprint(agent.credentials.phantombuster_key),
+            script=agent.metrics_script,
+            seconds=seconds,
+            measured=measured,
+            outcome=outcome,
+            tool=tags.get("tool", "unknown"),
+            caller=tags.get("caller", "unknown"),
+            priority=tags.get("priority", "normal")
+        )
+
+    def stats(self) -> dict:
+        return {
+            "soft_limit": self.soft_limit,
+            "hard_limit": self.hard_limit,
+            "monthly_seconds": self.monthly_seconds,
+            "refused": dict(self.refused)
+        }
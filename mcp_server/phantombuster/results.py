@@ -0,0 +1,29 @@
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional speed-up, the standard json module is used without it
+    orjson = None
+
+
+def load_json(data: Union[str, bytes, bytearray]) -> Any:
+    """Decode JSON with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_result(raw_data: Optional[dict]) -> Any:
+    """Decoded result of a containers/fetch response, None when there is none
+
+    The result object is a JSON string nested in the response (or the text of
+    the agent's result file), decoded here in one pass.
+    """
+    result = raw_data.get("resultObject") if raw_data else None
+    if not result:
+        return None
+    if isinstance(result, (str, bytes, bytearray)):
+        return load_json(result)
+    return result
+
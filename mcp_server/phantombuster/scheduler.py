@@ -0,0 +1,238 @@
+import asyncio
+import hashlib
+import itertools
+import threading
+import time
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from mcp_server.phantombuster.pool import _resolve
+
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(secret: str) -> str:
+    """Short stable label for an API key or session cookie, safe to log"""
+    return hashlib.sha256(secret.encode()).hexdigest()[:8]
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, at most ``burst`` saved up"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available, 0 if one is available now"""
+        self._refill(now)
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class LaunchTicket:
+    """Admission of one container launch, held until the container has finished"""
+
+    def __init__(self, seq: int, org: str, session: str):
+        self.seq = seq
+        self.org = org
+        self.session = session
+        self.enqueued_at = time.monotonic()
+        self.admitted_at: Optional[float] = None
+        self.released = False
+
+    @property
+    def queued_for(self) -> float:
+        """Seconds spent waiting in the queue"""
+        return (self.admitted_at or time.monotonic()) - self.enqueued_at
+
+
+class LaunchScheduler:
+    """Admits container launches for every agent of the process
+
+    Launches wait in one FIFO queue and are admitted when:
+    - the Phantombuster org (API key) runs fewer than ``max_containers`` containers,
+    - the LinkedIn session (li_at cookie) has a launch token left; tokens refill
+      at ``launches_per_minute`` with up to ``burst`` launches in a row.
+
+    Order is kept per credential: a launch never overtakes an earlier one of
+    the same org or session, but a blocked account does not hold up another one.
+
+    The scheduler can be shared by threads and asyncio tasks at the same time.
+
+    Args:
+        max_containers: Containers running at once per org, match the plan's parallelism
+        launches_per_minute: Sustained launch rate per LinkedIn session
+        burst: Launches allowed back to back before the rate applies
+        acquire_timeout: Seconds to wait in the queue before giving up
+    """
+
+    def __init__(
+            self,
+            max_containers: int = 1,
+            launches_per_minute: float = 6,
+            burst: int = 3,
+            acquire_timeout: float = 1800
+        ):
+        self.max_containers = max_containers
+        self.launches_per_minute = launches_per_minute
+        self.burst = burst
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._queue: Deque[LaunchTicket] = deque()
+        self._running: Dict[str, int] = {}           # org -> running containers
+        self._buckets: Dict[str, TokenBucket] = {}   # session -> launch tokens
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.timed_out = 0
+
+    def _notify(self):
+        """Wake up sync and async waiters. Must be called with the lock held."""
+        self._cond.notify_all()
+        for loop, future in self._waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_resolve, future)
+        self._waiters.clear()
+
+    def _bucket(self, session: str) -> TokenBucket:
+        bucket = self._buckets.get(session)
+        if bucket is None:
+            bucket = self._buckets[session] = TokenBucket(self.launches_per_minute / 60, self.burst)
+        return bucket
+
+    def _enqueue(self, credentials) -> LaunchTicket:
+        with self._cond:
+            ticket = LaunchTicket(next(self._seq), credentials.phantombuster_key, credentials.session_cookie)
+            self._queue.append(ticket)
+            return ticket
+
+    def _try_admit(self, ticket: LaunchTicket) -> Optional[float]:
+        """Admit the ticket if it can launch now. Must be called with the lock held.
+
+        Returns:
+            0 when admitted, otherwise seconds until a launch token frees up, or
+            None when the ticket waits for a container to finish or an earlier launch
+        """
+        for earlier in self._queue:
+            if earlier is ticket:
+                break
+            if earlier.org == ticket.org or earlier.session == ticket.session:
+                return None
+
+        if self._running.get(ticket.org, 0) >= self.max_containers:
+            return None
+        now = time.monotonic()
+        bucket = self._bucket(ticket.session)
+        wait = bucket.wait_time(now)
+        if wait > 0:
+            return wait
+
+        bucket.take(now)
+        self._queue.remove(ticket)
+        self._running[ticket.org] = self._running.get(ticket.org, 0) + 1
+        ticket.admitted_at = now
+        self.admitted += 1
+        # The next ticket of the queue may be admissible now
+        self._notify()
+        return 0
+
+    def _give_up(self, ticket: LaunchTicket):
+        with self._cond:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+                self._notify()
+
+    def acquire(self, credentials) -> Optional[LaunchTicket]:
+        """Wait for a launch slot for these credentials
+
+        Returns:
+            The ticket to release once the container has finished, None on timeout
+        """
+        ticket = self._enqueue(credentials)
+        deadline = ticket.enqueued_at + self.acquire_timeout
+        try:
+            with self._cond:
+                while True:
+                    wait = self._try_admit(ticket)
+                    if wait == 0:
+                        return ticket
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        logger.warning("No launch slot for org %s after %ss", fingerprint(ticket.org), self.acquire_timeout)
+                        return None
+                    self._cond.wait(min(remaining, wait) if wait else remaining)
+        finally:
+            if ticket.admitted_at is None:
+                self._give_up(ticket)
+
+    async def acquire_async(self, credentials) -> Optional[LaunchTicket]:
+        """Async version of acquire"""
+        loop = asyncio.get_running_loop()
+        ticket = self._enqueue(credentials)
+        deadline = ticket.enqueued_at + self.acquire_timeout
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(ticket)
+                    if wait == 0:
+                        return ticket
+                    future = loop.create_future()
+                    self._waiters.append((loop, future))
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timed_out += 1
+                    logger.warning("No launch slot for org %s after %ss", fingerprint(ticket.org), self.acquire_timeout)
+                    return None
+                try:
+                    await asyncio.wait_for(future, min(remaining, wait) if wait else remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            # Also covers cancellation while queued
+            if ticket.admitted_at is None:
+                self._give_up(ticket)
+
+    def release(self, ticket: Optional[LaunchTicket]):
+        """Free the container slot of an admitted ticket. Safe to call twice."""
+        if ticket is None:
+            return
+        with self._cond:
+            if ticket.released or ticket.admitted_at is None:
+                return
+            ticket.released = True
+            self._running[ticket.org] -= 1
+            self._notify()
+
+    def stats(self) -> dict:
+        """Queue depth, running containers per org and launch tokens left per session"""
+        with self._cond:
+            now = time.monotonic()
+            oldest = self._queue[0].enqueued_at if self._queue else None
+            return {
+                "queued": len(self._queue),
+                "oldest_wait": round(now - oldest, 1) if oldest else 0,
+                "running": {fingerprint(org): count for org, count in self._running.items() if count},
+                "tokens": {
+                    fingerprint(session): round(min(bucket.burst, bucket.tokens + (now - bucket.updated_at) * bucket.rate), 2)
+                    for session, bucket in self._buckets.items()
+                },
+                "admitted": self.admitted,
+                "timed_out": self.timed_out
+            }
@@ -0,0 +1,45 @@
+import json
+import re
+from typing import Any, Iterator, Tuple
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r"\s*")
+_SEPARATOR = re.compile(r"[\s,]*")
+
+
+def iter_json_array(text: str, pos: int = 0) -> Iterator[Tuple[Any, int]]:
+    """Decode the items of a JSON array one at a time
+
+    Only the current item is materialised, so a caller can stop early or page
+    through a huge array without building the whole list.
+
+    Args:
+        text: JSON text of an array
+        pos: 0 to start at the beginning, or an offset returned by a previous
+            iteration to resume right after that item
+
+    Yields:
+        Tuple[item, end]: the decoded item and the offset just after it
+
+    Raises:
+        ValueError: the text is not an array, or ``pos`` is not right after an item
+    """
+    if pos < 0 or pos > len(text):
+        raise ValueError(f"Position {pos} is outside the text")
+    if pos > 0:
+        # Index the text rather than slicing it: a slice copies the rest of the export
+        end = _WHITESPACE.match(text, pos).end()
+        if text[end:end + 1] not in (",", "]"):
+            raise ValueError(f"Position {pos} is not right after an item")
+    else:
+        pos = _WHITESPACE.match(text, 0).end()
+        if text[pos:pos + 1] != "[":
+            raise ValueError("Expected a JSON array")
+        pos += 1
+    while True:
+        pos = _SEPARATOR.match(text, pos).end()
+        if pos >= len(text) or text[pos] == "]":
+            return
+        item, pos = _decoder.raw_decode(text, pos)
+        yield item, pos
@@ -0,0 +1,184 @@
+import threading
+import time
+from typing import Optional
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from mcp_server.metrics import MetricsRegistry, get_default_registry
+
+
+API_URL = "https://api.phantombuster.com/api/v2/"
+
+
+def endpoint_label(path: str) -> str:
+    """API path (e.g. "containers/fetch"), or the host of an absolute URL (result files)"""
+    if "://" in path:
+        return urlparse(path).netloc
+    return path.split("?", 1)[0]
+
+
+def record_request(metrics: MetricsRegistry, path: str, status, started: float):
+    endpoint = endpoint_label(path)
+    metrics.inc("phantom_api_requests_total", endpoint=endpoint, status=status)
+    metrics.observe("phantom_api_request_seconds", time.monotonic() - started, endpoint=endpoint)
+
+
+class TransportBusyError(requests.exceptions.ConnectionError):
+    """Raised when no connection slot frees up within the pool timeout"""
+
+
+class PhantomTransport:
+    """Shared HTTP transport for the Phantombuster API
+
+    Keeps a pooled keep-alive session, so polling and launches reuse the same
+    TLS connections instead of opening a new one per request.
+
+    Args:
+        base_url: API root, relative paths are resolved against it
+        max_connections: Cap on concurrent requests (and pooled connections)
+        connect_timeout: Seconds to establish a connection
+        read_timeout: Seconds to wait for the response
+        pool_timeout: Seconds to wait for a free connection slot
+        metrics: Where request counts and durations are recorded
+    """
+
+    def __init__(
+            self,
+            base_url: str = API_URL,
+            max_connections: int = 10,
+            connect_timeout: float = 5,
+            read_timeout: float = 30,
+            pool_timeout: float = 30,
+            metrics: Optional[MetricsRegistry] = None
+        ):
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.max_connections = max_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_timeout = pool_timeout
+        self.metrics = metrics or get_default_registry()
+
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_connections,
+            max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def url(self, path: str) -> str:
+        """Resolve an API path (e.g. "agents/launch") to a full URL"""
+        return urljoin(self.base_url, path)
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", (self.connect_timeout, self.read_timeout))
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            raise TransportBusyError(f"No free connection to {self.base_url} after {self.pool_timeout}s")
+        started = time.monotonic()
+        status = "error"
+        try:
+            response = self.session.request(method, self.url(path), **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            self._slots.release()
+            record_request(self.metrics, path, status, started)
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncPhantomTransport:
+    """Asyncio counterpart of PhantomTransport, built on httpx
+
+    One client is safe to share between concurrent tasks of the same event
+    loop; requests beyond ``max_connections`` wait for a free connection up to
+    ``pool_timeout`` seconds.
+    """
+
+    def __init__(
+            self,
+            base_url: str = API_URL,
+            max_connections: int = 10,
+            connect_timeout: float = 5,
+            read_timeout: float = 30,
+            pool_timeout: float = 30,
+            metrics: Optional[MetricsRegistry] = None
+        ):
+        import httpx
+
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.max_connections = max_connections
+        self.metrics = metrics or get_default_registry()
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(connect=connect_timeout, read=read_timeout, write=read_timeout, pool=pool_timeout)
+        )
+
+    def url(self, path: str) -> str:
+        return urljoin(self.base_url, path)
+
+    async def request(self, method: str, path: str, **kwargs):
+        started = time.monotonic()
+        status = "error"
+        try:
+            response = await self.client.request(method, self.url(path), **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            record_request(self.metrics, path, status, started)
+
+    async def get(self, path: str, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+    async def close(self):
+        await self.client.aclose()
+
+
+_default_transport: Optional[PhantomTransport] = None
+_default_async_transport: Optional[AsyncPhantomTransport] = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport() -> PhantomTransport:
+    """Transport used by agents that were not given one explicitly"""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = PhantomTransport()
+        return _default_transport
+
+
+def set_default_transport(transport: PhantomTransport):
+    global _default_transport
+    with _default_lock:
+        _default_transport = transport
+
+
+def get_default_async_transport() -> AsyncPhantomTransport:
+    """Async transport used by agents that were not given one explicitly"""
+    global _default_async_transport
+    with _default_lock:
+        if _default_async_transport is None:
+            _default_async_transport = AsyncPhantomTransport()
+        return _default_async_transport
+
+
+def set_default_async_transport(transport: AsyncPhantomTransport):
+    global _default_async_transport
+    with _default_lock:
+        _default_async_transport = transport
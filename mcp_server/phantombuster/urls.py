@@ -0,0 +1,125 @@
+import re
+from typing import Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+
+LINKEDIN_HOST = "www.linkedin.com"
+
+# /in/<slug>, /company/<slug>, ... : first path segment -> kind
+ENTITY_PREFIXES = {
+    "in": "profile",
+    "pub": "profile",
+    "company": "company",
+    "school": "company",
+    "showcase": "company",
+}
+
+URN_RE = re.compile(r"^urn:li:(?:fsd_profile|fs_profile|member|person):([^,()\s]+)$", re.IGNORECASE)
+COMPANY_URN_RE = re.compile(r"^urn:li:(?:fsd_company|fs_company|company|organization):(\d+)$", re.IGNORECASE)
+# Profile ids LinkedIn uses in place of a vanity slug (/in/ACoAAB...)
+MEMBER_ID_RE = re.compile(r"^ac[a-z0-9_-]{20,}$", re.IGNORECASE)
+
+
+def _split(url: str) -> Tuple[str, list]:
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url.lstrip("/")
+    parts = urlsplit(url)
+    host = parts.netloc.lower().split(":")[0]
+    segments = [unquote(segment) for segment in parts.path.split("/") if segment]
+    return host, segments
+
+
+def is_linkedin_url(url: Optional[str]) -> bool:
+    if not url:
+        return False
+    host, _ = _split(url)
+    return host == "linkedin.com" or host.endswith(".linkedin.com")
+
+
+def canonical_url(url: Optional[str]) -> str:
+    """Canonical form of a LinkedIn URL
+
+    - https://www.linkedin.com host (no locale or mobile subdomain)
+    - lowercase slug, no query string, fragment or sub-page (/details/..., /about/)
+    - trailing slash
+    - profile and company URNs become /in/<id>/ and /company/<id>/
+    - legacy /pub/<name>/<a>/<b>/<c> profile URLs become /in/<name>-<a>-<b>-<c>/
+
+    Profile URNs and /pub/ URLs give identity keys, not pages that exist on
+    LinkedIn: use scrape_url for what to hand a scraper.
+
+    Sales Navigator, messaging and post URLs keep their path, minus query and
+    fragment. Anything that is not a LinkedIn URL is only trimmed.
+    """
+    if not url:
+        return ""
+    url = url.strip()
+
+    match = URN_RE.match(url)
+    if match:
+        return f"https://{LINKEDIN_HOST}/in/{match.group(1)}/"
+    match = COMPANY_URN_RE.match(url)
+    if match:
+        return f"https://{LINKEDIN_HOST}/company/{match.group(1)}/"
+
+    if not is_linkedin_url(url):
+        return url
+
+    _, segments = _split(url)
+    if len(segments) >= 2 and segments[0].lower() in ENTITY_PREFIXES:
+        prefix = segments[0].lower()
+        slug = segments[1]
+        if prefix == "pub":
+            # Legacy public URLs: /pub/<name>/<a>/<b>/<c>
+            slug = "-".join(segments[1:])
+            prefix = "in"
+        if not MEMBER_ID_RE.match(slug):
+            slug = slug.lower()
+        return f"https://{LINKEDIN_HOST}/{prefix}/{slug}/"
+
+    path = "/".join(segments)
+    return f"https://{LINKEDIN_HOST}/{path}/" if path else f"https://{LINKEDIN_HOST}/"
+
+
+def scrape_url(url: Optional[str]) -> str:
+    """URL to hand a scraper for a URL or URN as typed by a user
+
+    The canonical URL, unless that is only an identity key (profile URNs,
+    legacy /pub/ URLs): those are passed on as typed.
+    """
+    if not url:
+        return ""
+    url = url.strip()
+    if URN_RE.match(url):
+        return url
+    if is_linkedin_url(url):
+        _, segments = _split(url)
+        if segments and segments[0].lower() == "pub":
+            return url
+    return canonical_url(url)
+
+
+def entity_kind(url: Optional[str]) -> Optional[str]:
+    """"profile", "company" or None for other URLs"""
+    canonical = canonical_url(url)
+    if not canonical.startswith(f"https://{LINKEDIN_HOST}/"):
+        return None
+    _, segments = _split(canonical)
+    if len(segments) >= 2:
+        return ENTITY_PREFIXES.get(segments[0])
+    return None
+
+
+def entity_slug(url: Optional[str]) -> Optional[str]:
+    """Slug (or member id) of a profile / company URL"""
+    if entity_kind(url) is None:
+        return None
+    _, segments = _split(canonical_url(url))
+    return segments[1]
+
+
+def is_member_id_url(url: Optional[str]) -> bool:
+    """True for profile URLs built on an opaque member id instead of the vanity slug"""
+    slug = entity_slug(url)
+    return bool(slug) and entity_kind(url) == "profile" and bool(MEMBER_ID_RE.match(slug))
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import secrets
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+from mcp_server.phantombuster.results import load_json
+
+
+logger = logging.getLogger(__name__)
+
+# Notifications are a few hundred bytes, larger bodies are refused unread
+MAX_BODY_BYTES = 64 * 1024
+
+# Fields of a notification kept for waiters, the result object it may carry is not
+NOTIFICATION_FIELDS = ("containerId", "agentId", "exitCode", "exitMessage", "endType", "status")
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    def _reply(self, status: int):
+        self.send_response(status)
+        self.end_headers()
+
+    def do_POST(self):
+        receiver: "WebhookReceiver" = self.server.receiver
+        # Nothing is read from a request that can't be a notification
+        if self.path.rstrip("/") != f"/{receiver.token}":
+            self.close_connection = True
+            return self._reply(404)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_BODY_BYTES:
+            self.close_connection = True
+            return self._reply(400)
+        body = self.rfile.read(length) if length else b""
+        try:
+            payload = load_json(body)
+        except ValueError:
+            payload = None
+        if not isinstance(payload, dict):
+            return self._reply(400)
+        receiver.notify(payload)
+        self._reply(204)
+
+    def log_message(self, format, *args):
+        logger.debug("webhook %s - %s", self.address_string(), format % args)
+
+
+class _WebhookServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, receiver: "WebhookReceiver"):
+        self.receiver = receiver
+        super().__init__(address, _WebhookHandler)
+
+
+class WebhookReceiver:
+    """Embedded HTTP endpoint for Phantombuster's end-of-run webhooks
+
+    Agents created with a receiver register its ``url`` as their webhook, and
+    wait for the notification of their container instead of polling it
+    often. A notification only wakes the waiter up: the agent still reads the
+    container once to confirm it ended and get its result. Polling goes on
+    every ``fallback_interval`` seconds in case a notification is lost.
+
+    The endpoint path holds a random token, so only Phantombuster (which is
+    given the full URL) can wake waiters up. Notifications that arrive before
+    anyone waits are remembered (the last ``max_recent`` of them).
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on, 0 for any free port
+        public_url: URL Phantombuster can reach that forwards to this
+            endpoint (e.g. a tunnel or reverse proxy); the local address is
+            used without it
+        fallback_interval: Longest pause between two polls while waiting
+        max_recent: Notifications remembered for containers nobody waits for yet
+    """
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+            public_url: Optional[str] = None,
+            fallback_interval: float = 120,
+            max_recent: int = 1000
+        ):
+        self.host = host
+        self.public_url = public_url
+        self.fallback_interval = fallback_interval
+        self.max_recent = max_recent
+        self.token = secrets.token_urlsafe(16)
+        self.notifications = 0
+        self.unexpected = 0
+
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, List[Callable[[dict], None]]] = {}
+        self._recent: "OrderedDict[str, dict]" = OrderedDict()
+        self._server = _WebhookServer((host, port), self)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def url(self) -> str:
+        """Webhook URL given to Phantombuster"""
+        base = self.public_url or f"http://{self.host}:{self.port}"
+        return f"{base.rstrip('/')}/{self.token}"
+
+    def start(self) -> "WebhookReceiver":
+        """Serve notifications in a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="phantom-webhooks", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def notify(self, payload: dict):
+        """Wake up whoever waits for the container of a notification"""
+        container_id = payload.get("containerId")
+        if container_id is None:
+            self.unexpected += 1
+            return
+        container_id = str(container_id)
+        notification = {key: payload[key] for key in NOTIFICATION_FIELDS if key in payload}
+        with self._lock:
+            self.notifications += 1
+            waiters = self._waiters.pop(container_id, [])
+            if not waiters:
+                self._recent[container_id] = notification
+                while len(self._recent) > self.max_recent:
+                    self._recent.popitem(last=False)
+        for waiter in waiters:
+            waiter(notification)
+
+    def _subscribe(self, container_id: str, waiter: Callable[[dict], None]) -> Optional[dict]:
+        """Register a waiter, or return the notification if it already came"""
+        with self._lock:
+            notification = self._recent.pop(container_id, None)
+            if notification is None:
+                self._waiters.setdefault(container_id, []).append(waiter)
+            return notification
+
+    def _unsubscribe(self, container_id: str, waiter: Callable[[dict], None]):
+        with self._lock:
+            waiters = self._waiters.get(container_id)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[container_id]
+
+    def wait(self, container_id: str, timeout: float) -> Optional[dict]:
+        """Block until the container's notification comes, None on timeout"""
+        container_id = str(container_id)
+        event = threading.Event()
+        received = []
+
+        def waiter(notification: dict):
+            received.append(notification)
+            event.set()
+
+        notification = self._subscribe(container_id, waiter)
+        if notification is not None:
+            return notification
+        try:
+            event.wait(timeout)
+        finally:
+            self._unsubscribe(container_id, waiter)
+        return received[0] if received else None
+
+    async def wait_async(self, container_id: str, timeout: float) -> Optional[dict]:
+        """Async version of wait"""
+        container_id = str(container_id)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def waiter(notification: dict):
+            # Called from the HTTP server's thread
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(notification))
+
+        notification = self._subscribe(container_id, waiter)
+        if notification is not None:
+            return notification
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._unsubscribe(container_id, waiter)
+
+    def stats(self) -> dict:
+        with self._lock:
+            waiting = sum(len(waiters) for waiters in self._waiters.values())
+        return {"notifications": self.notifications, "unexpected": self.unexpected, "waiting": waiting}
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from mcp_server.phantombuster.base import run_listener
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One shared run: its task, and the run listeners of every caller waiting for it"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.listeners: List[Callable] = []
+        self.events: List[Tuple[Any, str]] = []
+
+    def join(self, listener: Optional[Callable]):
+        """Follow the run's agents, starting with what they already reported"""
+        if listener is None:
+            return
+        for agent, state in self.events:
+            listener(agent, state)
+        self.listeners.append(listener)
+
+    def notify(self, agent, state: str):
+        self.events.append((agent, state))
+        for listener in list(self.listeners):
+            listener(agent, state)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one run
+
+    The first caller for a key (the leader) starts the coroutine in its own
+    task; callers arriving while it runs (followers) await that same task
+    instead of starting a duplicate. Every caller awaits it through
+    ``asyncio.shield``, so a cancelled caller - leader included - only stops
+    waiting and the run goes on for the others (and to completion, so the
+    phantom container is not left orphaned and its result still gets cached).
+
+    The run's agents report to the ``run_listener`` of every caller, so a
+    background job that joined a run follows its containers like the leader.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, run: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of ``run()``, shared with every concurrent caller using the same key"""
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight()
+
+            async def lead():
+                run_listener.set(flight.notify)
+                return await run()
+
+            flight.task = asyncio.ensure_future(lead())
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda done: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+            logger.debug("Joining in-flight run for %s", key)
+        flight.join(run_listener.get())
+        return await asyncio.shield(flight.task)
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every caller was cancelled
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from mcp_server.phantombuster.models import Company, Profile
+from mcp_server.phantombuster.urls import canonical_url, scrape_url
+
+
+class IdentityIndex:
+    """Maps every known spelling of a LinkedIn profile or company to one identity
+
+    The identity is the canonical URL built on the vanity slug. Aliases are the
+    canonical forms of member-id URLs, URNs (``urn:li:fsd_profile:...``,
+    ``urn:li:member:<linkedin_user_id>``) and numeric company ids, learned from
+    scraped Profile / Company models.
+
+    Args:
+        path: SQLite file, ":memory:" for a process-local index
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS identity_aliases (
+                alias TEXT PRIMARY KEY,
+                identity TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+
+    def _identity(self, canonical: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT identity FROM identity_aliases WHERE alias = ?", (canonical,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def resolve(self, url: str) -> str:
+        """Identity of a URL or URN as typed by a user, its canonical form if unknown"""
+        canonical = canonical_url(url)
+        return self._identity(canonical) or canonical
+
+    def target(self, url: str) -> Tuple[str, str]:
+        """(identity, URL to scrape) of a URL or URN as typed by a user
+
+        A known alias is scraped at its identity. An unknown one is scraped at
+        scrape_url(url): a URN or legacy /pub/ URL is passed on as typed, since
+        its canonical form is only a key.
+        """
+        canonical = canonical_url(url)
+        identity = self._identity(canonical)
+        if identity is not None:
+            return identity, identity
+        return canonical, scrape_url(url)
+
+    def record(self, identity_url: str, *aliases: Optional[str]) -> str:
+        """Point the aliases (URLs or URNs) at the identity, returns the identity"""
+        identity = canonical_url(identity_url)
+        now = time.time()
+        rows = [(canonical_url(alias), identity, now) for alias in aliases if alias]
+        rows = [row for row in rows if row[0] and row[0] != identity]
+        if rows:
+            with self._lock:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO identity_aliases (alias, identity, updated_at) VALUES (?, ?, ?)", rows
+                )
+        return identity
+
+    def record_profile(self, profile: Profile, *aliases: Optional[str]) -> str:
+        """Learn the aliases of a scraped profile (plus the URLs it was requested with)"""
+        urn = profile.linkedin_urn
+        if urn and not urn.startswith("urn:"):
+            urn = f"urn:li:fsd_profile:{urn}"
+        user_id = f"urn:li:member:{profile.linkedin_user_id}" if profile.linkedin_user_id else None
+        return self.record(profile.linkedin_url or (aliases[0] if aliases else ""), urn, user_id, *aliases)
+
+    def record_company(self, company: Company, *aliases: Optional[str]) -> str:
+        """Learn the aliases of a scraped company (plus the URLs it was requested with)"""
+        company_id = f"urn:li:company:{company.ld_id}" if company.ld_id else None
+        return self.record(company.linkedin or (aliases[0] if aliases else ""), company_id, *aliases)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from mcp_server.phantombuster.results import load_json
+
+
+class RawStore:
+    """Raw scraper records kept aside from the models built from them (SQLite)
+
+    Models carry the id of their record instead of the record itself, and the
+    record is read back only when asked for. Records are stored as compact
+    JSON under a content hash, so the same record stored twice is kept once.
+    The oldest records are evicted once the store grows over ``max_bytes``.
+
+    Args:
+        path: SQLite file, ":memory:" for a process-local store
+        max_bytes: Maximum total size of stored records
+    """
+
+    def __init__(self, path: str = ":memory:", max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS raw_records (
+                raw_id TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS raw_records_created ON raw_records (created_at)")
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM raw_records").fetchone()[0]
+
+    def put(self, record: dict) -> str:
+        """Store a record and return its id"""
+        payload = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+        raw_id = hashlib.sha1(payload).hexdigest()[:16]
+        with self._lock:
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO raw_records (raw_id, payload, size, created_at) VALUES (?, ?, ?, ?)",
+                (raw_id, payload, len(payload), time.time())
+            ).rowcount
+            if inserted:
+                self._size += len(payload)
+                self._evict()
+        return raw_id
+
+    def get(self, raw_id: str) -> Optional[dict]:
+        """Stored record, None if unknown or evicted"""
+        with self._lock:
+            row = self._db.execute("SELECT payload FROM raw_records WHERE raw_id = ?", (raw_id,)).fetchone()
+        return load_json(row[0]) if row else None
+
+    def _evict(self):
+        # Called with the lock held
+        while self._size > self.max_bytes:
+            row = self._db.execute("SELECT raw_id, size FROM raw_records ORDER BY created_at LIMIT 1").fetchone()
+            if row is None:
+                self._size = 0
+                return
+            self._db.execute("DELETE FROM raw_records WHERE raw_id = ?", (row[0],))
+            self._size -= row[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._db.execute("SELECT COUNT(*) FROM raw_records").fetchone()[0]
+        return {"records": count, "bytes": self._size, "max_bytes": self.max_bytes}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,125 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Type, TypeVar
+
+from mcp_server.base_model.MarkdownModel import MarkdownModel
+
+
+ModelT = TypeVar("ModelT", bound=MarkdownModel)
+
+DAY = 24 * 60 * 60
+DEFAULT_TTL = {
+    "profile": 7 * DAY,
+    "company": 30 * DAY,
+}
+
+
+class ResultCache:
+    """Disk-backed cache of scraped models (SQLite)
+
+    Entries expire after a TTL that depends on their kind ("profile",
+    "company", ...) and the least recently used ones are evicted once the
+    cache grows over ``max_entries`` or ``max_bytes``.
+
+    Args:
+        path: SQLite file, ":memory:" for a process-local cache
+        ttl: Seconds an entry of each kind stays fresh, merged over DEFAULT_TTL
+        default_ttl: TTL for kinds missing from ``ttl``
+        max_entries: Maximum number of entries kept
+        max_bytes: Maximum total size of serialized entries
+    """
+
+    def __init__(
+            self,
+            path: str = ":memory:",
+            ttl: Optional[Dict[str, float]] = None,
+            default_ttl: float = DAY,
+            max_entries: int = 10000,
+            max_bytes: int = 100 * 1024 * 1024
+        ):
+        self.path = path
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS results (
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (kind, key)
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+
+    def _ttl(self, kind: str) -> float:
+        return self.ttl.get(kind, self.default_ttl)
+
+    def get(self, kind: str, key: str, model: Type[ModelT]) -> Optional[ModelT]:
+        """Cached model, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, created_at FROM results WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+            if row is None or now - row[1] > self._ttl(kind):
+                if row is not None:
+                    self._db.execute("DELETE FROM results WHERE kind = ? AND key = ?", (kind, key))
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE results SET accessed_at = ? WHERE kind = ? AND key = ?", (now, kind, key)
+            )
+            self.hits += 1
+        return model.model_validate_json(row[0])
+
+    def put(self, kind: str, key: str, value: MarkdownModel):
+        """Store a model and evict the least recently used entries if over the limits"""
+        payload = value.model_dump_json()
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (kind, key, payload, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, key, payload, len(payload), now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT kind, key, size FROM results ORDER BY accessed_at").fetchall()
+        evicted = []
+        for kind, key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evicted.append((kind, key))
+            count -= 1
+            total -= size
+        self._db.executemany("DELETE FROM results WHERE kind = ? AND key = ?", evicted)
+
+    def invalidate(self, kind: str, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM results WHERE kind = ? AND key = ?", (kind, key))
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
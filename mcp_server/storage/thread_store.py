@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from mcp_server.phantombuster.models import Message, Thread
+from mcp_server.phantombuster.messages import message_hash
+from mcp_server.phantombuster.urls import canonical_url
+
+
+class ThreadStore:
+    """Local copy of the LinkedIn inbox and conversations (SQLite)
+
+    Keeps the last version of every thread seen, keyed by its canonical URL,
+    and a watermark per inbox filter: the newest thread timestamp seen by the
+    last sync of that filter. Inbox syncs use both to only report threads that
+    are new or changed, and to stop scraping once they reach known threads.
+
+    Messages of scraped conversations are stored per thread, deduplicated by a
+    content hash, along with the inbox timestamp the thread had when it was
+    scraped, so a conversation the inbox recently showed unchanged is read
+    back without scraping it.
+
+    Args:
+        path: SQLite file, ":memory:" for a process-local store
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS inbox_threads (
+                thread_id TEXT PRIMARY KEY,
+                timestamp TEXT,
+                payload TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS thread_messages (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                thread_url TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                UNIQUE (thread_url, hash)
+            )"""
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS thread_syncs (
+                thread_url TEXT PRIMARY KEY,
+                timestamp TEXT,
+                synced_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS inbox_watermarks (
+                inbox_filter TEXT PRIMARY KEY,
+                timestamp TEXT,
+                synced_at REAL NOT NULL
+            )"""
+        )
+
+    def timestamps(self) -> Dict[str, Optional[str]]:
+        """Last known timestamp of every stored thread"""
+        with self._lock:
+            return dict(self._db.execute("SELECT thread_id, timestamp FROM inbox_threads").fetchall())
+
+    def get(self, thread_id: str) -> Optional[Thread]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload FROM inbox_threads WHERE thread_id = ?", (canonical_url(thread_id),)
+            ).fetchone()
+        return Thread.model_validate_json(row[0]) if row else None
+
+    def latest(self, limit: int = 10) -> List[Thread]:
+        """Most recent stored threads"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT payload FROM inbox_threads ORDER BY timestamp DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [Thread.model_validate_json(row[0]) for row in rows]
+
+    def put_many(self, threads: List[Thread]):
+        now = time.time()
+        rows = [(canonical_url(thread.thread_id), thread.timestamp, thread.model_dump_json(), now) for thread in threads]
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO inbox_threads (thread_id, timestamp, payload, updated_at) VALUES (?, ?, ?, ?)", rows
+            )
+
+    def watermark(self, inbox_filter: str) -> Optional[str]:
+        """Newest thread timestamp seen by the last sync of this filter"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT timestamp FROM inbox_watermarks WHERE inbox_filter = ?", (inbox_filter,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, inbox_filter: str, timestamp: Optional[str]):
+        """Move the filter's watermark forward, never back"""
+        current = self.watermark(inbox_filter)
+        if current is not None and (timestamp is None or timestamp <= current):
+            timestamp = current
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO inbox_watermarks (inbox_filter, timestamp, synced_at) VALUES (?, ?, ?)",
+                (inbox_filter, timestamp, time.time())
+            )
+
+    def messages(self, thread_url: str) -> List[Message]:
+        """Stored messages of a thread, in the order they were first seen"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT payload FROM thread_messages WHERE thread_url = ? ORDER BY seq", (canonical_url(thread_url),)
+            ).fetchall()
+        return [Message.model_validate_json(row[0]) for row in rows]
+
+    def add_messages(self, thread_url: str, messages: List[Message], timestamp: Optional[str] = None) -> List[Message]:
+        """Store a scraped conversation and return the messages that were not stored yet
+
+        Args:
+            thread_url: URL of the thread
+            messages: Messages of the thread, oldest first
+            timestamp: Inbox timestamp of the thread when it was scraped
+        """
+        key = canonical_url(thread_url)
+        with self._lock:
+            known = {row[0] for row in self._db.execute(
+                "SELECT hash FROM thread_messages WHERE thread_url = ?", (key,)
+            )}
+            new = []
+            for message in messages:
+                digest = message_hash(message)
+                if digest not in known:
+                    known.add(digest)
+                    new.append((key, digest, message.model_dump_json(), message))
+            self._db.executemany(
+                "INSERT INTO thread_messages (thread_url, hash, payload) VALUES (?, ?, ?)",
+                [row[:3] for row in new]
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO thread_syncs (thread_url, timestamp, synced_at) VALUES (?, ?, ?)",
+                (key, timestamp, time.time())
+            )
+        return [row[3] for row in new]
+
+    def is_unchanged(self, thread_url: str, max_age: float) -> bool:
+        """True when the thread was scraped and the inbox shows no activity since
+
+        Both the thread scrape and the inbox scrape must be less than
+        ``max_age`` seconds old: an old inbox scrape says nothing about what
+        happened in the thread since.
+        """
+        key = canonical_url(thread_url)
+        with self._lock:
+            synced = self._db.execute(
+                "SELECT timestamp, synced_at FROM thread_syncs WHERE thread_url = ?", (key,)
+            ).fetchone()
+            current = self._db.execute(
+                "SELECT timestamp, updated_at FROM inbox_threads WHERE thread_id = ?", (key,)
+            ).fetchone()
+        if not (synced and current and synced[0] and synced[0] == current[0]):
+            return False
+        oldest = time.time() - max_age
+        return synced[1] >= oldest and current[1] >= oldest
+
+    def inbox_timestamp(self, thread_url: str) -> Optional[str]:
+        """Timestamp of the thread in the last inbox scrape"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT timestamp FROM inbox_threads WHERE thread_id = ?", (canonical_url(thread_url),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        with self._lock:
+            self._db.close()
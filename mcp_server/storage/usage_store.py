@@ -0,0 +1,128 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+
+# Columns usage can be grouped by
+USAGE_GROUPS = ("tool", "script", "caller", "priority", "outcome")
+
+
+class UsageStore:
+    """Execution time of every phantom container, and the org quota last read (SQLite)
+
+    One row per container: how long it ran, which script it ran, and the tool,
+    caller and priority of the call that launched it. ``measured`` tells
+    whether the duration comes from Phantombuster's timestamps or was
+    estimated locally (e.g. a container given up on while still running).
+
+    Args:
+        path: SQLite file, ":memory:" for a process-local store
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS container_usage (
+                container_id TEXT PRIMARY KEY,
+                org TEXT NOT NULL,
+                script TEXT NOT NULL,
+                tool TEXT NOT NULL,
+                caller TEXT NOT NULL,
+                priority TEXT NOT NULL,
+                outcome TEXT NOT NULL,
+                seconds REAL NOT NULL,
+                measured INTEGER NOT NULL,
+                ended_at REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS container_usage_ended ON container_usage (org, ended_at)")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS org_quota (
+                org TEXT PRIMARY KEY,
+                used REAL NOT NULL,
+                quota REAL NOT NULL,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+
+    def record(
+            self,
+            container_id: str,
+            org: str,
+            script: str,
+            seconds: float,
+            measured: bool,
+            outcome: str,
+            tool: str = "unknown",
+            caller: str = "unknown",
+            priority: str = "normal"
+        ):
+        """Store the usage of a container, once (a container recorded again is updated)"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO container_usage "
+                "(container_id, org, script, tool, caller, priority, outcome, seconds, measured, ended_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(container_id), org, script, tool, caller, priority, outcome, seconds, int(measured), time.time())
+            )
+
+    def seconds_since(self, org: str, since: float) -> float:
+        """Total execution time of the org's containers that ended after ``since``"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COALESCE(SUM(seconds), 0) FROM container_usage WHERE org = ? AND ended_at >= ?", (org, since)
+            ).fetchone()[0]
+
+    def summary(self, group_by: Sequence[str] = ("tool", "script", "caller"), since: Optional[float] = None) -> List[dict]:
+        """Runs, failed runs and execution time per group, most expensive first"""
+        unknown = [column for column in group_by if column not in USAGE_GROUPS]
+        if unknown:
+            raise ValueError(f"Unknown group {', '.join(unknown)}, expected some of: {', '.join(USAGE_GROUPS)}")
+        columns = ", ".join(group_by)
+        select = f"{columns}, " if group_by else ""
+        group = f"GROUP BY {columns}" if group_by else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {select}COUNT(*), SUM(outcome != 'success'), SUM(seconds), SUM(1 - measured) "
+                f"FROM container_usage WHERE ended_at >= ? {group} ORDER BY SUM(seconds) DESC",
+                (since or 0,)
+            ).fetchall()
+        summary = []
+        for row in rows:
+            runs, failed, seconds, estimated = row[len(group_by):]
+            if not runs:
+                continue
+            summary.append({
+                **dict(zip(group_by, row)),
+                "runs": runs,
+                "failed": failed,
+                "seconds": round(seconds, 1),
+                "estimated_runs": estimated,
+            })
+        return summary
+
+    def set_quota(self, org: str, used: float, quota: float):
+        """Remember the org's execution time used and allowed, as reported by Phantombuster"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO org_quota (org, used, quota, fetched_at) VALUES (?, ?, ?, ?)",
+                (org, used, quota, time.time())
+            )
+
+    def quota(self, org: str) -> Optional[Tuple[float, float, float]]:
+        """(used, quota, fetched_at) last read for the org, None if never read"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT used, quota, fetched_at FROM org_quota WHERE org = ?", (org,)
+            ).fetchone()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
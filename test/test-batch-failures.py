@@ -0,0 +1,81 @@
+import os
+import asyncio
+import tempfile
+import importlib.util
+
+from benchmarks.fake_phantombuster import FakePhantombuster
+from mcp_server.phantombuster.base import PhantomCredentials
+from mcp_server.phantombuster.company import PhantomAgentCompanyBatch
+from mcp_server.phantombuster.profile import PhantomAgentProfileBatch
+from mcp_server.phantombuster.quota import QuotaGuard
+from mcp_server.phantombuster.transport import AsyncPhantomTransport, PhantomTransport
+from mcp_server.storage.usage_store import UsageStore
+
+
+CREDENTIALS = PhantomCredentials(phantombuster_key="fake-key", session_cookie="fake-cookie", user_agent="test")
+PROFILE_URLS = ["https://www.linkedin.com/in/a/", "https://www.linkedin.com/in/b/", "https://www.linkedin.com/in/a/"]
+COMPANY_URLS = ["https://www.linkedin.com/company/a/", "https://www.linkedin.com/company/b/"]
+
+
+async def agents_never_launched():
+    # The org's execution time is spent: the quota guard refuses every launch
+    fake = FakePhantombuster(execution_quota=100).start()
+    fake.execution_time = 100
+    transport = PhantomTransport(base_url=fake.base_url)
+    async_transport = AsyncPhantomTransport(base_url=fake.base_url)
+    quota = QuotaGuard(UsageStore(), transport=transport, async_transport=async_transport)
+
+    for agent_class, urls in ((PhantomAgentProfileBatch, PROFILE_URLS), (PhantomAgentCompanyBatch, COMPANY_URLS)):
+        agent = agent_class(credentials=CREDENTIALS, transport=transport, async_transport=async_transport, quota=quota)
+        data, success = await agent.run_and_get_data_async(urls)
+        results = agent.failed_results()
+        print(f"[{agent_class.__name__}]: success={success} cause={agent.error.cause} launches={fake.calls['agents/launch']}")
+        for result in results:
+            print(f"[{agent_class.__name__}]: {result.url} -> {result.error}")
+        assert not success and agent.error.cause == "quota_exceeded"
+        assert [result.url for result in results] == list(dict.fromkeys(urls))
+
+    await async_transport.close()
+    transport.close()
+    fake.close()
+
+
+async def tools_never_launched():
+    # Same through the tools: every URL gets an error result, in input order
+    os.environ.update(
+        PHANTOMBUSTER_API_KEY="fake-key", LINKEDIN_COOKIE_LI="fake-cookie", LINKEDIN_BROWSER_AGENT="test",
+        LINKEDIN_MCP_CACHE_PATH=os.path.join(tempfile.mkdtemp(), "results.sqlite3"),
+        LINKEDIN_MCP_BUDGET_MONTHLY_SECONDS="1"
+    )
+    path = os.path.join(os.path.dirname(__file__), "..", "mcp_server", "linkedin-server.py")
+    spec = importlib.util.spec_from_file_location("linkedin_server", path)
+    server = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(server)
+
+    # Every request the tools make goes to the fake, not to api.phantombuster.com
+    fake = FakePhantombuster().start()
+    transport = PhantomTransport(base_url=fake.base_url)
+    async_transport = AsyncPhantomTransport(base_url=fake.base_url)
+    server.transport, server.async_transport = transport, async_transport
+    server.pool.transport = transport
+    server.quota = QuotaGuard(server.usage, monthly_seconds=1, transport=transport, async_transport=async_transport)
+    org = server.quota.usage(server.get_credentials())["org"]
+    server.usage.record("1", org, "LinkedIn Profile Scraper.js", 10, True, "success")
+
+    profiles = await server.scrap_profiles(PROFILE_URLS)
+    companies = await server.scrap_companies(COMPANY_URLS)
+    for result in profiles + companies:
+        print(f"[tools]: {result.url} -> {result.error}")
+    assert [result.url for result in profiles] == PROFILE_URLS[:2]
+    assert [result.url for result in companies] == COMPANY_URLS
+    assert all(result.error for result in profiles + companies)
+    assert fake.calls["orgs/fetch-resources"] == 1 and not fake.calls["agents/launch"]
+
+    await async_transport.close()
+    transport.close()
+    fake.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(agents_never_launched())
+    asyncio.run(tools_never_launched())
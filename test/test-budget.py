@@ -0,0 +1,77 @@
+import json
+
+from mcp_server.base_model.budget import shape_result
+from mcp_server.phantombuster.base import PhantomCredentials
+from mcp_server.phantombuster.connections import PhantomAgentConnections
+from mcp_server.phantombuster.models import ConnectionsPage, Thread
+from mcp_server.phantombuster.profile import profile_from_record
+
+
+CREDENTIALS = PhantomCredentials(phantombuster_key="fake-key", session_cookie="fake-cookie", user_agent="test")
+
+
+def size(answer) -> int:
+    return len(json.dumps(answer, ensure_ascii=False, default=str))
+
+
+def export(count: int) -> dict:
+    records = [
+        {
+            "profileUrl": f"https://www.linkedin.com/in/user-{i}/", "firstName": "First", "lastName": f"Last {i}",
+            "fullName": f"First Last {i}", "title": "Software engineer at Acme " * 3, "connectionSince": "2024-01-01"
+        }
+        for i in range(count)
+    ]
+    return {"resultObject": json.dumps(records)}
+
+
+def test_list():
+    threads = [
+        Thread(thread_id=str(i), participants=["Jane Doe"], last_message="Hello " * 50,
+               last_message_date="2024-01-01", last_message_author_name="Jane Doe", timestamp="2024-01-01T00:00:00Z",
+               is_last_message_from_me=False, read_status=True, linkedin_url=f"https://www.linkedin.com/messaging/thread/{i}/")
+        for i in range(100)
+    ]
+    answer = shape_result(threads, max_chars=2000)
+    print(f"[list]: {len(answer['data'])} threads, {answer['chars']} chars, omitted {answer['omitted']}")
+    assert answer["chars"] <= 2000 and answer["omitted"]["items"] == 100 - len(answer["data"])
+
+
+def test_model_with_list():
+    agent = PhantomAgentConnections(credentials=CREDENTIALS)
+    raw_data = export(500)
+    connections, next_pos, starts = agent.parse_page(raw_data, 0, 500)
+    page = ConnectionsPage.from_export("123", 0, connections, starts, next_pos)
+
+    answer = shape_result(page, max_chars=2000)
+    data = answer["data"]
+    kept = len(data["connections"])
+    print(f"[page]: {kept} connections, {answer['chars']} chars, omitted {answer['omitted']}, next {data['next_cursor']}")
+    assert answer["chars"] <= 2000 and answer["omitted"]["items"] == 500 - kept
+    assert answer["omitted"]["items_of"] == "connections"
+
+    # The cursor resumes right after the last connection returned
+    _, offset, pos = data["next_cursor"].rsplit(":", 2)
+    following, _, _ = agent.parse_page(raw_data, int(pos), 1)
+    assert int(offset) == kept and following[0].full_name == f"First Last {kept}"
+
+
+def test_model():
+    profile = profile_from_record({
+        "linkedinProfileUrl": "https://www.linkedin.com/in/jane/", "firstName": "Jane", "lastName": "Doe",
+        "linkedinHeadline": "Engineer " * 100, "linkedinDescription": "About " * 500,
+    })
+    answer = shape_result(profile, max_chars=1000)
+    print(f"[profile]: {answer['chars']} chars, omitted {answer['omitted']}")
+    assert answer["chars"] <= 1000
+
+    # A budget that cannot be met is an error, not an oversized answer
+    answer = shape_result(profile, max_chars=10)
+    print(f"[profile]: {answer}")
+    assert answer["error"] is True
+
+
+if __name__ == "__main__":
+    test_list()
+    test_model_with_list()
+    test_model()
@@ -0,0 +1,45 @@
+import asyncio
+
+from benchmarks.fake_phantombuster import FakePhantombuster
+from mcp_server.phantombuster.base import PhantomCredentials
+from mcp_server.phantombuster.profile import PhantomAgentProfile
+from mcp_server.phantombuster.transport import AsyncPhantomTransport, PhantomTransport
+
+
+CREDENTIALS = PhantomCredentials(phantombuster_key="fake-key", session_cookie="fake-cookie", user_agent="test")
+
+
+async def failed_run(failure_message: str):
+    """Cause and message of a failed profile scrape, and how many times the console output was read"""
+    fake = FakePhantombuster(run_time=0.1, failure_rate=1.0, failure_message=failure_message, send_webhooks=False).start()
+    transport = PhantomTransport(base_url=fake.base_url)
+    async_transport = AsyncPhantomTransport(base_url=fake.base_url)
+    results = []
+    for run in ("sync", "async"):
+        agent = PhantomAgentProfile(credentials=CREDENTIALS, transport=transport, async_transport=async_transport)
+        if run == "sync":
+            _, success = await asyncio.to_thread(agent.run_and_get_data, "https://www.linkedin.com/in/jane-doe/")
+        else:
+            _, success = await agent.run_and_get_data_async("https://www.linkedin.com/in/jane-doe/")
+        assert not success
+        results.append((agent.error.cause, agent.error.message))
+    await async_transport.close()
+    transport.close()
+    fake.close()
+    return results, fake.calls["console output"]
+
+
+async def main():
+    # A script error is explained by the console output
+    results, outputs = await failed_run("error")
+    print(f"[script error]: {results}, console output read {outputs} times")
+    assert outputs == 2 and all(cause == "invalid_input" for cause, _ in results)
+
+    # The exit message already tells the cause: the console output is not downloaded
+    results, outputs = await failed_run("Session cookie expired")
+    print(f"[session expired]: {results}, console output read {outputs} times")
+    assert outputs == 0 and all(cause == "session_expired" for cause, _ in results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+from mcp_server.phantombuster.models import Profile
+from mcp_server.phantombuster.urls import canonical_url, scrape_url
+from mcp_server.storage.identity import IdentityIndex
+
+
+def test_scrape_url():
+    # Real pages are scraped at their canonical URL
+    assert scrape_url("linkedin.com/in/Jane-Doe?trk=x") == "https://www.linkedin.com/in/jane-doe/"
+    assert scrape_url("https://fr.linkedin.com/company/acme/about/") == "https://www.linkedin.com/company/acme/"
+    assert scrape_url("https://www.linkedin.com/messaging/thread/2-abc/?x=1") == "https://www.linkedin.com/messaging/thread/2-abc/"
+
+    # Keys that are not pages on LinkedIn are passed on as typed
+    for url in ("urn:li:member:12345", "https://www.linkedin.com/pub/john-doe/12/345/678"):
+        print(f"[scrape_url]: {url} -> key {canonical_url(url)}, scraped at {scrape_url(url)}")
+        assert scrape_url(url) == url
+    assert canonical_url("urn:li:member:12345") == "https://www.linkedin.com/in/12345/"
+
+
+def test_target():
+    identities = IdentityIndex()
+    assert identities.target("urn:li:member:12345") == ("https://www.linkedin.com/in/12345/", "urn:li:member:12345")
+    assert identities.target("linkedin.com/in/Jane-Doe") == (
+        "https://www.linkedin.com/in/jane-doe/", "https://www.linkedin.com/in/jane-doe/"
+    )
+
+    # Once learned, an alias is scraped at the profile it belongs to
+    profile = Profile(linkedin_url="https://www.linkedin.com/in/jane-doe/", first_name="Jane", last_name="Doe",
+                      headline="", location="", company="", job_title="", about="", skills=[], jobs=[],
+                      linkedin_user_id="12345")
+    identities.record_profile(profile)
+    for url in ("urn:li:member:12345", "https://www.linkedin.com/in/12345/"):
+        print(f"[target]: {url} -> {identities.target(url)}")
+        assert identities.target(url) == ("https://www.linkedin.com/in/jane-doe/", "https://www.linkedin.com/in/jane-doe/")
+
+
+if __name__ == "__main__":
+    test_scrape_url()
+    test_target()
@@ -0,0 +1,79 @@
+import json
+import warnings
+
+from pydantic import ValidationError
+
+from mcp_server.phantombuster.activities import ACTIVITY_MAPPING
+from mcp_server.phantombuster.company import COMPANY_MAPPING
+from mcp_server.phantombuster.connections import CONNECTION_MAPPING
+from mcp_server.phantombuster.messages import MESSAGE_MAPPING, THREAD_MAPPING
+from mcp_server.phantombuster.profile import PROFILE_MAPPING, SALES_NAV_PROFILE_MAPPING
+
+
+RECORDS = {
+    "company": (COMPANY_MAPPING, {
+        "name": "Acme", "description": "Rockets", "industry": "Aerospace", "specialties": "rockets, anvils",
+        "yearFounded": 1949, "companySize": 500, "mainCompanyID": 1234, "phone": 5550100
+    }),
+    "profile": (PROFILE_MAPPING, {
+        "linkedinProfileUrl": "https://www.linkedin.com/in/jane-doe/", "firstName": "Jane", "lastName": "Doe",
+        "linkedinSkillsLabel": "Python, SQL", "linkedinProfileId": 42, "companyName": "Acme"
+    }),
+    "sales_nav_profile": (SALES_NAV_PROFILE_MAPPING, {
+        "defaultProfileUrl": "https://www.linkedin.com/in/jane-doe/", "firstName": "Jane", "titleDescription": "About"
+    }),
+    "connection": (CONNECTION_MAPPING, {
+        "profileUrl": "https://www.linkedin.com/in/jane-doe/", "firstName": "Jane", "connectionSince": 2024
+    }),
+    "thread": (THREAD_MAPPING, {
+        "threadUrl": "https://www.linkedin.com/messaging/thread/1/", "firstnameFrom": "Jane", "lastnameFrom": "Doe",
+        "message": "Hello", "timestamp": 1700000000, "readStatus": 1,
+        "linkedInUrls": ["https://www.linkedin.com/in/jane-doe/"]
+    }),
+    "message": (MESSAGE_MAPPING, {"date": 1700000000, "author": "Jane Doe", "message": "Hello"}),
+    "activity": (ACTIVITY_MAPPING, {"postUrl": "https://www.linkedin.com/feed/update/1/", "postContent": "Hello"}),
+}
+
+
+def dump(model) -> dict:
+    # Fields of the wrong type make pydantic warn while serializing
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        return json.loads(model.model_dump_json())
+
+
+def test_records():
+    for name, (mapping, record) in RECORDS.items():
+        trusted = mapping.one(record)
+        validated = mapping.one(record, trusted=False)
+        print(f"[{name}]: {json.dumps(dump(trusted))[:100]}")
+        assert dump(trusted) == dump(validated)
+        assert [dump(model) for model in mapping.many([record, record])] == [
+            dump(model) for model in mapping.many([record, record], trusted=False)
+        ]
+
+
+def test_wrong_types():
+    # Values of the wrong type are validated instead of being stored as is
+    for record in (
+        {"name": "Acme", "industry": 5},
+        {"name": "Acme", "specialties": ["rockets", "anvils"]},
+        {"name": ["Acme"]},
+    ):
+        try:
+            company = COMPANY_MAPPING.one(record)
+        except ValidationError as e:
+            print(f"[company]: {record} rejected ({e.error_count()} error)")
+        else:
+            raise AssertionError(f"{record} gave {company!r}")
+        try:
+            COMPANY_MAPPING.many([{"name": "Acme"}, record])
+        except ValidationError:
+            pass
+        else:
+            raise AssertionError(f"{record} was not rejected in a list")
+
+
+if __name__ == "__main__":
+    test_records()
+    test_wrong_types()
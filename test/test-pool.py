@@ -0,0 +1,60 @@
+import asyncio
+import itertools
+from types import SimpleNamespace
+
+from mcp_server.phantombuster.base import PhantomCredentials
+from mcp_server.phantombuster.pool import PhantomAgentPool
+
+
+class RecordingTransport:
+    """Answers every delete, remembering the agent id and API key used"""
+
+    def __init__(self):
+        self.deleted = []
+
+    def post(self, url, json=None, headers=None, **kwargs):
+        self.deleted.append((json["id"], headers["X-Phantombuster-Key"]))
+        return SimpleNamespace(ok=True)
+
+
+ids = itertools.count(1)
+
+
+class FakeAgent:
+    def __init__(self, phantombuster_key: str, script_id: str):
+        self.credentials = PhantomCredentials(phantombuster_key=phantombuster_key, session_cookie="cookie", user_agent="test")
+        self.script_id = script_id
+        self.name = script_id
+        self.agent_id = None
+
+    def create(self, name: str) -> bool:
+        self.agent_id = str(next(ids))
+        return True
+
+    async def create_async(self, name: str) -> bool:
+        return self.create(name)
+
+
+def test_eviction_uses_the_evicted_key():
+    transport = RecordingTransport()
+    pool = PhantomAgentPool(max_agents=1, transport=transport)
+
+    first = FakeAgent("key-a", "profile")
+    assert pool.acquire(first)
+    pool.release(first)
+
+    # The pool is full: the idle agent of org A is deleted with org A's key
+    second = FakeAgent("key-b", "company")
+    assert pool.acquire(second)
+    print(f"[sync]: deleted {transport.deleted}")
+    assert transport.deleted == [(first.agent_id, "key-a")]
+    pool.release(second)
+
+    third = FakeAgent("key-a", "profile")
+    assert asyncio.run(pool.acquire_async(third))
+    print(f"[async]: deleted {transport.deleted}")
+    assert transport.deleted[-1] == (second.agent_id, "key-b")
+
+
+if __name__ == "__main__":
+    test_eviction_uses_the_evicted_key()
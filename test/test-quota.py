@@ -0,0 +1,51 @@
+import time
+
+from mcp_server.phantombuster.base import PhantomCredentials
+from mcp_server.phantombuster.quota import QuotaGuard, month_start
+from mcp_server.phantombuster.scheduler import fingerprint
+from mcp_server.storage.usage_store import UsageStore
+
+
+CREDENTIALS = PhantomCredentials(phantombuster_key="fake-key", session_cookie="fake-cookie", user_agent="test")
+ORG = fingerprint(CREDENTIALS.phantombuster_key)
+
+
+def guard_with_quota(fetched_at: float, **kwargs) -> QuotaGuard:
+    store = UsageStore()
+    store.set_quota(ORG, used=99, quota=100)
+    store._db.execute("UPDATE org_quota SET fetched_at = ? WHERE org = ?", (fetched_at, ORG))
+    return QuotaGuard(store, refresh_interval=300, **kwargs)
+
+
+def test_fresh_quota():
+    guard = guard_with_quota(time.time() - 60)
+    print(f"[fresh]: {guard.usage(CREDENTIALS)}")
+    assert guard.usage(CREDENTIALS)["used_share"] == 0.99
+    assert guard._refusal(CREDENTIALS, "normal") is not None
+
+
+def test_stale_quota():
+    # Older than a few refresh intervals: the org may have been reset or upgraded since
+    guard = guard_with_quota(time.time() - 3600)
+    usage = guard.usage(CREDENTIALS)
+    print(f"[stale]: {usage}")
+    assert usage["used_share"] is None and usage["org_quota"]["stale"]
+    assert guard._refusal(CREDENTIALS, "normal") is None
+
+    # The local budget still applies
+    guard = guard_with_quota(time.time() - 3600, monthly_seconds=100)
+    guard.store.record("1", ORG, "script", seconds=50, measured=True, outcome="success")
+    assert guard.usage(CREDENTIALS)["used_share"] == 0.5
+
+
+def test_previous_month_quota():
+    guard = guard_with_quota(month_start() - 1, max_quota_age=float("inf"))
+    usage = guard.usage(CREDENTIALS)
+    print(f"[previous month]: {usage}")
+    assert usage["used_share"] is None and usage["org_quota"]["stale"]
+
+
+if __name__ == "__main__":
+    test_fresh_quota()
+    test_stale_quota()
+    test_previous_month_quota()
@@ -0,0 +1,45 @@
+import time
+
+from benchmarks.fake_phantombuster import FakePhantombuster
+from mcp_server.phantombuster.base import PhantomCredentials
+from mcp_server.phantombuster.connections import PhantomAgentConnections
+from mcp_server.phantombuster.pool import PhantomAgentPool
+from mcp_server.phantombuster.transport import PhantomTransport
+
+
+CREDENTIALS = PhantomCredentials(phantombuster_key="fake-key", session_cookie="fake-cookie", user_agent="test")
+
+
+def export(fake: FakePhantombuster, transport: PhantomTransport, pool: PhantomAgentPool, count: int):
+    agent = PhantomAgentConnections(credentials=CREDENTIALS, transport=transport, pool=pool, max_retries=2)
+    agent.result_files_url = fake.files_url
+    _, success = agent.run_and_get_data(count)
+    connections, _, _ = agent.parse_page(agent.raw_data, 0, 1000) if success else ([], None, [])
+    return agent, success, connections
+
+
+def test_previous_run_file_is_not_read():
+    fake = FakePhantombuster(run_time=0.1, send_webhooks=False).start()
+    transport = PhantomTransport(base_url=fake.base_url)
+    pool = PhantomAgentPool(max_agents=1, transport=transport)
+
+    first, success, connections = export(fake, transport, pool, 10)
+    print(f"[first run]: agent {first.agent_id}, {len(connections)} connections, {fake.calls['result file']} file read")
+    assert success and len(connections) == 10
+
+    # The pooled agent is reused, and its next run writes no result file:
+    # the file left by the first run must not be taken for this run's result
+    fake.result_files = False
+    time.sleep(1.1)
+    second, success, connections = export(fake, transport, pool, 5)
+    print(f"[second run]: agent {second.agent_id}, {len(connections)} connections")
+    assert second.agent_id == first.agent_id
+    assert success and len(connections) == 5
+
+    pool.close()
+    transport.close()
+    fake.close()
+
+
+if __name__ == "__main__":
+    test_previous_run_file_is_not_read()
@@ -0,0 +1,45 @@
+import asyncio
+from types import SimpleNamespace
+
+from mcp_server.jobs import JobRegistry
+from mcp_server.phantombuster.base import run_listener
+from mcp_server.singleflight import SingleFlight
+
+
+async def scrape():
+    """Stands in for a tool: one agent that reports its run to the current listener"""
+    listener = run_listener.get()
+    agent = SimpleNamespace(container_id="1001")
+    listener(agent, "queued")
+    await asyncio.sleep(0.1)
+    listener(agent, "launched")
+    await asyncio.sleep(0.1)
+    listener(agent, "running")
+    await asyncio.sleep(0.2)
+    listener(agent, "finished")
+    return {"first_name": "Jane"}
+
+
+async def main():
+    inflight = SingleFlight()
+    jobs = JobRegistry()
+    leader = jobs.start("profile", lambda: inflight.do("jane", scrape))
+    await asyncio.sleep(0.15)
+
+    # Joins after the launch: gets the container id it missed, then what follows
+    follower = jobs.start("profile", lambda: inflight.do("jane", scrape))
+    await asyncio.sleep(0.1)
+    print(f"[follower]: {follower.state} {follower.container_ids} while the leader is {leader.state}")
+    assert follower.state == leader.state == "running"
+    assert follower.container_ids == leader.container_ids == ["1001"]
+    assert inflight.coalesced == 1
+
+    await asyncio.sleep(0.3)
+    for job in (leader, follower):
+        print(f"[{job.job_id}]: {job.state} {job.container_ids} {job.result}")
+        assert job.state == "finished" and job.launched_at is not None and job.result == {"first_name": "Jane"}
+    assert inflight.in_flight() == 0
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+import time
+
+from mcp_server.phantombuster.messages import MESSAGE_MAPPING, THREAD_MAPPING
+from mcp_server.storage.thread_store import ThreadStore
+
+
+THREAD_URL = "https://www.linkedin.com/messaging/thread/1/"
+
+
+def synced_store(timestamp: str = "2024-01-01T00:00:00Z") -> ThreadStore:
+    store = ThreadStore()
+    store.put_many([THREAD_MAPPING.one({
+        "threadUrl": THREAD_URL, "message": "Hello", "timestamp": timestamp,
+        "linkedInUrls": ["https://www.linkedin.com/in/jane-doe/"]
+    })])
+    messages = [MESSAGE_MAPPING.one({"date": "2024-01-01", "author": "Jane Doe", "message": "Hello"})]
+    store.add_messages(THREAD_URL, messages, store.inbox_timestamp(THREAD_URL))
+    return store
+
+
+def test_recent_syncs():
+    store = synced_store()
+    assert store.is_unchanged(THREAD_URL, max_age=60)
+
+    # New activity in the inbox
+    store.put_many([THREAD_MAPPING.one({
+        "threadUrl": THREAD_URL, "message": "Are you there?", "timestamp": "2024-01-02T00:00:00Z",
+        "linkedInUrls": ["https://www.linkedin.com/in/jane-doe/"]
+    })])
+    assert not store.is_unchanged(THREAD_URL, max_age=60)
+
+
+def test_old_syncs():
+    # The inbox scrape is too old to tell whether the thread changed
+    store = synced_store()
+    store._db.execute("UPDATE inbox_threads SET updated_at = ?", (time.time() - 3600,))
+    print(f"[old inbox sync]: unchanged={store.is_unchanged(THREAD_URL, max_age=60)}")
+    assert not store.is_unchanged(THREAD_URL, max_age=60)
+    assert store.is_unchanged(THREAD_URL, max_age=7200)
+
+    # Same for the thread scrape
+    store = synced_store()
+    store._db.execute("UPDATE thread_syncs SET synced_at = ?", (time.time() - 3600,))
+    print(f"[old thread sync]: unchanged={store.is_unchanged(THREAD_URL, max_age=60)}")
+    assert not store.is_unchanged(THREAD_URL, max_age=60)
+
+
+if __name__ == "__main__":
+    test_recent_syncs()
+    test_old_syncs()
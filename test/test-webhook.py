@@ -0,0 +1,95 @@
+import json
+import time
+import asyncio
+import threading
+import http.client
+import urllib.parse
+import urllib.request
+import urllib.error
+
+from benchmarks.fake_phantombuster import FakePhantombuster
+from mcp_server.phantombuster.base import PhantomCredentials
+from mcp_server.phantombuster.polling import PollingSchedule
+from mcp_server.phantombuster.profile import PhantomAgentProfile
+from mcp_server.phantombuster.transport import AsyncPhantomTransport, PhantomTransport
+from mcp_server.phantombuster.webhooks import WebhookReceiver
+
+
+# Stands in for Phantombuster: posts the end-of-run notification of a container
+def notify(url: str, container_id: str, delay: float):
+    time.sleep(delay)
+    body = json.dumps({"agentId": "1", "containerId": container_id, "exitCode": 0, "exitMessage": "finished"}).encode()
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            print(f"[phantombuster]: POST {url} -> {response.status}")
+    except urllib.error.HTTPError as e:
+        print(f"[phantombuster]: POST {url} -> {e.code}")
+
+
+# Posts a request with the given Content-Length header, whatever the body
+def post_raw(url: str, content_length: str, body: bytes = b"") -> int:
+    parts = urllib.parse.urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=5)
+    connection.putrequest("POST", parts.path)
+    connection.putheader("Content-Length", content_length)
+    connection.endheaders(body)
+    status = connection.getresponse().status
+    connection.close()
+    print(f"[client]: POST with Content-Length {content_length[:20]} -> {status}")
+    return status
+
+
+async def main():
+    receiver = WebhookReceiver().start()
+    print(f"[webhook]: listening on {receiver.url}")
+
+    threading.Thread(target=notify, args=(receiver.url, "1001", 0.5)).start()
+    started = time.monotonic()
+    notification = await receiver.wait_async("1001", timeout=10)
+    print(f"[webhook]: {notification} after {time.monotonic() - started:.2f}s")
+
+    # Notification before anyone waits, then a forged one without the token
+    notify(receiver.url, "1002", 0)
+    print(f"[webhook]: {receiver.wait('1002', timeout=1)}")
+    notify(receiver.url.rsplit("/", 1)[0] + "/wrong-token", "1003", 0)
+    print(f"[webhook]: {await receiver.wait_async('1003', timeout=1)}")
+
+    # Malformed and oversized bodies are refused without being read
+    assert post_raw(receiver.url, "not-a-number") == 400
+    assert post_raw(receiver.url, "-1") == 400
+    assert post_raw(receiver.url, str(10 * 1024 * 1024)) == 400
+    assert post_raw(receiver.url.rsplit("/", 1)[0] + "/wrong-token", "2", b"{}") == 404
+
+    print(f"[webhook]: {receiver.stats()}")
+    receiver.close()
+
+
+# A lost notification must not hold the run past its deadline: the wait for it
+# is cut to what is left of max_wait, even with a long fallback interval
+async def lost_notification():
+    fake = FakePhantombuster(run_time=30, send_webhooks=False).start()
+    transport = PhantomTransport(base_url=fake.base_url)
+    async_transport = AsyncPhantomTransport(base_url=fake.base_url)
+    receiver = WebhookReceiver(fallback_interval=60).start()
+    credentials = PhantomCredentials(phantombuster_key="fake-key", session_cookie="fake-cookie", user_agent="test")
+    for run in ("sync", "async"):
+        agent = PhantomAgentProfile(credentials=credentials, transport=transport, async_transport=async_transport,
+                                    webhooks=receiver, polling=PollingSchedule())
+        agent.max_wait = 1
+        started = time.monotonic()
+        if run == "sync":
+            _, success = await asyncio.to_thread(agent.run_and_get_data, "https://www.linkedin.com/in/jane-doe/")
+        else:
+            _, success = await agent.run_and_get_data_async("https://www.linkedin.com/in/jane-doe/")
+        waited = time.monotonic() - started
+        print(f"[{run}]: gave up after {waited:.1f}s with {agent.error.cause}")
+        assert not success and agent.error.cause == "timeout" and waited < 5
+    receiver.close()
+    await async_transport.close()
+    transport.close()
+    fake.close()
+
+
+asyncio.run(main())
+asyncio.run(lost_notification())